@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+キャッシュ削除ポリシー（LRU / LFU / GDSF）の再生履歴リプレイベンチマーク
+
+再生履歴を各ポリシーの容量制限付きキャッシュに順に流し込み、
+ヒット率（再生回数ベース）とバイトヒット率（通信量ベース）を比較する。
+
+再生履歴ファイルは1行に「動画ID サイズ（バイト）」を空白区切りで記述する。
+省略時は、人気の偏った短い曲（3〜6分）の中にときどき長いミックス（1〜2時間）が
+混ざる再生履歴を生成して使う。
+
+使い方:
+    python benchmarks/bench_cache_policies.py [--history plays.txt] [--capacity 256 512 1024]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.eviction import POLICIES  # noqa: E402
+
+# 音声1分あたりのおおよそのサイズ（opus 160kbps）
+BYTES_PER_MINUTE = 1_200_000
+
+
+def load_history(path: str):
+    """再生履歴ファイルを読み込む"""
+    history = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and not parts[0].startswith("#"):
+                history.append((parts[0], int(parts[1])))
+    return history
+
+
+def make_history(plays: int, tracks: int, mixes: int, seed: int):
+    """短い人気曲と長いミックスが混ざった再生履歴を生成"""
+    rng = random.Random(seed)
+    short = [(f"track{i}", int(rng.uniform(3, 6) * BYTES_PER_MINUTE)) for i in range(tracks)]
+    long = [(f"mix{i}", int(rng.uniform(60, 120) * BYTES_PER_MINUTE)) for i in range(mixes)]
+    # 曲の人気はZipf分布（順位の逆数に比例）
+    weights = [1.0 / (rank + 1) for rank in range(tracks)]
+    
+    history = []
+    for _ in range(plays):
+        if rng.random() < 0.05:
+            history.append(rng.choice(long))
+        else:
+            history.append(rng.choices(short, weights)[0])
+    return history
+
+
+def replay(policy, history, capacity: int):
+    """再生履歴を容量制限付きキャッシュに流し込む"""
+    cached = {}
+    total = 0
+    for key, size in history:
+        if key in cached:
+            policy.stats.record_hit(size)
+            policy.access(key)
+            continue
+        
+        policy.stats.record_miss(size)
+        if size > capacity:
+            continue
+        cached[key] = size
+        total += size
+        policy.insert(key, size)
+        while total > capacity:
+            victim = policy.victim()
+            total -= cached.pop(victim)
+            policy.remove(victim, evicted=True)
+    return policy.stats
+
+
+def main():
+    """ベンチマークを実行"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--history", help="再生履歴ファイル（省略時は生成）")
+    parser.add_argument("--capacity", type=int, nargs="+", default=[256, 512, 1024],
+                        help="キャッシュ容量（MB、複数指定可）")
+    parser.add_argument("--plays", type=int, default=20000, help="生成する再生回数")
+    parser.add_argument("--tracks", type=int, default=2000, help="生成する短い曲の数")
+    parser.add_argument("--mixes", type=int, default=50, help="生成する長いミックスの数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+    
+    if args.history:
+        history = load_history(args.history)
+    else:
+        history = make_history(args.plays, args.tracks, args.mixes, args.seed)
+    total_bytes = sum(size for _, size in history)
+    print(f"再生履歴: {len(history)}回（{len({key for key, _ in history})}曲、"
+          f"合計 {total_bytes / 1024 ** 3:.1f} GB）")
+    print(f"{'容量[MB]':>9}  {'ポリシー':<8}{'ヒット率':>10}{'バイトヒット率':>14}{'時間[ms]':>10}")
+    
+    for capacity in args.capacity:
+        for name, policy_class in POLICIES.items():
+            start = time.perf_counter()
+            stats = replay(policy_class(), history, capacity * 1024 * 1024)
+            elapsed = time.perf_counter() - start
+            print(f"{capacity:>9}  {name:<8}{stats.hit_rate:>10.1%}{stats.byte_hit_rate:>14.1%}"
+                  f"{elapsed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+抽出1回あたりのオーバーヘッド計測（呼び出しごとの生成 vs 抽出器プール）
+
+スタブのYoutubeDLを使い、抽出器の初期化・HTTPセッション確立のコストを
+模擬した上で、呼び出しごとにYoutubeDLを生成する従来方式と
+ExtractorPool による再利用方式を比較する。
+
+使い方:
+    python benchmarks/bench_extractor_pool.py [--calls 50] [--init-ms 40] [--extract-ms 2]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import yt_dlp  # noqa: E402
+
+from src.core.extractor_pool import ExtractorPool  # noqa: E402
+
+
+def make_stub_extractor(init_cost: float, extract_cost: float):
+    """初期化と抽出に指定時間かかるYoutubeDLのスタブを作成"""
+    
+    class StubYoutubeDL:
+        """YoutubeDLのスタブ"""
+        
+        def __init__(self, opts=None):
+            # 抽出器の登録・HTTPセッション確立を模擬
+            time.sleep(init_cost)
+            self._session_ready = False
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *args):
+            self.close()
+        
+        def close(self):
+            pass
+        
+        def extract_info(self, url, download=False):
+            if not self._session_ready:
+                # 初回のみ接続確立（TLSハンドシェイク等）を模擬
+                time.sleep(init_cost / 2)
+                self._session_ready = True
+            time.sleep(extract_cost)
+            return {'id': url[-11:], 'title': 'stub', 'url': 'https://example.com/a'}
+    
+    return StubYoutubeDL
+
+
+def bench_per_call(urls, opts):
+    """従来方式: 呼び出しごとにYoutubeDLを生成して破棄"""
+    start = time.perf_counter()
+    for url in urls:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            ydl.extract_info(url, False)
+    return time.perf_counter() - start
+
+
+def bench_pool(urls, opts):
+    """新方式: ExtractorPoolでYoutubeDLを再利用"""
+    pool = ExtractorPool(opts, size=1)
+    try:
+        start = time.perf_counter()
+        for url in urls:
+            pool.executor.submit(pool.extract_info, url).result()
+        return time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+def main():
+    """ベンチマークを実行"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50, help="抽出回数")
+    parser.add_argument("--init-ms", type=float, default=40.0, help="抽出器初期化コスト（ミリ秒）")
+    parser.add_argument("--extract-ms", type=float, default=2.0, help="抽出1回のコスト（ミリ秒）")
+    args = parser.parse_args()
+    
+    urls = [f"https://www.youtube.com/watch?v=vid{i:08d}" for i in range(args.calls)]
+    opts = {'quiet': True, 'no_warnings': True}
+    stub = make_stub_extractor(args.init_ms / 1000, args.extract_ms / 1000)
+    
+    with patch.object(yt_dlp, 'YoutubeDL', stub):
+        per_call = bench_per_call(urls, opts)
+        pooled = bench_pool(urls, opts)
+    
+    floor = args.calls * args.extract_ms / 1000
+    print(f"抽出回数: {args.calls} (初期化 {args.init_ms}ms / 抽出 {args.extract_ms}ms)")
+    print(f"{'方式':<16}{'合計[s]':>10}{'1回あたり[ms]':>16}{'オーバーヘッド[ms]':>20}")
+    for name, elapsed in (("呼び出しごと生成", per_call), ("抽出器プール", pooled)):
+        per_item = elapsed / args.calls * 1000
+        overhead = (elapsed - floor) / args.calls * 1000
+        print(f"{name:<16}{elapsed:>10.3f}{per_item:>16.2f}{overhead:>20.2f}")
+    print(f"高速化: {per_call / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
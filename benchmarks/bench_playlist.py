@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+大きなプレイリストの操作のマイクロベンチマーク
+
+指定曲数のプレイリストに対して、ランダムな位置への挿入・削除・移動、
+動画IDによる重複確認、選択中の曲の位置の取得を繰り返し、1回あたりの時間を
+Playlist と素朴なPythonのリスト（list.insert / list.pop / 線形探索）で比較する。
+リストの「選択中の曲の位置」は、削除・挿入のたびに選択中の曲を探し直す方式とする。
+
+使い方:
+    python benchmarks/bench_playlist.py [--size 100000] [--ops 2000] [--seed 0]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.playlist import Playlist  # noqa: E402
+from src.models.video_info import VideoInfo  # noqa: E402
+
+
+def make_videos(size: int):
+    """計測用の動画情報を生成"""
+    return [VideoInfo(f"https://youtu.be/v{i:010d}", f"track {i}", video_id=f"v{i:010d}")
+            for i in range(size)]
+
+
+def bench(name: str, fn, ops: int):
+    """ops 回の操作の時間を計測し、1回あたりの時間（マイクロ秒）を返す"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return name, elapsed / ops * 1e6
+
+
+def run(size: int, ops: int, seed: int):
+    """各操作を Playlist とリストで計測"""
+    videos = make_videos(size)
+    extra = make_videos(size + ops)[size:]
+    rng = random.Random(seed)
+    positions = [rng.randrange(size) for _ in range(ops)]
+    lookups = [f"v{rng.randrange(size * 2):010d}" for _ in range(ops)]
+    
+    playlist = Playlist(videos)
+    plain = list(videos)
+    results = []
+    
+    def playlist_insert():
+        for video, index in zip(extra, positions):
+            playlist.insert(index, video)
+    
+    def list_insert():
+        for video, index in zip(extra, positions):
+            plain.insert(index, video)
+    
+    def playlist_remove():
+        for index in positions:
+            playlist.pop(index)
+    
+    def list_remove():
+        for index in positions:
+            plain.pop(index)
+    
+    def playlist_move():
+        for source, dest in zip(positions, reversed(positions)):
+            playlist.move(source, dest)
+    
+    def list_move():
+        for source, dest in zip(positions, reversed(positions)):
+            plain.insert(dest, plain.pop(source))
+    
+    def playlist_lookup():
+        for video_id in lookups:
+            playlist.contains_video_id(video_id)
+    
+    def list_lookup():
+        for video_id in lookups[:max(1, ops // 20)]:
+            any(video.video_id == video_id for video in plain)
+    
+    current = playlist.entry_at(size // 2)
+    current_video = plain[size // 2]
+    
+    def playlist_current():
+        for index in positions:
+            playlist.insert(index, extra[0])
+            playlist.index_of(current)
+            playlist.pop(index)
+    
+    def list_current():
+        for index in positions[:max(1, ops // 20)]:
+            plain.insert(index, extra[0])
+            next(i for i, video in enumerate(plain) if video is current_video)
+            plain.pop(index)
+    
+    for label, fast, slow, slow_ops in [
+        ("挿入", playlist_insert, list_insert, ops),
+        ("削除", playlist_remove, list_remove, ops),
+        ("移動", playlist_move, list_move, ops),
+        ("動画IDで重複確認", playlist_lookup, list_lookup, max(1, ops // 20)),
+        ("挿入・削除後の選択中の位置", playlist_current, list_current, max(1, ops // 20)),
+    ]:
+        _, fast_us = bench(label, fast, ops)
+        _, slow_us = bench(label, slow, slow_ops)
+        results.append((label, fast_us, slow_us))
+    return results
+
+
+def main():
+    """ベンチマークを実行"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100_000, help="プレイリストの曲数")
+    parser.add_argument("--ops", type=int, default=2000, help="各操作の回数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数のシード")
+    args = parser.parse_args()
+    
+    print(f"プレイリスト: {args.size}曲 / 各操作 {args.ops}回")
+    print(f"{'操作':<24}{'Playlist[us]':>14}{'list[us]':>14}{'比':>8}")
+    for label, fast_us, slow_us in run(args.size, args.ops, args.seed):
+        print(f"{label:<24}{fast_us:>14.2f}{slow_us:>14.2f}{slow_us / fast_us:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+曲送りから再生開始までの時間（time-to-first-audio）の計測
+
+応答までの遅延と帯域を模擬したローカルHTTPサーバーを上流とし、曲送り時に
+プレイヤーが受け取るまでの時間を次の3通りで比較する。
+
+- 直接: ストリームURLへ新規に接続（従来の再生方式）
+- プロキシ（コールド）: StreamProxy 経由、先頭は未取得
+- プロキシ（先頭先読み済み）: StreamProxy.prefetch_head で先頭を取得済み
+
+各方式で、VLCが再生開始前に溜めるバッファ分（network-caching の時間分の音声）を
+受け取り終えるまでの時間を計測する。先読み済みの曲は MediaPlayer が
+バッファ時間を WARM_NETWORK_CACHING_MS まで短くするため、その分だけ受け取る。
+VLC自体のデコーダー起動時間は含まない。
+
+使い方:
+    python benchmarks/bench_time_to_first_audio.py [--tracks 10] [--latency-ms 300] [--kbps 2000]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.media_player import MediaPlayer  # noqa: E402
+from src.core.stream_proxy import StreamProxy  # noqa: E402
+from src.models.video_info import VideoInfo  # noqa: E402
+
+# 音声のビットレート（opus 160kbps）と曲のサイズ
+AUDIO_BYTES_PER_SECOND = 160 * 1000 // 8
+TRACK_BYTES = 4 * 1024 * 1024
+# VLCの既定のネットワークバッファ時間（ミリ秒）
+DEFAULT_NETWORK_CACHING_MS = 1000
+
+
+def make_upstream(latency: float, bytes_per_second: float):
+    """応答遅延と帯域を模擬した上流サーバーを起動"""
+    body = bytes(range(256)) * (TRACK_BYTES // 256)
+    
+    class UpstreamHandler(BaseHTTPRequestHandler):
+        """Rangeリクエストに対応した低速な上流"""
+        
+        protocol_version = "HTTP/1.1"
+        
+        def do_GET(self):
+            start, _, end = self.headers.get("Range", "bytes=0-")[len("bytes="):].partition("-")
+            start = int(start or 0)
+            end = int(end) if end else len(body) - 1
+            data = body[start:end + 1]
+            # 接続確立・署名検証などによる応答までの遅延
+            time.sleep(latency)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{start + len(data) - 1}/{len(body)}")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            chunk = 16 * 1024
+            try:
+                for offset in range(0, len(data), chunk):
+                    self.wfile.write(data[offset:offset + chunk])
+                    time.sleep(chunk / bytes_per_second)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UpstreamHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/audio"
+
+
+def time_to_buffer(url: str, nbytes: int) -> float:
+    """新規の接続で先頭 nbytes バイトを受け取るまでの時間（秒）"""
+    started = time.perf_counter()
+    received = 0
+    with requests.get(url, headers={"Range": "bytes=0-"}, stream=True, timeout=30) as response:
+        for data in response.iter_content(16 * 1024):
+            received += len(data)
+            if received >= nbytes:
+                break
+    return time.perf_counter() - started
+
+
+def main():
+    """ベンチマークを実行"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=10, help="計測する曲送りの回数")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="上流の応答までの遅延（ミリ秒）")
+    parser.add_argument("--kbps", type=float, default=2000.0, help="上流の帯域（キロビット毎秒）")
+    args = parser.parse_args()
+    
+    server, upstream_url = make_upstream(args.latency_ms / 1000, args.kbps * 1000 / 8)
+    cold_bytes = AUDIO_BYTES_PER_SECOND * DEFAULT_NETWORK_CACHING_MS // 1000
+    warm_bytes = AUDIO_BYTES_PER_SECOND * MediaPlayer.WARM_NETWORK_CACHING_MS // 1000
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        proxy = StreamProxy(cache_dir=cache_dir, max_tracks=args.tracks * 2 + 2)
+        results = {"直接": [], "プロキシ（コールド）": [], "プロキシ（先頭先読み済み）": []}
+        for i in range(args.tracks):
+            results["直接"].append(time_to_buffer(upstream_url, cold_bytes))
+            
+            cold = VideoInfo(upstream_url, f"cold{i}", audio_url=upstream_url, video_id=f"cold{i:07d}")
+            results["プロキシ（コールド）"].append(time_to_buffer(proxy.url_for(cold), cold_bytes))
+            
+            warm = VideoInfo(upstream_url, f"warm{i}", audio_url=upstream_url, video_id=f"warm{i:07d}")
+            # 前の曲の再生中に先読みが完了している状態を再現
+            proxy.prefetch_head(warm).result(timeout=60)
+            results["プロキシ（先頭先読み済み）"].append(time_to_buffer(proxy.url_for(warm), warm_bytes))
+        proxy.stop()
+    server.shutdown()
+    
+    print(f"曲送り: {args.tracks}回 (上流の遅延 {args.latency_ms:.0f}ms / 帯域 {args.kbps:.0f}kbps)")
+    print(f"{'方式':<20}{'中央値[ms]':>12}{'最大[ms]':>12}")
+    for name, samples in results.items():
+        print(f"{name:<20}{statistics.median(samples) * 1000:>12.1f}{max(samples) * 1000:>12.1f}")
+    direct = statistics.median(results["直接"])
+    warm = statistics.median(results["プロキシ（先頭先読み済み）"])
+    print(f"短縮: {direct / warm:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
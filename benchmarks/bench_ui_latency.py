@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+抽出負荷下でのUIフレーム遅延計測（threadバックエンド vs processバックエンド）
+
+CPU負荷の高いスタブ抽出器を使い、抽出を並行実行している間に
+asyncioループ上の60fpsタイマーがどれだけ遅れるかを計測する。
+Textualの描画ループや更新ループと同じイベントループの応答性の指標になる。
+
+使い方:
+    python benchmarks/bench_ui_latency.py [--jobs 8] [--workers 2] [--work-ms 150]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.extractor_pool import ExtractorPool  # noqa: E402
+from src.core.process_extractor_pool import ProcessExtractorPool  # noqa: E402
+
+FRAME_INTERVAL = 1 / 60
+
+
+class CpuBoundExtractor:
+    """JS解釈や巨大ページへの正規表現を模擬するCPU負荷の高いスタブ抽出器"""
+    
+    def __init__(self, opts=None):
+        # 抽出時間はプロセスにも渡るようオプション経由で指定する
+        self.work_seconds = (opts or {}).get('work_seconds', 0.15)
+    
+    def extract_info(self, url, download=False):
+        deadline = time.perf_counter() + self.work_seconds
+        value = 0
+        while time.perf_counter() < deadline:
+            # GILを保持したまま回る純Pythonの処理
+            for i in range(1000):
+                value = (value * 31 + i) % 1000003
+        return {'id': url[-11:], 'title': str(value), 'url': 'https://example.com/a'}
+
+
+async def measure(pool, jobs: int):
+    """抽出を並行実行しながらフレームの遅延を計測"""
+    lags = []
+    done = asyncio.Event()
+    
+    async def frame_ticker():
+        loop = asyncio.get_running_loop()
+        expected = loop.time() + FRAME_INTERVAL
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, expected - loop.time()))
+            now = loop.time()
+            lags.append((now - expected) * 1000)
+            expected = now + FRAME_INTERVAL
+    
+    ticker = asyncio.create_task(frame_ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.extract(f"https://youtu.be/vid{i:08d}") for i in range(jobs)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker
+    return lags, elapsed
+
+
+def make_pool(backend: str, workers: int, work_seconds: float):
+    """バックエンドに応じた抽出器プールを作成（ウォームアップ済み）"""
+    pool_class = ProcessExtractorPool if backend == "process" else ExtractorPool
+    pool = pool_class({'work_seconds': work_seconds}, size=workers,
+                      extractor_factory=CpuBoundExtractor, job_timeout=None)
+    pool.warm_up()
+    # ウォームアップ（プロセス起動）を計測対象から外す
+    time.sleep(0.5)
+    return pool
+
+
+def main():
+    """ベンチマークを実行"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=8, help="抽出ジョブ数")
+    parser.add_argument("--workers", type=int, default=2, help="ワーカー数")
+    parser.add_argument("--work-ms", type=float, default=150.0, help="抽出1件あたりのCPU時間（ミリ秒）")
+    args = parser.parse_args()
+    
+    print(f"ジョブ数: {args.jobs} / ワーカー数: {args.workers} / 抽出CPU時間: {args.work_ms}ms")
+    print(f"{'バックエンド':<10}{'p50[ms]':>10}{'p95[ms]':>10}{'最大[ms]':>10}{'合計[s]':>10}")
+    
+    for backend in ("thread", "process"):
+        pool = make_pool(backend, args.workers, args.work_ms / 1000)
+        try:
+            lags, elapsed = asyncio.run(measure(pool, args.jobs))
+        finally:
+            pool.close()
+        
+        lags.sort()
+        p95 = lags[int(len(lags) * 0.95) - 1] if lags else 0.0
+        print(f"{backend:<10}{statistics.median(lags):>10.2f}{p95:>10.2f}{lags[-1]:>10.2f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
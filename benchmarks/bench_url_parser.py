@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+YouTube URLパーサーのマイクロベンチマーク
+
+様々な形式のURL（watch / youtu.be / shorts / embed / music / playlist /
+タイムスタンプ付き / YouTube以外）からなるコーパスを生成し、
+1件あたりの解析時間を計測する。比較のため urllib.parse による素朴な実装も計測する。
+
+使い方:
+    python benchmarks/bench_url_parser.py [--size 100000] [--seed 0]
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.url_parser import parse_youtube_url  # noqa: E402
+
+ID_CHARS = string.ascii_letters + string.digits + "-_"
+
+URL_SHAPES = [
+    "https://www.youtube.com/watch?v={vid}",
+    "https://www.youtube.com/watch?v={vid}&t={t}s",
+    "https://www.youtube.com/watch?v={vid}&list={pid}&index=3",
+    "https://m.youtube.com/watch?feature=share&v={vid}",
+    "https://music.youtube.com/watch?v={vid}&si=abcdef",
+    "https://youtu.be/{vid}",
+    "https://youtu.be/{vid}?t={t}",
+    "youtu.be/{vid}",
+    "https://www.youtube.com/shorts/{vid}",
+    "https://www.youtube.com/embed/{vid}?start={t}",
+    "https://www.youtube.com/live/{vid}",
+    "https://www.youtube.com/playlist?list={pid}",
+    "https://example.com/watch?v={vid}",
+    "https://youtube.com.evil.com/watch?v={vid}",
+    "not a url at all {vid}",
+]
+
+
+def make_corpus(size: int, seed: int):
+    """ランダムな動画ID・形式のURLコーパスを生成"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        shape = rng.choice(URL_SHAPES)
+        corpus.append(shape.format(
+            vid="".join(rng.choice(ID_CHARS) for _ in range(11)),
+            pid="PL" + "".join(rng.choice(ID_CHARS) for _ in range(32)),
+            t=rng.randint(0, 7200),
+        ))
+    return corpus
+
+
+def naive_parse(url: str):
+    """比較用: urllib.parse による素朴な動画ID抽出"""
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = (parsed.hostname or "").lower()
+    if host.endswith("youtu.be"):
+        return parsed.path.strip("/")
+    if host.endswith("youtube.com"):
+        return (parse_qs(parsed.query).get("v") or [""])[0]
+    return None
+
+
+def bench(name: str, fn, corpus):
+    """関数でコーパス全体を解析し、1件あたりの時間を表示"""
+    start = time.perf_counter()
+    for url in corpus:
+        fn(url)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{elapsed:>10.3f}{elapsed / len(corpus) * 1e6:>14.2f}")
+
+
+def main():
+    """ベンチマークを実行"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100000, help="コーパスのURL数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+    
+    corpus = make_corpus(args.size, args.seed)
+    matched = sum(1 for url in corpus if parse_youtube_url.__wrapped__(url))
+    print(f"コーパス: {len(corpus)}件（YouTube URLとして受理: {matched}件）")
+    print(f"{'実装':<28}{'合計[s]':>10}{'1件あたり[µs]':>14}")
+    
+    bench("urllib.parse（比較用）", naive_parse, corpus)
+    bench("parse_youtube_url（キャッシュなし）", parse_youtube_url.__wrapped__, corpus)
+    parse_youtube_url.cache_clear()
+    bench("parse_youtube_url（初回）", parse_youtube_url, corpus)
+    bench("parse_youtube_url（再解析）", parse_youtube_url, corpus[-1000:] * (len(corpus) // 1000))
+
+
+if __name__ == "__main__":
+    main()
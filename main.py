@@ -3,8 +3,67 @@
 YouTube Audio Player - メインエントリーポイント
 """
 
+import argparse
+
+
+def parse_args(argv=None):
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="YouTube Audio Player")
+    parser.add_argument(
+        "--extractor", choices=["thread", "process"], default="thread",
+        help="動画情報の抽出バックエンド（process はUIのカクつきを抑える）"
+    )
+    parser.add_argument(
+        "--audio-cache-size", type=int, default=2048, metavar="MB",
+        help="音声キャッシュの容量上限（MB、0でキャッシュしない）"
+    )
+    parser.add_argument(
+        "--cache-prefetched", action="store_true",
+        help="先読みした曲の音声もキャッシュに保存する"
+    )
+    parser.add_argument(
+        "--cache-policy", choices=["lru", "lfu", "gdsf"], default="lru",
+        help="音声キャッシュの削除ポリシー（gdsf は長いミックスより短い人気曲を残す）"
+    )
+    parser.add_argument(
+        "--no-stream-proxy", dest="stream_proxy", action="store_false",
+        help="ローカルのプロキシを経由せずストリームURLをVLCに直接渡す"
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="オフラインモードで起動（キャッシュ済みの曲のみ再生、'o'キーで切り替え）"
+    )
+    parser.add_argument(
+        "--crossfade", type=float, default=0.0, metavar="SECONDS",
+        help="曲間のクロスフェードの秒数（0-12、0で無効）"
+    )
+    parser.add_argument(
+        "--shuffle", action="store_true",
+        help="シャッフル再生で起動（1周するまで同じ曲を再生しない、's'キーで切り替え）"
+    )
+    parser.add_argument(
+        "--repeat", choices=["off", "one", "all"], default="off",
+        help="リピートモード（one: 1曲リピート、all: 全曲リピート、'r'キーで切り替え）"
+    )
+    parser.add_argument(
+        "--seek-step", type=float, default=5.0, metavar="SECONDS",
+        help="左右キーでシークする秒数"
+    )
+    parser.add_argument(
+        "--long-seek-step", type=float, default=60.0, metavar="SECONDS",
+        help="Shift+左右キーでシークする秒数"
+    )
+    parser.add_argument(
+        "--buffering", choices=["low-latency", "balanced", "resilient"], default="balanced",
+        help="ストリーム再生のバッファ設定（resilient は不安定な回線向け、キャッシュ済みの曲は常に低遅延、'b'キーで切り替え）"
+    )
+    return parser.parse_args(argv)
+
+
 def main():
     """メイン関数"""
+    args = parse_args()
+    
     try:
         import vlc
     except ImportError:
@@ -16,7 +75,20 @@ def main():
     
     from src.ui.app import YouTubePlayerApp
     
-    app = YouTubePlayerApp()
+    app = YouTubePlayerApp(
+        extractor_backend=args.extractor,
+        audio_cache_size=max(0, args.audio_cache_size) * 1024 * 1024,
+        cache_prefetched=args.cache_prefetched,
+        cache_policy=args.cache_policy,
+        stream_proxy=args.stream_proxy,
+        offline=args.offline,
+        crossfade=args.crossfade,
+        shuffle=args.shuffle,
+        repeat=args.repeat,
+        seek_step=args.seek_step,
+        long_seek_step=args.long_seek_step,
+        buffering=args.buffering,
+    )
     try:
         app.run()
     except KeyboardInterrupt:
@@ -84,7 +84,7 @@ def create_launcher_script(venv_path):
         python_path = venv_path / "Scripts" / "python"
         launcher_content = f"""@echo off
 cd /d "%~dp0"
-"{python_path}" main.py
+"{python_path}" main.py %*
 """
         launcher_path = Path.cwd() / "youtube-audio-player.bat"
     else:
@@ -92,7 +92,7 @@ cd /d "%~dp0"
         launcher_content = f"""#!/bin/bash
 # YouTube Audio Player 起動スクリプト
 cd "$(dirname "$0")"
-"{python_path}" main.py
+"{python_path}" main.py "$@"
 """
         launcher_path = Path.cwd() / "youtube-audio-player"
     
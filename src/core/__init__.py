@@ -4,5 +4,48 @@
 
 from .media_player import MediaPlayer
 from .youtube_downloader import YouTubeDownloader
+from .metadata_cache import MetadataCache
+from .audio_cache import AudioCache
+from .buffering import BufferingProfile, get_profile
+from .command_coalescer import CommandCoalescer
+from .command_queue import CommandQueue
+from .crossfade import Crossfader
+from .play_order import ShuffleOrder
+from .playlist import Playlist, PlaylistEntry
+from .range_downloader import RangeDownloader, RangeDownloadError
+from .eviction import CacheStats, EvictionPolicy, LRUPolicy, LFUPolicy, GDSFPolicy, make_policy
+from .stream_refresher import StreamRefresher
+from .stream_proxy import StreamProxy, StreamProxyError, RangeSet
+from .track_prefetcher import TrackPrefetcher
+from .url_parser import ParsedURL, parse_timestamp, parse_youtube_url
 
-__all__ = ["MediaPlayer", "YouTubeDownloader"] 
\ No newline at end of file
+__all__ = [
+    "MediaPlayer",
+    "YouTubeDownloader",
+    "MetadataCache",
+    "AudioCache",
+    "BufferingProfile",
+    "get_profile",
+    "CommandCoalescer",
+    "CommandQueue",
+    "Crossfader",
+    "ShuffleOrder",
+    "Playlist",
+    "PlaylistEntry",
+    "RangeDownloader",
+    "RangeDownloadError",
+    "CacheStats",
+    "EvictionPolicy",
+    "LRUPolicy",
+    "LFUPolicy",
+    "GDSFPolicy",
+    "make_policy",
+    "StreamRefresher",
+    "StreamProxy",
+    "StreamProxyError",
+    "RangeSet",
+    "TrackPrefetcher",
+    "ParsedURL",
+    "parse_timestamp",
+    "parse_youtube_url",
+] 
\ No newline at end of file
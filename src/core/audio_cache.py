@@ -0,0 +1,361 @@
+"""
+再生した音声のローカルキャッシュ
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union
+
+import requests
+
+from .paths import get_cache_dir
+from .extraction_executor import ExtractionExecutor, ExtractionQueueFullError
+from .eviction import CacheStats, EvictionPolicy, make_policy
+from .range_downloader import RangeDownloader, RangeDownloadError
+
+
+class AudioCache:
+    """動画IDをキーにした音声ファイルのディスクキャッシュ（容量上限 + 削除ポリシー）
+    
+    容量を超えた場合は削除ポリシー（既定はLRU）が選んだ曲から削除する。
+    プレイリストに含まれる曲はピン留めされ、容量を超えても削除されない。
+    ダウンロードはバイト範囲の並行取得で行い、中断した場合は次回に続きから再開する。
+    """
+    
+    DIR_NAME = "audio"
+    INDEX_FILE = "index.json"
+    DOWNLOAD_SUFFIX = ".download"
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+    CHUNK_SIZE = RangeDownloader.DEFAULT_CHUNK_SIZE
+    # キャッシュヒットによるインデックスの更新を書き込むまでの待ち時間（秒）
+    SAVE_DELAY = 5.0
+    
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_downloads: int = 2,
+                 timeout: float = 30.0, policy: Union[str, EvictionPolicy] = "lru",
+                 chunk_size: int = CHUNK_SIZE, max_parallel: int = 4):
+        """
+        音声キャッシュを初期化
+        
+        Args:
+            cache_dir: キャッシュディレクトリ（省略時はアプリ標準のディレクトリ配下）
+            max_bytes: キャッシュ全体の容量上限（バイト）
+            max_downloads: 同時に行うダウンロード数
+            timeout: ダウンロードの接続・読み込みタイムアウト（秒）
+            policy: 削除ポリシー（"lru" / "lfu" / "gdsf" またはポリシーのインスタンス）
+            chunk_size: ダウンロード時に1リクエストで取得するバイト数
+            max_parallel: 1曲あたりの同時リクエスト数
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else get_cache_dir() / self.DIR_NAME
+        self.index_path = self.cache_dir / self.INDEX_FILE
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.policy = make_policy(policy) if isinstance(policy, str) else policy
+        self._lock = threading.RLock()
+        # video_id -> {'file': str, 'size': int, 'accessed': float, 'hits': int}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._total_bytes = 0
+        self._pins: Counter = Counter()
+        self._downloads: Dict[str, Future] = {}
+        # ディスクへ未書き込みのインデックスの更新があるか
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._executor = ExtractionExecutor(
+            max_workers=max_downloads, job_timeout=None, thread_name_prefix="audio-cache"
+        )
+        self._session = requests.Session()
+        self._downloader = RangeDownloader(
+            self._session, chunk_size=chunk_size, max_parallel=max_parallel, timeout=timeout,
+            max_downloads=max_downloads
+        )
+        self._load()
+    
+    def _load(self):
+        """ディスクからインデックスを読み込み、再開できないダウンロードを片付ける"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # 取得済み範囲の記録があるファイルは次回のダウンロードで再開する
+            for part in self.cache_dir.glob("*.part"):
+                if not part.with_name(part.name + RangeDownloader.STATE_SUFFIX).is_file():
+                    part.unlink()
+            for state in self.cache_dir.glob("*.part" + RangeDownloader.STATE_SUFFIX):
+                if not state.with_suffix("").is_file():
+                    state.unlink()
+            for leftover in self.cache_dir.glob("*" + self.DOWNLOAD_SUFFIX):
+                leftover.unlink()
+        except OSError:
+            pass
+        
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        if not isinstance(raw, dict):
+            return
+        
+        # 参照順・参照回数を削除ポリシーに復元
+        valid = [
+            (video_id, entry) for video_id, entry in raw.items()
+            if isinstance(entry, dict) and 'file' in entry and 'size' in entry
+            and (self.cache_dir / entry['file']).is_file()
+        ]
+        for video_id, entry in sorted(valid, key=lambda item: item[1].get('accessed', 0.0)):
+            self._add_entry(video_id, entry)
+    
+    def _save(self):
+        """インデックスをディスクへアトミックに書き込む"""
+        self._dirty = False
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.cache_dir), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            # キャッシュの書き込み失敗は致命的ではない
+            pass
+    
+    def _mark_dirty(self):
+        """インデックスの更新を記録し、SAVE_DELAY 秒後にまとめて書き込む"""
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """未書き込みのインデックスの更新をディスクへ書き込む"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+    
+    def _add_entry(self, video_id: str, entry: Dict[str, Any]):
+        """エントリを登録し、削除ポリシーに通知"""
+        self._drop_entry(video_id)
+        self._entries[video_id] = entry
+        self._total_bytes += entry['size']
+        self.policy.insert(video_id, entry['size'], frequency=entry.get('hits', 1))
+    
+    def _drop_entry(self, video_id: str, evicted: bool = False) -> Optional[Dict[str, Any]]:
+        """エントリの登録を解除し、削除ポリシーに通知"""
+        entry = self._entries.pop(video_id, None)
+        if entry is not None:
+            self._total_bytes -= entry['size']
+            self.policy.remove(video_id, evicted=evicted)
+        return entry
+    
+    def _remove_file(self, entry: Dict[str, Any]):
+        """エントリの音声ファイルを削除"""
+        try:
+            (self.cache_dir / entry['file']).unlink()
+        except OSError:
+            pass
+    
+    def _evict(self) -> List[str]:
+        """容量上限を超えた分をピン留めされていない曲から削除ポリシーの順に削除"""
+        evicted = []
+        while self._total_bytes > self.max_bytes:
+            video_id = self.policy.victim(self.is_pinned)
+            if video_id is None:
+                break
+            self._remove_file(self._drop_entry(video_id, evicted=True))
+            evicted.append(video_id)
+        return evicted
+    
+    @property
+    def total_bytes(self) -> int:
+        """キャッシュ済みの音声ファイルの合計サイズ"""
+        return self._total_bytes
+    
+    @property
+    def stats(self) -> CacheStats:
+        """ヒット・ミスの統計"""
+        return self.policy.stats
+    
+    def get_path(self, video_id: str) -> Optional[Path]:
+        """
+        キャッシュ済みの音声ファイルを取得（アクセス順を更新）
+        
+        Args:
+            video_id: YouTubeの動画ID
+        
+        Returns:
+            音声ファイルのパス、キャッシュにない場合はNone
+        """
+        if not video_id:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(video_id)
+            path = self.cache_dir / entry['file'] if entry else None
+            if entry is not None and not path.is_file():
+                self._drop_entry(video_id)
+                self._save()
+                entry = None
+            
+            if entry is None:
+                self.stats.record_miss()
+                return None
+            
+            entry['accessed'] = time.time()
+            entry['hits'] = entry.get('hits', 1) + 1
+            self.policy.access(video_id)
+            self.stats.record_hit(entry['size'])
+            # 再生のたびに書き込まず、アクセス順の更新はまとめて書き込む
+            self._mark_dirty()
+            return path
+    
+    def store(self, video_id: str, source: Union[str, Path]) -> Optional[Path]:
+        """
+        音声ファイルをキャッシュに取り込む（元のファイルは移動される）
+        
+        Args:
+            video_id: YouTubeの動画ID
+            source: 取り込む音声ファイル（キャッシュディレクトリと同じファイルシステム上にあること）
+        
+        Returns:
+            キャッシュ内のパス、容量上限により保持できなかった場合はNone
+        """
+        source = Path(source)
+        file_name = f"{video_id}.audio"
+        path = self.cache_dir / file_name
+        
+        with self._lock:
+            os.replace(source, path)
+            size = path.stat().st_size
+            self._add_entry(video_id, {
+                'file': file_name, 'size': size, 'accessed': time.time(), 'hits': 1
+            })
+            # ストリームから取得したバイト数としてミスに計上
+            self.stats.add_miss_bytes(size)
+            evicted = self._evict()
+            self._save()
+            return None if video_id in evicted else path
+    
+    def download(self, video_id: str, url: str) -> Optional[Path]:
+        """
+        音声をダウンロードしてキャッシュに保存（呼び出し元のスレッドで実行）
+        
+        中断したダウンロードがあれば取得済みの範囲から再開する。
+        
+        Args:
+            video_id: YouTubeの動画ID
+            url: 音声ストリームのURL
+        
+        Returns:
+            キャッシュ内のパス、失敗した場合はNone
+        """
+        if not video_id or not url:
+            return None
+        
+        with self._lock:
+            if video_id in self._entries:
+                return self.cache_dir / self._entries[video_id]['file']
+        
+        dest = self.cache_dir / f"{video_id}{self.DOWNLOAD_SUFFIX}"
+        try:
+            return self.store(video_id, self._downloader.download(url, dest))
+        except (OSError, requests.RequestException, RangeDownloadError) as e:
+            print(f"Error caching audio: {e}")
+            return None
+        finally:
+            if dest.exists():
+                dest.unlink()
+    
+    def schedule_download(self, video_id: str, url: str) -> Optional[Future]:
+        """
+        音声のダウンロードをバックグラウンドで開始（同じ動画の重複ダウンロードはしない）
+        
+        Args:
+            video_id: YouTubeの動画ID
+            url: 音声ストリームのURL
+        
+        Returns:
+            ダウンロード結果のFuture、キャッシュ済み・開始できなかった場合はNone
+        """
+        if not video_id or not url:
+            return None
+        
+        with self._lock:
+            if video_id in self._entries or video_id in self._downloads:
+                return None
+            try:
+                future = self._executor.submit(self.download, video_id, url)
+            except (RuntimeError, ExtractionQueueFullError):
+                return None
+            self._downloads[video_id] = future
+        future.add_done_callback(lambda _: self._finish_download(video_id))
+        return future
+    
+    def _finish_download(self, video_id: str):
+        """完了したダウンロードを登録から外す"""
+        with self._lock:
+            self._downloads.pop(video_id, None)
+    
+    def pin(self, video_id: str):
+        """
+        曲をピン留め（プレイリストに含まれる間は削除しない）
+        
+        Args:
+            video_id: YouTubeの動画ID
+        """
+        if video_id:
+            with self._lock:
+                self._pins[video_id] += 1
+    
+    def unpin(self, video_id: str):
+        """
+        曲のピン留めを1つ解除
+        
+        Args:
+            video_id: YouTubeの動画ID
+        """
+        if not video_id:
+            return
+        with self._lock:
+            self._pins[video_id] -= 1
+            if self._pins[video_id] <= 0:
+                del self._pins[video_id]
+                if self._evict():
+                    self._save()
+    
+    def is_pinned(self, video_id: str) -> bool:
+        """ピン留めされているかチェック"""
+        return self._pins[video_id] > 0
+    
+    def clear(self):
+        """ピン留めされていない音声ファイルと中断したダウンロードを全て削除"""
+        with self._lock:
+            for video_id in [k for k in self._entries if not self.is_pinned(k)]:
+                self._remove_file(self._drop_entry(video_id))
+            # 実行中のダウンロードが書き込んでいるファイルは残す
+            for part in self.cache_dir.glob("*" + self.DOWNLOAD_SUFFIX + ".part"):
+                if part.name.split(".")[0] not in self._downloads:
+                    self._downloader.discard(part.with_suffix(""))
+            self._save()
+    
+    def close(self):
+        """未書き込みのインデックスを書き込み、実行待ちのダウンロードを取り消す（実行中のダウンロードは待たない）"""
+        self.flush()
+        self._executor.shutdown(wait=False)
+        self._downloader.close()
+        self._session.close()
+    
+    def __len__(self) -> int:
+        """保持している音声ファイル数"""
+        return len(self._entries)
+    
+    def __contains__(self, video_id: str) -> bool:
+        """キャッシュ済みかチェック"""
+        return video_id in self._entries
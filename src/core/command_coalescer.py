@@ -0,0 +1,83 @@
+"""
+連続した入力操作をまとめて実行するコアレッサー
+"""
+
+import asyncio
+from typing import Any, Callable, Optional
+
+
+class CommandCoalescer:
+    """キーの連打・長押しで続けて届いた同じ種類の操作を1回にまとめて実行する
+    
+    最初の操作から window 秒の間に届いた同じ種類の操作は量を足し合わせ、
+    window 秒後に合計の量で1回だけ実行する（曲送り5回 → 5曲先を1回再生、
+    10秒の早送り10回 → 50秒の早送り1回）。待ち時間は最初の操作からの window 秒で
+    打ち切るため、長押しが続いても操作は window 秒ごとに反映される。
+    別の種類の操作が届いた場合は、待っていた操作を先に実行して順序を保つ。
+    asyncio のイベントループ上から呼び出す。
+    """
+    
+    # 操作をまとめる時間（秒）
+    DEFAULT_WINDOW = 0.15
+    
+    def __init__(self, window: float = DEFAULT_WINDOW):
+        """
+        コアレッサーを初期化
+        
+        Args:
+            window: 最初の操作から実行までの最大の待ち時間（秒、0でまとめずに即座に実行）
+        """
+        self.window = window
+        self._kind: Optional[str] = None
+        self._amount: float = 0
+        self._apply: Optional[Callable[[Any], Any]] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    @property
+    def pending(self) -> Optional[str]:
+        """実行待ちの操作の種類（なければNone）"""
+        return self._kind
+    
+    def submit(self, kind: str, amount: float, apply: Callable[[Any], Any]):
+        """
+        操作を受け付ける（まとめた後で apply を合計の量で呼び出す）
+        
+        Args:
+            kind: 操作の種類（同じ種類の操作だけをまとめる）
+            amount: 操作の量（曲数・秒数など、負の値は逆方向）
+            apply: 合計の量を受け取って操作を実行する関数
+        """
+        if self._kind is not None and self._kind != kind:
+            self.flush()
+        if self._kind is None:
+            self._kind = kind
+            self._amount = 0
+            if self.window > 0:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        self._amount += amount
+        self._apply = apply
+        if self.window <= 0:
+            self.flush()
+    
+    def flush(self) -> Any:
+        """
+        実行待ちの操作を直ちに実行
+        
+        Returns:
+            操作の戻り値（実行待ちの操作がない・合計の量が0の場合はNone）
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        kind, amount, apply = self._kind, self._amount, self._apply
+        self._kind, self._amount, self._apply = None, 0, None
+        if kind is None or not amount:
+            return None
+        return apply(amount)
+    
+    def cancel(self):
+        """実行待ちの操作を破棄"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._kind, self._amount, self._apply = None, 0, None
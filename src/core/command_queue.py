@@ -0,0 +1,108 @@
+"""
+操作を1つの所有スレッドで順に実行するコマンドキュー
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+
+class CommandQueue:
+    """状態を変える操作を1つの所有スレッドに集め、投入順に1つずつ実行する
+    
+    どのスレッドから投入された操作も所有スレッドで直列に実行されるため、
+    操作どうしの排他制御が不要になる。所有スレッド上での呼び出し（操作の中から
+    別の操作を呼ぶ場合）はキューを経由せずにその場で実行する。
+    所有スレッドは最初の投入時に起動し、操作がない間はキューで待機する。
+    """
+    
+    def __init__(self, name: str = "commands"):
+        """
+        コマンドキューを初期化
+        
+        Args:
+            name: 所有スレッドの名前
+        """
+        self.name = name
+        self._queue: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def is_owner(self) -> bool:
+        """呼び出し元が所有スレッドかどうか"""
+        return threading.current_thread() is self._thread
+    
+    def post(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        操作をキューに積む（完了は待たない）
+        
+        VLCのイベントのコールバックなど、その場で処理してはならない箇所から呼び出す。
+        停止後に積まれた操作は実行されずに取り消される。
+        
+        Args:
+            func: 所有スレッドで実行する関数
+        
+        Returns:
+            操作の結果を受け取るFuture
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                future.cancel()
+                return future
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._queue.put((future, func, args, kwargs))
+        return future
+    
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        操作を所有スレッドで実行し、完了を待って結果を返す
+        
+        所有スレッド上と停止後はその場で実行する。
+        
+        Args:
+            func: 実行する関数
+        
+        Returns:
+            関数の戻り値（例外は呼び出し元へ送出される）
+        """
+        if self._closed or self.is_owner():
+            return func(*args, **kwargs)
+        future = self.post(func, *args, **kwargs)
+        if future.cancelled():
+            return func(*args, **kwargs)
+        return future.result()
+    
+    def sync(self):
+        """それまでに積まれた操作がすべて実行されるまで待つ"""
+        if not self.is_owner():
+            self.call(lambda: None)
+    
+    def close(self):
+        """所有スレッドを停止（積まれている操作は実行してから停止する）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(None)
+    
+    def _run(self):
+        """操作を投入順に実行"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, func, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
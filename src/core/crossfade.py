@@ -0,0 +1,164 @@
+"""
+2つのVLCプレイヤーの音量を変化させる曲間のクロスフェード
+"""
+
+import math
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def equal_power_gains(progress: float) -> Tuple[float, float]:
+    """
+    等パワーのクロスフェード曲線
+    
+    Args:
+        progress: フェードの進み具合（0.0-1.0）
+    
+    Returns:
+        (前の曲の音量倍率, 次の曲の音量倍率)
+    """
+    progress = max(0.0, min(1.0, progress))
+    return math.cos(progress * math.pi / 2), math.sin(progress * math.pi / 2)
+
+
+class Crossfader:
+    """曲の終わりで次の曲を重ねて再生し、音量を時間に沿って入れ替える
+    
+    VLCの時間イベント（MediaPlayerTimeChanged / LengthChanged）を受け取る専用の
+    スレッドで動作する。イベントの間は単調時計で再生位置を補間するため、
+    フェードの開始位置と音量の刻みはイベントの間隔に左右されない。
+    VLCのコールバックはイベントをキューに積むだけで、libvlcを呼ばない。
+    """
+    
+    MAX_DURATION = 12.0
+    # フェード中に音量を更新する間隔（秒）
+    STEP = 0.02
+    
+    def __init__(self, player, duration: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        クロスフェードを初期化
+        
+        Args:
+            player: クロスフェードを行うメディアプレイヤー
+            duration: クロスフェードの秒数（0-12）
+            clock: 単調増加する時計（秒）
+        """
+        self.player = player
+        self.clock = clock
+        self.duration = duration
+        self._events: "queue.Queue[Optional[Tuple[str, Any, int, float]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        # プレイヤーごとの曲の長さ（ミリ秒）
+        self._lengths: Dict[Any, int] = {}
+        # (プレイヤー, 再生位置（ミリ秒）, イベントを受け取った時刻)
+        self._time: Optional[Tuple[Any, int, float]] = None
+        self._fade_started: Optional[float] = None
+        self._fade_length = 0.0
+    
+    @property
+    def duration(self) -> float:
+        """クロスフェードの秒数"""
+        return self._duration
+    
+    @duration.setter
+    def duration(self, value: float):
+        """クロスフェードの秒数を設定（0-12秒に丸める）"""
+        self._duration = max(0.0, min(self.MAX_DURATION, float(value)))
+    
+    def post_time(self, source, time_ms: int):
+        """再生位置の変化を通知（VLCのスレッドから呼ばれる）"""
+        self._events.put(("time", source, time_ms, self.clock()))
+    
+    def post_length(self, source, length_ms: int):
+        """曲の長さの確定を通知（VLCのスレッドから呼ばれる）"""
+        self._events.put(("length", source, length_ms, self.clock()))
+    
+    def start(self):
+        """イベントを処理するスレッドを開始"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="crossfade", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """スレッドを停止（完了は待たない）"""
+        self._events.put(None)
+        self._thread = None
+    
+    def _run(self):
+        """イベントを待ち、次に処理が必要な時刻まで眠る"""
+        timeout = None
+        while True:
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                pass
+            else:
+                if event is None:
+                    return
+                self._handle(event)
+            try:
+                timeout = self._tick(self.clock())
+            except Exception as e:
+                print(f"Error in crossfade: {e}")
+                timeout = None
+    
+    def _handle(self, event: Tuple[str, Any, int, float]):
+        """時間イベントを反映"""
+        kind, source, value, stamp = event
+        if kind == "length":
+            self._lengths[source] = value
+        elif source is self.player.player:
+            self._time = (source, value, stamp)
+    
+    def _remaining(self, now: float) -> Optional[float]:
+        """再生中の曲の残り時間（ミリ秒、不明な場合はNone）"""
+        if self._time is None or not self.player.is_playing:
+            return None
+        source, time_ms, stamp = self._time
+        length = self._lengths.get(source, 0)
+        if source is not self.player.player or length <= 0:
+            return None
+        return length - (time_ms + (now - stamp) * 1000)
+    
+    def _tick(self, now: float) -> Optional[float]:
+        """
+        フェードを進める
+        
+        Returns:
+            次に処理が必要になるまでの秒数（次のイベントまで待つ場合はNone）
+        """
+        if self._fade_started is not None:
+            # 曲送りなどでフェードが打ち切られた
+            if not self.player.is_fading:
+                self._fade_started = None
+                return None
+            progress = (now - self._fade_started) / self._fade_length if self._fade_length else 1.0
+            self.player.set_fade_volumes(*equal_power_gains(progress))
+            if progress >= 1.0:
+                self.player.finish_crossfade()
+                self._fade_started = None
+                return None
+            return self.STEP
+        
+        if self.duration <= 0:
+            return None
+        remaining = self._remaining(now)
+        if remaining is None:
+            return None
+        if remaining <= self.player.PRELOAD_SECONDS * 1000:
+            self.player.preload_next()
+        fade_ms = self.duration * 1000
+        if remaining > fade_ms:
+            # フェード開始位置まで眠る（途中で届く時間イベントで補正される）
+            return (remaining - fade_ms) / 1000
+        if remaining <= 0 or not self.player.begin_crossfade():
+            return None
+        
+        self._fade_started = now
+        self._fade_length = remaining / 1000
+        self._time = None
+        self.player.set_fade_volumes(*equal_power_gains(0.0))
+        return self.STEP
@@ -0,0 +1,313 @@
+"""
+キャッシュの削除ポリシー（LRU / LFU / GDSF）とヒット率の統計
+"""
+
+import heapq
+import itertools
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class CacheStats:
+    """キャッシュのヒット・ミスの件数とバイト数"""
+    
+    def __init__(self):
+        """統計を初期化"""
+        self.hits = 0
+        self.misses = 0
+        self.hit_bytes = 0
+        self.miss_bytes = 0
+    
+    def record_hit(self, size: int = 0):
+        """ヒットを記録"""
+        self.hits += 1
+        self.hit_bytes += size
+    
+    def record_miss(self, size: int = 0):
+        """ミスを記録（サイズが後から分かる場合は add_miss_bytes で加算）"""
+        self.misses += 1
+        self.miss_bytes += size
+    
+    def add_miss_bytes(self, size: int):
+        """ミスによって取得したバイト数を加算"""
+        self.miss_bytes += size
+    
+    @property
+    def requests(self) -> int:
+        """参照回数"""
+        return self.hits + self.misses
+    
+    @property
+    def hit_rate(self) -> float:
+        """ヒット率（0.0-1.0）"""
+        return self.hits / self.requests if self.requests else 0.0
+    
+    @property
+    def byte_hit_rate(self) -> float:
+        """バイトヒット率（キャッシュから返したバイト数の割合）"""
+        total = self.hit_bytes + self.miss_bytes
+        return self.hit_bytes / total if total else 0.0
+    
+    def reset(self):
+        """統計をリセット"""
+        self.__init__()
+    
+    def __repr__(self) -> str:
+        """デバッグ用文字列表現"""
+        return (f"CacheStats(hits={self.hits}, misses={self.misses}, "
+                f"hit_rate={self.hit_rate:.3f}, byte_hit_rate={self.byte_hit_rate:.3f})")
+
+
+class EvictionPolicy(ABC):
+    """削除する項目を決めるポリシー
+    
+    キャッシュは項目の追加・参照・削除をポリシーに通知し、容量を超えたときに
+    victim() が返す項目を削除する。
+    """
+    
+    name = ""
+    
+    def __init__(self):
+        """ポリシーを初期化"""
+        self.stats = CacheStats()
+    
+    @abstractmethod
+    def insert(self, key: Hashable, size: int = 1, frequency: int = 1):
+        """
+        項目の追加を通知
+        
+        Args:
+            key: 項目のキー
+            size: 項目のサイズ（バイト数、件数で管理する場合は1）
+            frequency: 参照回数の初期値（永続化した状態の復元用）
+        """
+    
+    @abstractmethod
+    def access(self, key: Hashable):
+        """
+        項目の参照を通知
+        
+        Args:
+            key: 項目のキー
+        """
+    
+    @abstractmethod
+    def remove(self, key: Hashable, evicted: bool = False):
+        """
+        項目の削除を通知
+        
+        Args:
+            key: 項目のキー
+            evicted: 容量超過による削除か（明示的な削除・無効化の場合はFalse）
+        """
+    
+    @abstractmethod
+    def victim(self, is_pinned: Optional[Callable[[Hashable], bool]] = None) -> Optional[Hashable]:
+        """
+        次に削除する項目を取得（取得するだけで削除はしない）
+        
+        Args:
+            is_pinned: 削除対象から除外する項目を判定する関数
+        
+        Returns:
+            削除する項目のキー、候補がない場合はNone
+        """
+    
+    @abstractmethod
+    def frequency(self, key: Hashable) -> int:
+        """項目の参照回数"""
+    
+    @abstractmethod
+    def __contains__(self, key: Hashable) -> bool:
+        """項目を管理しているか"""
+    
+    @abstractmethod
+    def __len__(self) -> int:
+        """管理している項目数"""
+
+
+class LRUPolicy(EvictionPolicy):
+    """最も長く参照されていない項目から削除する"""
+    
+    name = "lru"
+    
+    def __init__(self):
+        """ポリシーを初期化"""
+        super().__init__()
+        # key -> 参照回数（先頭ほど古い参照）
+        self._order: "OrderedDict[Hashable, int]" = OrderedDict()
+    
+    def insert(self, key: Hashable, size: int = 1, frequency: int = 1):
+        """項目を最新の参照として追加"""
+        self._order[key] = frequency
+        self._order.move_to_end(key)
+    
+    def access(self, key: Hashable):
+        """項目を最新の参照に移動"""
+        if key in self._order:
+            self._order[key] += 1
+            self._order.move_to_end(key)
+    
+    def remove(self, key: Hashable, evicted: bool = False):
+        """項目を削除"""
+        self._order.pop(key, None)
+    
+    def victim(self, is_pinned: Optional[Callable[[Hashable], bool]] = None) -> Optional[Hashable]:
+        """最も古く参照された項目"""
+        for key in self._order:
+            if not (is_pinned and is_pinned(key)):
+                return key
+        return None
+    
+    def frequency(self, key: Hashable) -> int:
+        """項目の参照回数"""
+        return self._order.get(key, 0)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        """項目を管理しているか"""
+        return key in self._order
+    
+    def __len__(self) -> int:
+        """管理している項目数"""
+        return len(self._order)
+
+
+class _HeapPolicy(EvictionPolicy):
+    """優先度の低い項目から削除するポリシーの基底（遅延削除付きヒープ）"""
+    
+    def __init__(self):
+        """ポリシーを初期化"""
+        super().__init__()
+        # key -> (優先度, 参照回数, サイズ, 登録順)
+        self._entries: Dict[Hashable, Tuple[float, int, int, int]] = {}
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._counter = itertools.count()
+    
+    @abstractmethod
+    def _priority(self, frequency: int, size: int) -> float:
+        """参照回数とサイズから優先度を計算"""
+    
+    def _push(self, key: Hashable, frequency: int, size: int):
+        """項目の優先度を更新してヒープに積む（古い要素は取り出し時に捨てる）"""
+        priority = self._priority(frequency, size)
+        seq = next(self._counter)
+        self._entries[key] = (priority, frequency, size, seq)
+        heapq.heappush(self._heap, (priority, seq, key))
+        # 古い要素が溜まりすぎた場合はヒープを作り直す
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(entry[0], entry[3], k) for k, entry in self._entries.items()]
+            heapq.heapify(self._heap)
+    
+    def insert(self, key: Hashable, size: int = 1, frequency: int = 1):
+        """項目を追加"""
+        self._push(key, max(1, frequency), max(1, size))
+    
+    def access(self, key: Hashable):
+        """参照回数を増やして優先度を更新"""
+        entry = self._entries.get(key)
+        if entry:
+            self._push(key, entry[1] + 1, entry[2])
+    
+    def remove(self, key: Hashable, evicted: bool = False):
+        """項目を削除（ヒープ上の要素は取り出し時に捨てる）"""
+        self._entries.pop(key, None)
+    
+    def _is_current(self, item: Tuple[float, int, Hashable]) -> bool:
+        """ヒープの要素が最新の状態か"""
+        entry = self._entries.get(item[2])
+        return entry is not None and entry[3] == item[1]
+    
+    def victim(self, is_pinned: Optional[Callable[[Hashable], bool]] = None) -> Optional[Hashable]:
+        """優先度の最も低い項目"""
+        skipped = []
+        found = None
+        while self._heap:
+            item = self._heap[0]
+            if not self._is_current(item):
+                heapq.heappop(self._heap)
+                continue
+            if is_pinned and is_pinned(item[2]):
+                skipped.append(heapq.heappop(self._heap))
+                continue
+            found = item[2]
+            break
+        for item in skipped:
+            heapq.heappush(self._heap, item)
+        return found
+    
+    def frequency(self, key: Hashable) -> int:
+        """項目の参照回数"""
+        entry = self._entries.get(key)
+        return entry[1] if entry else 0
+    
+    def __contains__(self, key: Hashable) -> bool:
+        """項目を管理しているか"""
+        return key in self._entries
+    
+    def __len__(self) -> int:
+        """管理している項目数"""
+        return len(self._entries)
+
+
+class LFUPolicy(_HeapPolicy):
+    """参照回数の最も少ない項目から削除する（同数の場合は古い参照から）"""
+    
+    name = "lfu"
+    
+    def _priority(self, frequency: int, size: int) -> float:
+        """優先度 = 参照回数"""
+        return frequency
+
+
+class GDSFPolicy(_HeapPolicy):
+    """GreedyDual-Size-Frequency: 参照回数が少なくサイズの大きい項目から削除する
+    
+    優先度は L + 参照回数 / サイズ。L は最後に削除した項目の優先度で、
+    過去に多く参照されたまま使われなくなった項目もいずれ削除されるようにする。
+    """
+    
+    name = "gdsf"
+    
+    def __init__(self):
+        """ポリシーを初期化"""
+        super().__init__()
+        self._inflation = 0.0
+    
+    def _priority(self, frequency: int, size: int) -> float:
+        """優先度 = L + 参照回数 / サイズ"""
+        return self._inflation + frequency / size
+    
+    def remove(self, key: Hashable, evicted: bool = False):
+        """項目を削除し、容量超過による削除の場合は L を更新"""
+        entry = self._entries.get(key)
+        # 容量超過で削除した項目の優先度まで L を引き上げる
+        if entry and evicted:
+            self._inflation = max(self._inflation, entry[0])
+        super().remove(key, evicted)
+
+
+POLICIES = {
+    LRUPolicy.name: LRUPolicy,
+    LFUPolicy.name: LFUPolicy,
+    GDSFPolicy.name: GDSFPolicy,
+}
+
+
+def make_policy(name: str) -> EvictionPolicy:
+    """
+    名前から削除ポリシーを生成
+    
+    Args:
+        name: ポリシー名（"lru" / "lfu" / "gdsf"）
+    
+    Returns:
+        削除ポリシー
+    
+    Raises:
+        ValueError: 不明なポリシー名の場合
+    """
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"不明な削除ポリシーです: {name}")
@@ -0,0 +1,195 @@
+"""
+動画情報抽出専用のスレッドエグゼキュータ
+"""
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, List
+
+
+class ExtractionQueueFullError(Exception):
+    """抽出待ちキューが上限に達している"""
+
+
+class ExtractionTimeoutError(Exception):
+    """抽出ジョブがタイムアウトした"""
+
+
+class ExtractionExecutor:
+    """ワーカー数・待ち行列の長さ・ジョブごとのタイムアウトを制御できる抽出専用エグゼキュータ
+    
+    ワーカーはデーモンスレッドのため、応答しない抽出が残っていても
+    アプリケーションの終了を妨げない。
+    """
+    
+    def __init__(self, max_workers: int = 4, max_queue: int = 32,
+                 job_timeout: Optional[float] = 60.0,
+                 thread_name_prefix: str = "yt-extractor",
+                 initializer: Optional[Callable[[], None]] = None):
+        """
+        エグゼキュータを初期化（ワーカーは最初のジョブ投入時に起動）
+        
+        Args:
+            max_workers: ワーカースレッド数
+            max_queue: 実行待ちにできるジョブ数の上限
+            job_timeout: ジョブ1件あたりのタイムアウト（秒、Noneで無制限）
+            thread_name_prefix: ワーカースレッド名の接頭辞
+            initializer: 各ワーカースレッドの起動時に呼ばれる関数
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(1, max_queue)
+        self.job_timeout = job_timeout
+        self.thread_name_prefix = thread_name_prefix
+        self.initializer = initializer
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _ensure_workers(self):
+        """ワーカースレッドを起動"""
+        with self._lock:
+            while len(self._threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"{self.thread_name_prefix}-{len(self._threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+    
+    def _worker(self):
+        """キューからジョブを取り出して実行"""
+        if self.initializer:
+            try:
+                self.initializer()
+            except Exception as e:
+                print(f"Error initializing extraction worker: {e}")
+        
+        while not self._closed:
+            item = self._queue.get()
+            if item is None:
+                break
+            
+            future, fn, args, on_start = item
+            # 待機中にキャンセルされたジョブは実行しない
+            if not future.set_running_or_notify_cancel():
+                continue
+            if on_start is not None:
+                on_start()
+            
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+    
+    @property
+    def pending(self) -> int:
+        """実行待ちのジョブ数"""
+        return self._queue.qsize()
+    
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        ジョブを投入
+        
+        Args:
+            fn: ワーカースレッドで実行する関数
+            *args: 関数の引数
+        
+        Returns:
+            実行結果のFuture
+        
+        Raises:
+            RuntimeError: シャットダウン済みの場合
+            ExtractionQueueFullError: 実行待ちキューが上限に達している場合
+        """
+        return self._enqueue(fn, args)
+    
+    def _enqueue(self, fn: Callable[..., Any], args: tuple,
+                 on_start: Optional[Callable[[], None]] = None) -> Future:
+        """ジョブをキューに積む（on_start はワーカーが実行を始める時に呼ばれる）"""
+        if self._closed:
+            raise RuntimeError("抽出エグゼキュータは停止しています")
+        
+        self._ensure_workers()
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, on_start))
+        except queue.Full:
+            raise ExtractionQueueFullError(
+                f"抽出待ちのジョブが上限（{self.max_queue}件）に達しています"
+            )
+        return future
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        ジョブを投入し、タイムアウト付きで完了を待つ
+        
+        タイムアウトはワーカーがジョブを取り出して実行を始めた時点から数えるため、
+        実行待ちの間はタイムアウトしない。
+        
+        Args:
+            fn: ワーカースレッドで実行する関数
+            *args: 関数の引数
+        
+        Returns:
+            関数の戻り値
+        
+        Raises:
+            ExtractionQueueFullError: 実行待ちキューが上限に達している場合
+            ExtractionTimeoutError: job_timeout 秒以内に完了しなかった場合
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        
+        def notify_started():
+            if not started.done():
+                started.set_result(None)
+        
+        future = self._enqueue(fn, args, lambda: loop.call_soon_threadsafe(notify_started))
+        result = asyncio.wrap_future(future)
+        try:
+            # 実行待ちの間は待ち続け、実行開始からの時間だけを制限する
+            await asyncio.wait({started, result}, return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(result, self.job_timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ExtractionTimeoutError(f"抽出が{self.job_timeout}秒以内に完了しませんでした")
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            started.cancel()
+    
+    def shutdown(self, wait: bool = False, timeout: Optional[float] = None):
+        """
+        エグゼキュータを停止（実行待ちのジョブはキャンセル）
+        
+        Args:
+            wait: 実行中のジョブの完了を待つか
+            timeout: wait=True の場合の最大待機時間（秒）
+        """
+        self._closed = True
+        
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        
+        # 待機中のワーカーを起こして終了させる
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        
+        if wait:
+            for thread in self._threads:
+                thread.join(timeout)
@@ -0,0 +1,206 @@
+"""
+ワーカースレッド単位で再利用するyt-dlp抽出器プール
+"""
+
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Union, Callable
+
+import yt_dlp
+
+from .paths import get_cache_dir
+from .extraction_executor import ExtractionExecutor, ExtractionQueueFullError
+
+
+# 動画情報として保持するyt-dlp情報辞書のキー
+_PAYLOAD_KEYS = ('id', 'title', 'duration', 'uploader', 'url')
+# フォーマット一覧から保持するキー
+_FORMAT_KEYS = ('format_id', 'ext', 'acodec', 'abr', 'filesize', 'url')
+
+
+def compact_info(info: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    yt-dlpの情報辞書を動画情報の生成に必要な項目だけの軽量な辞書に変換
+    
+    プロセス間で受け渡すペイロードを小さく保つために使う。変換済みの辞書を
+    再度渡しても同じ結果になる。
+    
+    Args:
+        info: yt-dlpのextract_infoの結果
+        
+    Returns:
+        軽量化した情報辞書（infoが空の場合はNone）
+    """
+    if not info:
+        return None
+    
+    payload = {key: info.get(key) for key in _PAYLOAD_KEYS if info.get(key) is not None}
+    payload['formats'] = [
+        {key: fmt.get(key) for key in _FORMAT_KEYS}
+        for fmt in info.get('formats') or []
+        if fmt.get('acodec') not in (None, 'none')
+    ]
+    return payload
+
+
+def compact_playlist(info: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    展開前（process=False）のプレイリスト情報から各エントリの軽量な辞書を作成
+    
+    エントリの列挙はyt-dlpがページ単位で遅延取得するため、ストリームの
+    解決は行わずに一覧の取得だけで完了する。
+    
+    Args:
+        info: yt-dlpのextract_info(process=False)の結果
+        
+    Returns:
+        各エントリの {'id', 'title', 'duration', 'channel'} の一覧
+    """
+    if not info:
+        return []
+    
+    entries = []
+    for entry in info.get('entries') or []:
+        if not entry or not entry.get('id'):
+            continue
+        entries.append({
+            'id': entry['id'],
+            'title': entry.get('title'),
+            'duration': entry.get('duration'),
+            'channel': entry.get('channel') or entry.get('uploader'),
+        })
+    return entries
+
+
+class ExtractorPool:
+    """ワーカースレッドごとに長寿命のYoutubeDLインスタンスを保持する抽出器プール"""
+    
+    def __init__(self, ydl_opts: Dict[str, Any], size: int = 4,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 max_queue: int = 32, job_timeout: Optional[float] = 60.0,
+                 extractor_factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """
+        抽出器プールを初期化
+        
+        Args:
+            ydl_opts: YoutubeDLに渡すオプション
+            size: ワーカースレッド数（= YoutubeDLインスタンス数の上限）
+            cache_dir: yt-dlpのキャッシュディレクトリ（プレイヤーJSや署名の解析結果を永続化）
+            max_queue: 実行待ちにできる抽出ジョブ数の上限
+            job_timeout: 抽出1件あたりのタイムアウト（秒）
+            extractor_factory: 抽出器の生成関数（省略時は yt_dlp.YoutubeDL）
+        """
+        self.size = size
+        self.extractor_factory = extractor_factory
+        self.ydl_opts = dict(ydl_opts)
+        self.ydl_opts['cachedir'] = str(cache_dir or (get_cache_dir() / "yt-dlp"))
+        if job_timeout:
+            # 応答しない接続でワーカーが占有され続けないようにする
+            self.ydl_opts.setdefault('socket_timeout', job_timeout)
+        self.executor = ExtractionExecutor(
+            max_workers=size, max_queue=max_queue, job_timeout=job_timeout,
+            thread_name_prefix="yt-extractor"
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances: List[Any] = []
+    
+    def _get_extractor(self):
+        """現在のワーカースレッドに紐づくYoutubeDLを取得（初回のみ生成）"""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            factory = self.extractor_factory or yt_dlp.YoutubeDL
+            ydl = factory(self.ydl_opts)
+            self._local.ydl = ydl
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+    
+    def extract_info(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        動画情報を抽出（ワーカースレッド上で実行される）
+        
+        Args:
+            url: YouTube動画のURL
+        
+        Returns:
+            yt-dlpの情報辞書
+        """
+        return self._get_extractor().extract_info(url, download=False)
+    
+    def extract_playlist_entries(self, url: str) -> List[Dict[str, Any]]:
+        """
+        プレイリストのエントリ一覧を取得（ワーカースレッド上で実行される）
+        
+        Args:
+            url: プレイリストのURL
+            
+        Returns:
+            compact_playlist の形式のエントリ一覧
+        """
+        return compact_playlist(self._get_extractor().extract_info(url, download=False, process=False))
+    
+    async def extract_playlist(self, url: str) -> List[Dict[str, Any]]:
+        """
+        ワーカースレッドでプレイリストのエントリ一覧を取得
+        
+        Args:
+            url: プレイリストのURL
+            
+        Returns:
+            compact_playlist の形式のエントリ一覧
+        """
+        return await self.executor.run(self.extract_playlist_entries, url)
+    
+    async def extract(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        ワーカースレッドで動画情報を抽出
+        
+        Args:
+            url: YouTube動画のURL
+        
+        Returns:
+            yt-dlpの情報辞書
+        """
+        return await self.executor.run(self.extract_info, url)
+    
+    def submit_extract(self, url: str):
+        """
+        動画情報の抽出をワーカースレッドに投入（イベントループを使わずに結果を待つ場合用）
+        
+        Args:
+            url: YouTube動画のURL
+        
+        Returns:
+            yt-dlpの情報辞書を結果とするFuture
+        
+        Raises:
+            ExtractionQueueFullError: 実行待ちのジョブが上限に達している場合
+        """
+        return self.executor.submit(self.extract_info, url)
+    
+    def warm_up(self):
+        """ワーカースレッドを起動し、抽出器を事前に生成（完了は待たない）"""
+        for _ in range(self.size):
+            try:
+                self.executor.submit(self._get_extractor)
+            except ExtractionQueueFullError:
+                break
+    
+    @property
+    def instance_count(self) -> int:
+        """生成済みのYoutubeDLインスタンス数"""
+        return len(self._instances)
+    
+    def close(self):
+        """ワーカースレッドを停止し、YoutubeDLインスタンスを破棄（実行中の抽出は待たない）"""
+        self.executor.shutdown(wait=False)
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            close = getattr(ydl, 'close', None)
+            if close:
+                try:
+                    close()
+                except Exception:
+                    pass
@@ -2,42 +2,353 @@
 VLCベースのメディアプレイヤー
 """
 
+import functools
+import time
 import vlc
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, Dict
 from ..models.video_info import VideoInfo
+from .audio_cache import AudioCache
+from .buffering import LOW_LATENCY, BufferingProfile, get_profile
+from .command_queue import CommandQueue
+from .crossfade import Crossfader
+from .play_order import ShuffleOrder
+from .playlist import Playlist, PlaylistEntry
+from .stream_proxy import StreamProxy
+
+
+def _serialized(method):
+    """プレイヤーの状態を変える操作を所有スレッドで実行するデコレーター"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._commands.call(method, self, *args, **kwargs)
+    return wrapper
 
 
 class MediaPlayer:
-    """VLCベースのメディアプレイヤー"""
+    """VLCベースのメディアプレイヤー
+    
+    曲の終わりが近づくと次の曲を待機用のプレイヤーで開いて先頭で一時停止させておき、
+    次の曲の再生時にプレイヤーを入れ替えることで曲間の無音をなくす。
+    クロスフェードを設定すると、曲の終わりで待機用のプレイヤーの再生を始めて
+    2つのプレイヤーの音量を入れ替える（Crossfader を参照）。
+    
+    シャッフル（1周するまで重複なし）と1曲リピート・全曲リピートに対応し、
+    次の曲・前の曲・先読みする曲はいずれも next_index / previous_index で決める。
+    
+    再生位置・長さ・再生状態はVLCのイベントで更新し（time_ms / length_ms / buffering）、
+    表示に関わる変化があった時だけ状態変化のコールバックへ通知する。
+    バッファ設定はキャッシュ済みの曲には低遅延のプロファイルを、ストリームには
+    選択中のプロファイル（buffering_profile）を曲ごとのメディアのオプションで適用する。
     
-    def __init__(self):
-        """メディアプレイヤーを初期化"""
-        # VLCのログ出力を完全に抑制
-        self.instance = vlc.Instance('--intf=dummy', '--no-video', '--quiet', '--no-sout-all', '--sout-keep')
+    シークは再生位置の割合ではなくミリ秒で指定し（seek_to / seek_relative）、
+    相対シークの起点は最後のイベントからの経過時間で補間した再生位置（position_ms）とする。
+    
+    プレイヤーの状態を変える操作はすべてコマンドキューの所有スレッドで順に実行する。
+    VLCのイベントはVLCのスレッドでは処理せずキューに積むため、VLCのスレッドから
+    libvlcを呼び出すことも、UIの操作と同時にプレイリストを変更することもない。
+    """
+    
+    # 先頭を先読み済みの曲のバッファ時間（ミリ秒、プロキシがローカルから即座に返すため短くする）
+    WARM_NETWORK_CACHING_MS = 150
+    # 曲の残り時間がこの秒数を切ったら次の曲を待機用のプレイヤーで開く
+    PRELOAD_SECONDS = 15.0
+    # 再生位置の補間の上限（ミリ秒、イベントが途絶えた場合に進めすぎない）
+    MAX_INTERPOLATION_MS = 1000
+    # リピートモード
+    REPEAT_OFF = "off"
+    REPEAT_ONE = "one"
+    REPEAT_ALL = "all"
+    REPEAT_MODES = (REPEAT_OFF, REPEAT_ONE, REPEAT_ALL)
+    
+    def __init__(self, audio_cache: Optional[AudioCache] = None,
+                 stream_proxy: Optional[StreamProxy] = None, crossfade: float = 0.0,
+                 clock: Callable[[], float] = time.monotonic, buffering_profile: str = "balanced"):
+        """
+        メディアプレイヤーを初期化
+        
+        Args:
+            audio_cache: 再生した音声を保存するキャッシュ（省略時はキャッシュしない）
+            stream_proxy: ストリームを中継するプロキシ（省略時はストリームURLを直接再生）
+            crossfade: 曲間のクロスフェードの秒数（0-12、0で無効）
+            clock: 単調増加する時計（秒、再生位置の補間に使う）
+            buffering_profile: ストリーム再生のバッファ設定（"low-latency" / "balanced" / "resilient"）
+        
+        Raises:
+            ValueError: 不明なバッファ設定の場合
+        """
+        self.audio_cache = audio_cache
+        self.stream_proxy = stream_proxy
+        self.clock = clock
+        self.buffering_profile: BufferingProfile = get_profile(buffering_profile)
+        # VLCのログ出力を完全に抑制（バッファ時間の既定値はストリーム用のプロファイル）
+        self.instance = vlc.Instance('--intf=dummy', '--no-video', '--quiet', '--no-sout-all', '--sout-keep',
+                                     *self.buffering_profile.instance_args())
         self.player = self.instance.media_player_new()
         self.current_video: Optional[VideoInfo] = None
-        self.playlist: List[VideoInfo] = []
-        self.current_index = 0
+        self.playlist = Playlist()
+        # 選択中の曲の項目（位置ではなく項目で持ち、他の曲の増減に追従する）
+        self._current_entry: Optional[PlaylistEntry] = None
+        self._current_position = 0
         self.is_playing = False
+        # オフラインモードではキャッシュ済みの曲だけを再生する
+        self.offline = False
+        # 音量（0-100、クロスフェード中は2つのプレイヤーに配分する）
+        self.volume = 100
+        # リピートモード（REPEAT_MODES のいずれか）
+        self.repeat = self.REPEAT_OFF
+        # シャッフル中の再生順（シャッフルしない場合はNone）
+        self._shuffle_order: Optional[ShuffleOrder] = None
+        
+        # UI・VLCのイベント・クロスフェードからの操作を1つのスレッドで直列に実行
+        self._commands = CommandQueue("media-player")
+        # 次の曲を開いておく待機用のプレイヤー（初回の先読み時に作成）
+        self._standby = None
+        self._standby_video: Optional[VideoInfo] = None
+        self._standby_cached = False
+        # クロスフェードでフェードアウト中のプレイヤー
+        self._fading_out = None
+        self._crossfader: Optional[Crossfader] = None
+        
+        # VLCのイベントで更新するプレイヤーごとの [再生位置, 長さ]（ミリ秒）
+        self._timeline: Dict[int, List[int]] = {}
+        # プレイヤーごとに再生位置を最後に記録した時刻（clock の秒）
+        self._time_stamps: Dict[int, float] = {}
+        # プレイヤーごとに曲を開いた回数（開き直す前の曲の終了通知を見分ける）
+        self._generations: Dict[int, int] = {}
+        # バッファの充填率（%、100でバッファ待ちなし）
+        self.buffering = 100.0
+        # 直近の再生エラー（次の再生開始で消える）
+        self.last_error: Optional[str] = None
         
         # コールバック関数
         self._on_track_end_callback: Optional[Callable] = None
+        self._on_track_change_callback: Optional[Callable] = None
+        self._on_state_change_callback: Optional[Callable] = None
         
         # VLCイベントマネージャー
         self.event_manager = self.player.event_manager()
-        self.event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+        self._attach_events(self.player)
+        self.set_crossfade(crossfade)
+    
+    def _attach_events(self, player):
+        """プレイヤーのVLCイベントを登録（通知元のプレイヤーを付けて受け取る）"""
+        events = player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached, player)
+        events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_time_changed, player)
+        events.event_attach(vlc.EventType.MediaPlayerLengthChanged, self._on_length_changed, player)
+        events.event_attach(vlc.EventType.MediaPlayerPlaying, self._on_playing, player)
+        events.event_attach(vlc.EventType.MediaPlayerPaused, self._on_paused, player)
+        events.event_attach(vlc.EventType.MediaPlayerStopped, self._on_paused, player)
+        events.event_attach(vlc.EventType.MediaPlayerBuffering, self._on_buffering, player)
+        events.event_attach(vlc.EventType.MediaPlayerEncounteredError, self._on_error, player)
     
     def set_on_track_end_callback(self, callback: Callable):
         """曲終了時のコールバック関数を設定"""
         self._on_track_end_callback = callback
+    
+    def set_on_track_change_callback(self, callback: Callable):
+        """クロスフェードで次の曲に切り替わった時のコールバック関数を設定（別スレッドから呼ばれる）"""
+        self._on_track_change_callback = callback
+    
+    def set_on_state_change_callback(self, callback: Callable):
+        """再生状態（表示する秒数・長さ・再生中か・バッファ・エラー）の変化時のコールバック関数を設定
+        
+        プレイヤーの所有スレッドから呼ばれるため、コールバックでは処理をイベントループへ渡すだけにする。
+        """
+        self._on_state_change_callback = callback
+    
+    def _notify_state(self):
+        """状態変化を通知"""
+        if self._on_state_change_callback:
+            self._on_state_change_callback()
+    
+    def set_crossfade(self, seconds: float):
+        """
+        曲間のクロスフェードの秒数を設定
+        
+        Args:
+            seconds: クロスフェードの秒数（0-12秒に丸める、0で無効）
+        """
+        if self._crossfader is None:
+            if seconds <= 0:
+                return
+            self._crossfader = Crossfader(self)
+            self._crossfader.start()
+        self._crossfader.duration = seconds
+    
+    @property
+    def crossfade(self) -> float:
+        """曲間のクロスフェードの秒数（0で無効）"""
+        return self._crossfader.duration if self._crossfader is not None else 0.0
+    
+    @property
+    def shuffle(self) -> bool:
+        """シャッフル再生中かどうか"""
+        return self._shuffle_order is not None
+    
+    @_serialized
+    def set_shuffle(self, enabled: bool):
+        """
+        シャッフル再生を切り替える
+        
+        有効にすると選択中の曲を最初の曲とする新しい周回を始める。
+        再生順は必要な分だけ決めるため、大きなプレイリストでもすぐに切り替わる。
+        
+        Args:
+            enabled: シャッフル再生にする場合True
+        """
+        if not enabled:
+            self._shuffle_order = None
+            return
+        if self._shuffle_order is None:
+            self._shuffle_order = ShuffleOrder(self.playlist)
+        self._shuffle_order.new_cycle(current=self._current_entry)
+    
+    @_serialized
+    def set_repeat(self, mode: str):
+        """
+        リピートモードを設定
         
-    def _on_end_reached(self, event):
-        """再生終了時の処理"""
+        Args:
+            mode: REPEAT_OFF / REPEAT_ONE / REPEAT_ALL
+        
+        Raises:
+            ValueError: 不明なモードの場合
+        """
+        if mode not in self.REPEAT_MODES:
+            raise ValueError(f"不明なリピートモードです: {mode}")
+        self.repeat = mode
+    
+    def _on_time_changed(self, event, source=None):
+        """再生位置の変化（VLCのスレッドではキューに積むだけ）"""
+        if self._crossfader is not None:
+            self._crossfader.post_time(source, event.u.new_time)
+        self._commands.post(self._apply_time, source, event.u.new_time)
+    
+    def _on_length_changed(self, event, source=None):
+        """曲の長さの確定（VLCのスレッドではキューに積むだけ）"""
+        if self._crossfader is not None:
+            self._crossfader.post_length(source, event.u.new_length)
+        self._commands.post(self._apply_length, source, event.u.new_length)
+    
+    def _on_playing(self, event, source=None):
+        """再生開始・再開（VLCのスレッドではキューに積むだけ）"""
+        self._commands.post(self._apply_playing, source, True)
+    
+    def _on_paused(self, event, source=None):
+        """一時停止・停止（VLCのスレッドではキューに積むだけ）"""
+        self._commands.post(self._apply_playing, source, False)
+    
+    def _on_buffering(self, event, source=None):
+        """バッファの充填率の変化（VLCのスレッドではキューに積むだけ）"""
+        self._commands.post(self._apply_buffering, source, event.u.new_cache)
+    
+    def _on_error(self, event, source=None):
+        """再生エラー（VLCのスレッドではキューに積むだけ）"""
+        self._commands.post(self._apply_error, source)
+    
+    def _on_end_reached(self, event, source=None):
+        """再生終了（VLCのスレッドではキューに積むだけ）"""
+        self._commands.post(self._apply_end_reached, source, self._generations.get(id(source), 0))
+    
+    def _apply_time(self, source, time_ms: int):
+        """再生位置を記録"""
+        timeline = self._timeline.setdefault(id(source), [0, 0])
+        previous, timeline[0] = timeline[0], time_ms
+        self._time_stamps[id(source)] = self.clock()
+        # 表示は秒単位のため、秒が変わった時だけ通知
+        if source is self.player and previous // 1000 != time_ms // 1000:
+            self._notify_state()
+    
+    def _apply_length(self, source, length_ms: int):
+        """曲の長さを記録"""
+        self._timeline.setdefault(id(source), [0, 0])[1] = length_ms
+        if source is self.player:
+            self._notify_state()
+    
+    def _apply_playing(self, source, playing: bool):
+        """再生中かどうかを反映（待機中のプレイヤーからの通知は無視）"""
+        if source is self.player and self.is_playing != playing:
+            self.is_playing = playing
+            self._notify_state()
+    
+    def _apply_buffering(self, source, percent: float):
+        """バッファの充填率を反映"""
+        if source is not self.player:
+            return
+        # 1%単位の変化だけを表示へ反映
+        if int(percent) != int(self.buffering):
+            self.buffering = percent
+            self._notify_state()
+    
+    def _apply_error(self, source):
+        """再生エラーを反映（待機中のプレイヤーのエラーは次の曲の再生時に改めて扱う）"""
+        if source is not self.player:
+            return
+        self.last_error = "再生中にエラーが発生しました"
+        self.is_playing = False
+        self._notify_state()
+    
+    def _apply_end_reached(self, source, generation: int):
+        """曲の終了時の処理（待機中のプレイヤーや、通知後に別の曲を開いた場合は無視）"""
+        if source is not None and (source is not self.player
+                                   or generation != self._generations.get(id(source), 0)):
+            return
         if self._on_track_end_callback:
             self._on_track_end_callback()
         else:
-            self.next_track()
+            self.next_track(auto=True)
+    
+    def sync(self):
+        """それまでに積まれた操作とVLCのイベントがすべて処理されるまで待つ"""
+        self._commands.sync()
+    
+    def _reset_timeline(self, player):
+        """新しい曲を開いたプレイヤーの再生位置と長さを消す"""
+        self._timeline[id(player)] = [0, 0]
+        self._time_stamps.pop(id(player), None)
+        self._generations[id(player)] = self._generations.get(id(player), 0) + 1
     
+    @property
+    def time_ms(self) -> int:
+        """再生中の曲の再生位置（ミリ秒、VLCのイベントで更新）"""
+        return self._timeline.get(id(self.player), [0, 0])[0]
+    
+    @property
+    def length_ms(self) -> int:
+        """再生中の曲の長さ（ミリ秒、VLCのイベントで更新、不明な場合は0）"""
+        return self._timeline.get(id(self.player), [0, 0])[1]
+    
+    @property
+    def position_ms(self) -> int:
+        """再生中の曲の現在の再生位置（ミリ秒、最後のイベントからの経過時間で補間）
+        
+        VLCの再生位置のイベントは数百ミリ秒おきのため、再生中でバッファ待ちでない間は
+        イベント後の経過時間（最大 MAX_INTERPOLATION_MS）を足す。
+        """
+        position = self.time_ms
+        stamp = self._time_stamps.get(id(self.player))
+        if self.is_playing and self.buffering >= 100 and stamp is not None:
+            elapsed = int((self.clock() - stamp) * 1000)
+            position += max(0, min(elapsed, self.MAX_INTERPOLATION_MS))
+        length = self.length_ms
+        return min(position, length) if length > 0 else position
+    
+    @property
+    def current_index(self) -> int:
+        """選択中の曲の位置（他の曲の追加・削除・移動の後も同じ曲を指す）"""
+        entry = self._current_entry
+        if entry is not None and self.playlist.contains_entry(entry):
+            return self.playlist.index_of(entry)
+        return self._current_position
+    
+    @current_index.setter
+    def current_index(self, index: int):
+        """選択中の曲を位置で設定"""
+        self._current_position = index
+        self._current_entry = self.playlist.entry_at(index) if 0 <= index < len(self.playlist) else None
+    
+    @_serialized
     def add_to_playlist(self, video: VideoInfo) -> bool:
         """
         プレイリストに動画を追加
@@ -48,12 +359,61 @@ class MediaPlayer:
         Returns:
             追加成功時True
         """
-        if not video or not video.is_valid():
-            return False
+        return self.insert_into_playlist(len(self.playlist), video)
+    
+    @_serialized
+    def insert_into_playlist(self, index: int, video: VideoInfo) -> bool:
+        """
+        プレイリストの指定位置に動画を挿入
+        
+        Args:
+            index: 挿入する位置
+            video: 追加する動画情報
             
-        self.playlist.append(video)
+        Returns:
+            追加成功時True
+        """
+        if not video:
+            return False
+        # プレイリスト展開による仮エントリはストリーム未解決でも追加できる
+        if not video.is_valid() and not (video.is_placeholder and video.url):
+            return False
+        
+        self.playlist.insert(index, video)
+        # 空のプレイリストで選択していた位置に曲が入った
+        if self._current_entry is None:
+            self.current_index = self._current_position
+        # プレイリストにある曲の音声はキャッシュから削除しない
+        if self.audio_cache is not None:
+            self.audio_cache.pin(video.video_id)
         return True
     
+    def has_video(self, video_id: str) -> bool:
+        """
+        動画IDの曲がプレイリストにあるかチェック（重複の確認用、全体を走査しない）
+        
+        Args:
+            video_id: YouTubeの動画ID
+            
+        Returns:
+            プレイリストにある場合True
+        """
+        return self.playlist.contains_video_id(video_id)
+    
+    @_serialized
+    def add_many(self, videos: List[VideoInfo]) -> int:
+        """
+        プレイリストに複数の動画をまとめて追加
+        
+        Args:
+            videos: 追加する動画情報の一覧
+            
+        Returns:
+            追加できた曲数
+        """
+        return sum(1 for video in videos if self.add_to_playlist(video))
+    
+    @_serialized
     def remove_from_playlist(self, index: int) -> bool:
         """
         プレイリストから動画を削除
@@ -66,43 +426,506 @@ class MediaPlayer:
         """
         if not (0 <= index < len(self.playlist)):
             return False
-            
-        self.playlist.pop(index)
         
-        # 現在のインデックスを調整
-        if self.current_index >= len(self.playlist) and self.playlist:
-            self.current_index = len(self.playlist) - 1
-        elif not self.playlist:
+        entry = self.playlist.entry_at(index)
+        self.playlist.remove_entry(entry)
+        if self.audio_cache is not None:
+            self.audio_cache.unpin(entry.video.video_id)
+        
+        # 選択中の曲を削除した場合は同じ位置の曲（末尾の場合は直前の曲）を選択
+        if not self.playlist:
             self.current_index = 0
             self.current_video = None
             self.is_playing = False
+            self._notify_state()
+        elif entry is self._current_entry:
+            self.current_index = min(index, len(self.playlist) - 1)
+        elif self._current_entry is None and self._current_position >= len(self.playlist):
+            self.current_index = len(self.playlist) - 1
             
         return True
     
-    def play_current(self) -> bool:
+    @_serialized
+    def remove_video(self, video: VideoInfo) -> bool:
+        """
+        プレイリストから指定の曲を削除（確認中に曲の位置が変わっても同じ曲を削除する）
+        
+        Args:
+            video: 削除する曲
+            
+        Returns:
+            削除成功時True（既にプレイリストにない場合はFalse）
+        """
+        try:
+            index = self.playlist.index(video)
+        except ValueError:
+            return False
+        return self.remove_from_playlist(index)
+    
+    @_serialized
+    def move_in_playlist(self, source: int, dest: int) -> bool:
+        """
+        プレイリスト内で曲を移動（選択中の曲は移動後も同じ曲を指す）
+        
+        Args:
+            source: 移動する曲の位置
+            dest: 移動先の位置
+            
+        Returns:
+            移動成功時True
+        """
+        if not (0 <= source < len(self.playlist) and 0 <= dest < len(self.playlist)):
+            return False
+        self.playlist.move(source, dest)
+        return True
+    
+    @_serialized
+    def play_index(self, index: int, advance: bool = False) -> bool:
+        """
+        指定位置の曲を選択して再生（選択と再生の間に他の操作が割り込まない）
+        
+        Args:
+            index: 再生する曲のインデックス
+            advance: 曲送り（next_index / skip_index で求めた先の曲）の場合True
+            
+        Returns:
+            再生開始成功時True
+        """
+        if not (0 <= index < len(self.playlist)):
+            return False
+        self.current_index = index
+        return self.play_current(advance)
+    
+    @_serialized
+    def play_current(self, advance: bool = False) -> bool:
         """
         現在選択されている動画を再生
         
+        Args:
+            advance: 曲送りで選択した曲の場合True（シャッフルの周回の切り替えに使う）
+        
         Returns:
             再生開始成功時True
         """
         if not self.playlist or self.current_index >= len(self.playlist):
             return False
-            
+        
+        # 曲送りなどでクロスフェード中の前の曲は止める
+        self.finish_crossfade()
         video = self.playlist[self.current_index]
-        if not video.audio_url:
+        # 待機用のプレイヤーで開いてある曲はプレイヤーを入れ替えて再生
+        if video is self._standby_video and self._swap_to_standby(advance):
+            return True
+        self._clear_standby()
+        
+        source, cached = self._resolve_source(video)
+        if not source:
             return False
-            
+        
         try:
-            media = self.instance.media_new(video.audio_url)
-            self.player.set_media(media)
+            self.player.set_media(self._new_media(video, source, cached))
+            self._reset_timeline(self.player)
             self.player.play()
             self.current_video = video
             self.is_playing = True
+        except Exception:
+            return False
+        
+        self._on_started(video, cached, advance)
+        return True
+    
+    def _resolve_source(self, video: VideoInfo):
+        """
+        曲の再生元を決める
+        
+        Returns:
+            (再生元のパスまたはURL, キャッシュ済みか)。再生できない場合の再生元はNone
+        """
+        # キャッシュ済みの音声はローカルファイルから再生
+        cached = self.audio_cache.get_path(video.video_id) if self.audio_cache is not None else None
+        source = str(cached) if cached else video.audio_url
+        if not source or (self.offline and not cached):
+            return None, False
+        # ストリームはプロキシ経由で再生（巻き戻し時の再取得とURL失効に対応）
+        if not cached and self.stream_proxy is not None and video.video_id:
+            source = self.stream_proxy.url_for(video)
+        return source, bool(cached)
+    
+    def profile_for(self, cached: bool) -> BufferingProfile:
+        """
+        曲の再生元に合うバッファ設定
+        
+        Args:
+            cached: キャッシュ済みのローカルファイルから再生するか
+        
+        Returns:
+            キャッシュ済みなら低遅延、ストリームなら選択中のプロファイル
+        """
+        return LOW_LATENCY if cached else self.buffering_profile
+    
+    @_serialized
+    def set_buffering_profile(self, name: str):
+        """
+        ストリーム再生のバッファ設定を切り替える（次に開く曲から反映）
+        
+        Args:
+            name: プロファイル名（"low-latency" / "balanced" / "resilient"）
+        
+        Raises:
+            ValueError: 不明なプロファイル名の場合
+        """
+        profile = get_profile(name)
+        if profile is self.buffering_profile:
+            return
+        self.buffering_profile = profile
+        # 以前の設定で開いてあるストリームの次の曲は開き直す
+        if not self._standby_cached:
+            self._clear_standby()
+    
+    def _new_media(self, video: VideoInfo, source: str, cached: bool):
+        """再生元からVLCのメディアを作成（再生元に合うバッファ設定を付ける）"""
+        media = self.instance.media_new(source)
+        profile = self.profile_for(cached)
+        network_caching = None
+        if (not cached and profile.warm_start and self.stream_proxy is not None
+                and self.stream_proxy.has_head(video.video_id)):
+            network_caching = min(self.WARM_NETWORK_CACHING_MS, profile.network_caching_ms)
+        for option in profile.media_options(network_caching):
+            media.add_option(option)
+        return media
+    
+    def _on_started(self, video: VideoInfo, cached: bool, advance: bool = False):
+        """再生開始後の処理"""
+        self.buffering = 100.0
+        self.last_error = None
+        if self._shuffle_order is not None and self._current_entry is not None:
+            self._shuffle_order.moved_to(self._current_entry, advance)
+        self._notify_state()
+        # ストリームから再生した曲は次回以降のためにキャッシュへ保存
+        # （プロキシ経由の曲は、プロキシが全体を取得した時点でキャッシュへ渡す）
+        proxied = (self.stream_proxy is not None and bool(video.video_id)
+                   and self.stream_proxy.audio_cache is self.audio_cache)
+        if self.audio_cache is not None and not cached and not proxied:
+            self.audio_cache.schedule_download(video.video_id, video.audio_url)
+    
+    @_serialized
+    def preload_next(self) -> bool:
+        """
+        次の曲を待機用のプレイヤーで開き、先頭で一時停止させておく
+        
+        ストリームURLが未解決の曲は開かない（解決後に改めて呼び出す）。
+        
+        Returns:
+            次の曲を開いてある場合True
+        """
+        index = self.next_index(auto=True)
+        if index is None:
+            self._clear_standby()
+            return False
+        video = self.playlist[index]
+        if video is self._standby_video:
             return True
+        # フェードアウト中のプレイヤーはフェードが終わるまで使わない
+        if self._fading_out is not None:
+            return False
+        if video.needs_resolution() and not self.is_cached(video):
+            return False
+        
+        source, cached = self._resolve_source(video)
+        if not source:
+            return False
+        try:
+            media = self._new_media(video, source, cached)
+            # 入力を開いてバッファを満たした状態で先頭で止める
+            media.add_option(":start-paused")
+            standby = self._get_standby()
+            standby.set_media(media)
+            self._reset_timeline(standby)
+            standby.play()
+        except Exception:
+            self._clear_standby()
+            return False
+        self._standby_video = video
+        self._standby_cached = cached
+        return True
+    
+    @_serialized
+    def maybe_preload(self) -> bool:
+        """
+        再生中の曲の残り時間が PRELOAD_SECONDS を切っていれば次の曲を開く
+        
+        VLCのイベントで記録した再生位置で判定するため、状態変化の通知ごとに呼び出せる。
+        
+        Returns:
+            次の曲を開いてある場合True
+        """
+        if not self.is_playing or self.current_video is None:
+            return False
+        length = self.length_ms
+        if length <= 0 or (length - self.time_ms) / 1000 > self.PRELOAD_SECONDS:
+            return False
+        return self.preload_next()
+    
+    def _get_standby(self):
+        """待機用のプレイヤーを取得（未作成の場合は同じVLCインスタンスから作成）"""
+        if self._standby is None:
+            self._standby = self.instance.media_player_new()
+            self._attach_events(self._standby)
+        return self._standby
+    
+    def _swap_to_standby(self, advance: bool = True) -> bool:
+        """待機用のプレイヤーと入れ替えて、開いてある次の曲の再生を始める"""
+        standby, video = self._standby, self._standby_video
+        try:
+            standby.set_pause(0)
+        except Exception:
+            return False
+        previous = self.player
+        self.player, self._standby = standby, previous
+        self._standby_video = None
+        try:
+            previous.stop()
+        except Exception:
+            pass
+        self.current_video = video
+        self.is_playing = True
+        self._on_started(video, self._standby_cached, advance)
+        return True
+    
+    @property
+    def is_fading(self) -> bool:
+        """クロスフェード中かどうか"""
+        return self._fading_out is not None
+    
+    @_serialized
+    def begin_crossfade(self) -> bool:
+        """
+        待機用のプレイヤーで開いてある次の曲を音量0で再生し始め、再生中の曲にする
+        
+        前の曲のプレイヤーはフェードアウトのために再生を続ける。
+        
+        Returns:
+            クロスフェードを開始した場合True（次の曲を開いていない場合はFalse）
+        """
+        index = self.next_index(auto=True)
+        if (self._fading_out is not None or index is None
+                or self.playlist[index] is not self._standby_video):
+            return False
+        standby, video = self._standby, self._standby_video
+        try:
+            standby.audio_set_volume(0)
+            standby.set_pause(0)
         except Exception:
             return False
+        previous = self.player
+        self.player, self._standby = standby, previous
+        self._standby_video = None
+        self._fading_out = previous
+        self.current_index = index
+        self.current_video = video
+        self.is_playing = True
+        self._on_started(video, self._standby_cached, advance=True)
+        if self._on_track_change_callback:
+            self._on_track_change_callback()
+        return True
+    
+    @_serialized
+    def set_fade_volumes(self, outgoing: float, incoming: float):
+        """
+        クロスフェード中の2つのプレイヤーの音量を設定
+        
+        Args:
+            outgoing: 前の曲の音量倍率（0.0-1.0）
+            incoming: 次の曲の音量倍率（0.0-1.0）
+        """
+        if self._fading_out is None:
+            return
+        try:
+            self._fading_out.audio_set_volume(round(self.volume * outgoing))
+            self.player.audio_set_volume(round(self.volume * incoming))
+        except Exception:
+            pass
+    
+    @_serialized
+    def finish_crossfade(self):
+        """クロスフェードを終え、前の曲を止めて再生中の曲を元の音量に戻す"""
+        outgoing, self._fading_out = self._fading_out, None
+        if outgoing is None:
+            return
+        try:
+            outgoing.stop()
+            outgoing.audio_set_volume(self.volume)
+            self.player.audio_set_volume(self.volume)
+        except Exception:
+            pass
+    
+    def _clear_standby(self):
+        """待機用のプレイヤーで開いている曲を閉じる"""
+        if self._standby_video is None:
+            return
+        self._standby_video = None
+        try:
+            self._standby.stop()
+        except Exception:
+            pass
+    
+    def is_cached(self, video: VideoInfo) -> bool:
+        """
+        音声がキャッシュ済みかチェック（キャッシュ済みの曲はストリームURLなしで再生できる）
+        
+        Args:
+            video: 対象の曲
+            
+        Returns:
+            キャッシュ済みの場合True
+        """
+        return bool(self.audio_cache is not None and video.video_id and video.video_id in self.audio_cache)
+    
+    def is_available(self, video: VideoInfo) -> bool:
+        """
+        曲を再生できるかチェック（オフラインモードではキャッシュ済みの曲のみ）
+        
+        Args:
+            video: 対象の曲
+            
+        Returns:
+            再生できる場合True
+        """
+        return not self.offline or self.is_cached(video)
+    
+    def find_available(self, index: int, step: int = 1) -> Optional[int]:
+        """
+        指定位置から step ずつ進んで最初に再生できる曲を探す
+        
+        Args:
+            index: 探し始めるインデックス
+            step: 探す方向（1: 後ろへ、-1: 前へ）
+            
+        Returns:
+            再生できる曲のインデックス、見つからない場合はNone
+        """
+        while 0 <= index < len(self.playlist):
+            if self.is_available(self.playlist[index]):
+                return index
+            index += step
+        return None
+    
+    @_serialized
+    def next_index(self, index: Optional[int] = None, auto: bool = False) -> Optional[int]:
+        """
+        再生順で次の曲の位置を求める（再生できない曲は飛ばす）
+        
+        シャッフル中は同じ周回の中で曲が重複しない。全曲リピートでは末尾・周回の
+        終わりで先頭・新しい周回に戻り、1曲リピートでは曲の終了時（auto）だけ同じ曲を返す。
+        
+        Args:
+            index: 曲送りの起点の位置（省略時は選択中の曲）
+            auto: 曲の終了による曲送り（先読み・クロスフェードを含む）の場合True
+            
+        Returns:
+            次の曲のインデックス、ない場合はNone
+        """
+        if index is None:
+            index = self.current_index
+        base = self.playlist.entry_at(index) if 0 <= index < len(self.playlist) else None
+        if (auto and self.repeat == self.REPEAT_ONE and base is not None
+                and self.is_available(base.video)):
+            return index
+        
+        order = self._shuffle_order
+        if order is not None:
+            # 周回の終わりでは次の周回の最初の曲を返すだけで、周回はその曲へ進んだ時に始まる
+            entry = order.next_entry(self.is_available, after=base, wrap=self.repeat == self.REPEAT_ALL)
+            return self.playlist.index_of(entry) if entry is not None else None
+        
+        following = self.find_available(index + 1)
+        if following is None and self.repeat == self.REPEAT_ALL:
+            following = self.find_available(0)
+        return following
+    
+    @_serialized
+    def previous_index(self, index: Optional[int] = None) -> Optional[int]:
+        """
+        再生順で前の曲の位置を求める（再生できない曲は飛ばす）
+        
+        シャッフル中はこの周回で再生した順に遡る。全曲リピートでは先頭から末尾に戻る。
+        
+        Args:
+            index: 曲送りの起点の位置（省略時は選択中の曲）
+            
+        Returns:
+            前の曲のインデックス、ない場合はNone
+        """
+        if index is None:
+            index = self.current_index
+        order = self._shuffle_order
+        if order is not None:
+            base = self.playlist.entry_at(index) if 0 <= index < len(self.playlist) else None
+            entry = order.previous_entry(self.is_available, before=base)
+            return self.playlist.index_of(entry) if entry is not None else None
+        
+        previous = self.find_available(index - 1, -1)
+        if previous is None and self.repeat == self.REPEAT_ALL:
+            previous = self.find_available(len(self.playlist) - 1, -1)
+        return previous
+    
+    @_serialized
+    def skip_index(self, count: int, index: Optional[int] = None) -> Optional[int]:
+        """
+        再生順で count 曲先（負の値で前）の曲の位置を求める
+        
+        途中で曲がなくなった場合は最後にたどり着いた曲の位置を返す。シャッフル中に
+        周回の終わりを越える場合は、次の周回の最初の曲で止まる。
+        
+        Args:
+            count: 進む曲数（負の値で戻る）
+            index: 起点の位置（省略時は選択中の曲）
+            
+        Returns:
+            移動先のインデックス、1曲も進めない場合はNone
+        """
+        step = self.next_index if count > 0 else self.previous_index
+        target = None
+        for _ in range(abs(count)):
+            following = step(index)
+            if following is None:
+                break
+            index = target = following
+            if (count > 0 and self._shuffle_order is not None
+                    and self._shuffle_order.is_next_cycle(self.playlist.entry_at(following))):
+                break
+        return target
+    
+    @_serialized
+    def upcoming(self, count: int) -> List[VideoInfo]:
+        """
+        再生順で次に続く曲を取得（先読みする曲の決定用）
+        
+        まだ何も再生していない場合は選択中の曲から数える。
+        
+        Args:
+            count: 取得する曲数
+            
+        Returns:
+            続く曲の一覧（最大 count 曲）
+        """
+        count = max(0, count)
+        if self._shuffle_order is not None:
+            videos = []
+            if self.current_video is None and self._current_entry is not None:
+                videos.append(self._current_entry.video)
+            entries = self._shuffle_order.upcoming(count - len(videos), self.is_available)
+            return videos + [entry.video for entry in entries]
+        
+        start = self.current_index
+        if self.current_video is not None:
+            start += 1
+        videos = self.playlist[start:start + count]
+        if self.repeat == self.REPEAT_ALL and len(videos) < count:
+            videos += self.playlist[:min(count - len(videos), start)]
+        return videos
     
+    @_serialized
     def pause(self) -> bool:
         """
         一時停止/再開
@@ -113,10 +936,12 @@ class MediaPlayer:
         try:
             self.player.pause()
             self.is_playing = not self.is_playing
+            self._notify_state()
             return True
         except Exception:
             return False
     
+    @_serialized
     def stop(self) -> bool:
         """
         停止
@@ -124,37 +949,110 @@ class MediaPlayer:
         Returns:
             停止成功時True
         """
+        self.finish_crossfade()
+        self._clear_standby()
         try:
             self.player.stop()
             self.is_playing = False
+            self._notify_state()
             return True
         except Exception:
             return False
     
-    def next_track(self) -> bool:
+    def close(self):
+        """クロスフェードのスレッドとコマンドキューを停止"""
+        if self._crossfader is not None:
+            self._crossfader.stop()
+        self._commands.close()
+    
+    @_serialized
+    def next_track(self, auto: bool = False) -> bool:
         """
-        次の曲
+        次の曲（再生できない曲は飛ばす）
+        
+        Args:
+            auto: 曲の終了による曲送りの場合True（1曲リピートでは同じ曲を再生）
         
         Returns:
             次の曲再生成功時True
         """
-        if self.current_index < len(self.playlist) - 1:
-            self.current_index += 1
-            return self.play_current()
+        index = self.next_index(auto=auto)
+        if index is not None:
+            self.current_index = index
+            return self.play_current(advance=True)
         return False
     
+    @_serialized
+    def skip(self, count: int) -> bool:
+        """
+        count 曲先（負の値で前）の曲へ飛んで再生（途中の曲は開かない）
+        
+        Args:
+            count: 進む曲数（負の値で戻る）
+        
+        Returns:
+            再生開始成功時True
+        """
+        index = self.skip_index(count)
+        if index is not None:
+            self.current_index = index
+            return self.play_current(advance=count > 0)
+        return False
+    
+    @_serialized
     def previous_track(self) -> bool:
         """
-        前の曲
+        前の曲（再生できない曲は飛ばす）
         
         Returns:
             前の曲再生成功時True
         """
-        if self.current_index > 0:
-            self.current_index -= 1
+        index = self.previous_index()
+        if index is not None:
+            self.current_index = index
             return self.play_current()
         return False
     
+    @_serialized
+    def seek_to(self, time_ms: int) -> bool:
+        """
+        再生中の曲の指定時刻へシーク
+        
+        Args:
+            time_ms: 移動先の再生位置（ミリ秒、曲の範囲に丸める）
+            
+        Returns:
+            シーク成功時True（再生中の曲がない場合はFalse）
+        """
+        if self.current_video is None:
+            return False
+        time_ms = max(0, int(time_ms))
+        length = self.length_ms
+        if length > 0:
+            time_ms = min(time_ms, length)
+        try:
+            self.player.set_time(time_ms)
+        except Exception:
+            return False
+        # 次のイベントを待たずに再生位置を反映（続けてシークした場合の起点にする）
+        self._apply_time(self.player, time_ms)
+        if self._crossfader is not None:
+            self._crossfader.post_time(self.player, time_ms)
+        return True
+    
+    @_serialized
+    def seek_relative(self, seconds: float) -> bool:
+        """
+        再生中の曲を現在の再生位置から指定秒数だけシーク
+        
+        Args:
+            seconds: 移動する秒数（負の値で巻き戻し）
+            
+        Returns:
+            シーク成功時True
+        """
+        return self.seek_to(self.position_ms + round(seconds * 1000))
+    
     def get_position(self) -> float:
         """
         再生位置を取得（0.0-1.0）
@@ -167,6 +1065,7 @@ class MediaPlayer:
         except Exception:
             return 0.0
     
+    @_serialized
     def set_position(self, position: float) -> bool:
         """
         再生位置を設定（0.0-1.0）
@@ -217,9 +1116,13 @@ class MediaPlayer:
         """
         return len(self.playlist)
     
+    @_serialized
     def clear_playlist(self):
         """プレイリストをクリア"""
         self.stop()
+        if self.audio_cache is not None:
+            for video in self.playlist:
+                self.audio_cache.unpin(video.video_id)
         self.playlist.clear()
         self.current_index = 0
         self.current_video = None
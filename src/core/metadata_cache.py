@@ -0,0 +1,220 @@
+"""
+動画メタデータの永続キャッシュ
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Union
+
+from .paths import get_cache_dir
+from .eviction import CacheStats, EvictionPolicy, make_policy
+
+
+class MetadataCache:
+    """動画IDをキーにした動画メタデータのディスクキャッシュ（TTL + 件数上限 + 削除ポリシー）"""
+    
+    FILE_NAME = "metadata.json"
+    # googlevideoの署名付きURLは約6時間で失効するため、それより短く設定
+    DEFAULT_TTL = 4 * 60 * 60
+    DEFAULT_MAX_ENTRIES = 1000
+    # オフライン再生用にTTL経過後も曲名などを保持する期間の目安
+    DEFAULT_STALE_TTL = 90 * 24 * 60 * 60
+    # 追加・参照によるキャッシュの更新を書き込むまでの待ち時間（秒）
+    SAVE_DELAY = 5.0
+    
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None,
+                 ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 policy: Union[str, EvictionPolicy] = "lru", stale_ttl: float = 0.0):
+        """
+        メタデータキャッシュを初期化
+        
+        Args:
+            cache_dir: キャッシュディレクトリ（省略時はアプリ標準のディレクトリ）
+            ttl: エントリの有効期間（秒）
+            max_entries: 保持する最大エントリ数
+            policy: 件数上限を超えた場合の削除ポリシー（"lru" / "lfu" / "gdsf" またはインスタンス）
+            stale_ttl: TTL経過後もエントリを保持する秒数（get(allow_stale=True) でのみ返す）
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else get_cache_dir()
+        self.path = self.cache_dir / self.FILE_NAME
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.policy = make_policy(policy) if isinstance(policy, str) else policy
+        self._lock = threading.Lock()
+        # video_id -> {'stored_at': float, 'data': dict, 'hits': int}（先頭ほど古いアクセス）
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # ディスクへ未書き込みの更新があるか
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._load()
+    
+    def _load(self):
+        """ディスクからキャッシュを読み込む"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        if not isinstance(raw, dict):
+            return
+        
+        for video_id, entry in raw.items():
+            if isinstance(entry, dict) and 'stored_at' in entry and 'data' in entry:
+                self._entries[video_id] = entry
+                self.policy.insert(video_id, frequency=entry.get('hits', 1))
+        self._evict()
+    
+    def _save(self):
+        """キャッシュをディスクへアトミックに書き込む"""
+        self._dirty = False
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.cache_dir), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # キャッシュの書き込み失敗は致命的ではない
+            pass
+    
+    def _mark_dirty(self):
+        """キャッシュの更新を記録し、SAVE_DELAY 秒後にまとめて書き込む"""
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """未書き込みの更新をディスクへ書き込む"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+    
+    def close(self):
+        """未書き込みの更新を書き込む"""
+        self.flush()
+    
+    def _is_expired(self, entry: Dict[str, Any], now: float) -> bool:
+        """エントリが期限切れかチェック"""
+        return now - entry['stored_at'] > self.ttl
+    
+    def _is_discarded(self, entry: Dict[str, Any], now: float) -> bool:
+        """エントリが保持期間（TTL + stale_ttl）を過ぎたかチェック"""
+        return now - entry['stored_at'] > self.ttl + self.stale_ttl
+    
+    def _remove(self, video_id: str, evicted: bool = False):
+        """エントリを削除し、削除ポリシーに通知"""
+        if self._entries.pop(video_id, None) is not None:
+            self.policy.remove(video_id, evicted=evicted)
+    
+    @property
+    def stats(self) -> CacheStats:
+        """ヒット・ミスの統計"""
+        return self.policy.stats
+    
+    def _evict(self):
+        """保持期間を過ぎたエントリを削除し、件数上限を超えた分を削除ポリシーの順に削除"""
+        now = time.time()
+        for video_id in [k for k, v in self._entries.items() if self._is_discarded(v, now)]:
+            self._remove(video_id)
+        
+        while len(self._entries) > self.max_entries:
+            self._remove(self.policy.victim(), evicted=True)
+    
+    def get(self, video_id: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュからメタデータを取得
+        
+        Args:
+            video_id: YouTubeの動画ID
+            allow_stale: TTLを過ぎたエントリも返すか（オフライン再生用）
+        
+        Returns:
+            有効なエントリがあればメタデータ辞書、なければNone
+        """
+        if not video_id:
+            return None
+        
+        with self._lock:
+            now = time.time()
+            entry = self._entries.get(video_id)
+            if entry is not None and self._is_discarded(entry, now):
+                self._remove(video_id)
+                entry = None
+            elif entry is not None and not allow_stale and self._is_expired(entry, now):
+                entry = None
+            
+            if entry is None:
+                self.stats.record_miss()
+                return None
+            
+            entry['hits'] = entry.get('hits', 1) + 1
+            self._entries.move_to_end(video_id)
+            self.policy.access(video_id)
+            self.stats.record_hit()
+            # 参照回数の更新は次の書き込みにまとめる
+            self._mark_dirty()
+            return dict(entry['data'])
+    
+    def put(self, video_id: str, data: Dict[str, Any]):
+        """
+        メタデータをキャッシュに保存
+        
+        Args:
+            video_id: YouTubeの動画ID
+            data: 保存するメタデータ（JSONシリアライズ可能な辞書）
+        """
+        if not video_id:
+            return
+        
+        with self._lock:
+            previous = self._entries.get(video_id)
+            hits = previous.get('hits', 1) if previous else 1
+            self._entries[video_id] = {'stored_at': time.time(), 'data': data, 'hits': hits}
+            self._entries.move_to_end(video_id)
+            self.policy.insert(video_id, frequency=hits)
+            self._evict()
+            # 一括追加で件数分の書き込みが起きないよう、まとめて書き込む
+            self._mark_dirty()
+    
+    def invalidate(self, video_id: str):
+        """
+        指定した動画のエントリを削除
+        
+        Args:
+            video_id: YouTubeの動画ID
+        """
+        with self._lock:
+            if video_id in self._entries:
+                self._remove(video_id)
+                self._save()
+    
+    def clear(self):
+        """キャッシュを全て削除"""
+        with self._lock:
+            for video_id in list(self._entries):
+                self._remove(video_id)
+            self._save()
+    
+    def __len__(self) -> int:
+        """保持しているエントリ数"""
+        return len(self._entries)
+    
+    def __contains__(self, video_id: str) -> bool:
+        """有効なエントリが存在するかチェック（統計・削除ポリシーの参照順は更新しない）"""
+        if not video_id:
+            return False
+        with self._lock:
+            entry = self._entries.get(video_id)
+            return entry is not None and not self._is_expired(entry, time.time())
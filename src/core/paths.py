@@ -0,0 +1,29 @@
+"""
+キャッシュ等の保存先パス管理
+"""
+
+import os
+from pathlib import Path
+
+# キャッシュディレクトリを上書きする環境変数
+CACHE_DIR_ENV = "YOUTUBE_AUDIO_PLAYER_CACHE_DIR"
+
+
+def get_cache_dir() -> Path:
+    """
+    アプリケーションのキャッシュディレクトリを取得（必要なら作成）
+    
+    優先順位: 環境変数 YOUTUBE_AUDIO_PLAYER_CACHE_DIR > $XDG_CACHE_HOME > ~/.cache
+    
+    Returns:
+        キャッシュディレクトリのパス
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        cache_dir = Path(override)
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or (Path.home() / ".cache")
+        cache_dir = Path(base) / "youtube-audio-player"
+    
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
@@ -0,0 +1,294 @@
+"""
+シャッフル再生の再生順
+"""
+
+import random
+from typing import Callable, Dict, List, Optional
+
+from ..models.video_info import VideoInfo
+from .playlist import Playlist, PlaylistEntry
+
+
+class ShuffleOrder:
+    """プレイリストの項目を1周するまで重複なく並べるシャッフル順
+    
+    項目IDの並びを Fisher–Yates 法で先頭から1つずつ確定していく。確定済みの
+    位置 [0, k) が再生順（履歴を含む）、残りの位置 [k, size) が未再生の曲で、
+    次の曲が必要になった時に残りから1つを選んで位置 k と入れ替える。
+    並びは入れ替えた位置だけを辞書に持ち、それ以外の位置 p の項目IDは p + 1
+    とみなすため、作成時にプレイリスト全体を並べ替えることはない。
+    
+    追加された項目は残りの末尾に加わり、削除された項目は選ばれた時点で
+    残りから外すため、プレイリストの変更で並びを作り直す必要はない。
+    前の曲は確定済みの並びを遡るだけで求まる。
+    
+    周回の終わりで次の周回の最初の曲を問い合わせても、今の周回の並びは変えない
+    （選んだ曲を覚えておき、その曲へ実際に進んだ時に新しい周回を始める）。
+    """
+    
+    # 次の周回の最初の曲を無作為に選ぶ試行回数（選べない場合は全体から選ぶ）
+    PEEK_ATTEMPTS = 32
+    
+    def __init__(self, playlist: Playlist, rng: Optional[random.Random] = None):
+        """
+        シャッフル順を初期化
+        
+        Args:
+            playlist: 対象のプレイリスト
+            rng: 乱数生成器（省略時は新たに作成）
+        """
+        self.playlist = playlist
+        self._rng = rng or random.Random()
+        # 位置 → 項目ID（入れ替えた位置のみ）
+        self._slots: Dict[int, int] = {}
+        # 項目ID → 位置（入れ替えた項目のみ）
+        self._where: Dict[int, int] = {}
+        # 作成時点の項目ID 1 .. size が位置 0 .. size-1 に並んでいるとみなす
+        self._size = playlist.next_entry_id - 1
+        # 並びに取り込み済みの項目IDの上限（これ以降の項目IDは追加された曲）
+        self._known = playlist.next_entry_id
+        # 確定済みの位置の数
+        self._determined = 0
+        # 再生中の曲の位置（-1は未再生）
+        self._cursor = -1
+        # 周回の最初に選ばない項目（前の周回の最後の曲を続けて再生しない）
+        self._avoid: Optional[int] = None
+        # 次の周回の最初の曲として選んだ項目（その曲へ進むまで今の周回は保つ）
+        self._wrap: Optional[int] = None
+    
+    def _id_at(self, slot: int) -> int:
+        """位置の項目ID"""
+        return self._slots.get(slot, slot + 1)
+    
+    def _slot_of(self, entry_id: int) -> int:
+        """項目IDの位置（並びに含まれる項目のみ）"""
+        return self._where.get(entry_id, entry_id - 1)
+    
+    def _put(self, slot: int, entry_id: int):
+        """位置に項目IDを置く"""
+        self._slots[slot] = entry_id
+        self._where[entry_id] = slot
+    
+    def _swap(self, a: int, b: int):
+        """2つの位置の項目を入れ替える"""
+        if a != b:
+            first, second = self._id_at(a), self._id_at(b)
+            self._put(a, second)
+            self._put(b, first)
+    
+    def _sync(self):
+        """追加された項目を残りの末尾に加える"""
+        next_id = self.playlist.next_entry_id
+        for entry_id in range(self._known, next_id):
+            self._put(self._size, entry_id)
+            self._size += 1
+        self._known = next_id
+    
+    def _discard(self, slot: int):
+        """削除された項目を残りから外す（最後の位置の項目と入れ替えて縮める）"""
+        last = self._size - 1
+        dead = self._id_at(slot)
+        if slot != last:
+            self._put(slot, self._id_at(last))
+        self._slots.pop(last, None)
+        self._where.pop(dead, None)
+        self._size = last
+    
+    def _draw(self) -> Optional[PlaylistEntry]:
+        """残りから1曲を選んで次の位置に確定する（残りがなければNone）"""
+        while self._determined < self._size:
+            slot = self._rng.randrange(self._determined, self._size)
+            entry = self.playlist.get_entry(self._id_at(slot))
+            if entry is None:
+                self._discard(slot)
+                continue
+            if entry.entry_id == self._avoid and self._size - self._determined > 1:
+                continue
+            self._swap(slot, self._determined)
+            self._determined += 1
+            self._avoid = None
+            return entry
+        return None
+    
+    def _walk(self, available: Callable[[VideoInfo], bool], start: int):
+        """位置 start 以降の再生できる曲を順に返す（必要な分だけ確定する）"""
+        slot = start
+        while True:
+            if slot < self._determined:
+                entry = self.playlist.get_entry(self._id_at(slot))
+            else:
+                entry = self._draw()
+                if entry is None:
+                    return
+            if entry is not None and available(entry.video):
+                yield slot, entry
+            slot += 1
+    
+    def _start_after(self, after: Optional[PlaylistEntry]) -> int:
+        """曲送りの起点の次の位置"""
+        if after is not None and self.playlist.contains_entry(after):
+            slot = self._slot_of(after.entry_id)
+            if slot < self._determined:
+                return slot + 1
+        return self._cursor + 1
+    
+    def _peek_cycle(self, available: Callable[[VideoInfo], bool],
+                    avoid: Optional[PlaylistEntry]) -> Optional[PlaylistEntry]:
+        """次の周回の最初の曲を選ぶ（今の周回の並びは変えず、選んだ曲を覚えておく）"""
+        if self._wrap is not None:
+            entry = self.playlist.get_entry(self._wrap)
+            if entry is not None and available(entry.video):
+                return entry
+            self._wrap = None
+        
+        avoid_id = avoid.entry_id if avoid is not None else None
+        
+        def usable(entry: Optional[PlaylistEntry]) -> bool:
+            return entry is not None and available(entry.video)
+        
+        # 大きなプレイリストでも全体を調べずに済むよう、まず位置を無作為に選ぶ
+        entry = None
+        for _ in range(self.PEEK_ATTEMPTS if self._size else 0):
+            candidate = self.playlist.get_entry(self._id_at(self._rng.randrange(self._size)))
+            if usable(candidate) and candidate.entry_id != avoid_id:
+                entry = candidate
+                break
+        if entry is None:
+            candidates = [
+                candidate for candidate in (self.playlist.get_entry(self._id_at(slot))
+                                            for slot in range(self._size))
+                if usable(candidate)
+            ]
+            if len(candidates) > 1:
+                candidates = [candidate for candidate in candidates if candidate.entry_id != avoid_id]
+            if not candidates:
+                return None
+            entry = self._rng.choice(candidates)
+        self._wrap = entry.entry_id
+        return entry
+    
+    def next_entry(self, available: Callable[[VideoInfo], bool],
+                   after: Optional[PlaylistEntry] = None, wrap: bool = False) -> Optional[PlaylistEntry]:
+        """
+        次に再生する曲を取得（再生位置は進めない、同じ状態なら何度呼んでも同じ曲を返す）
+        
+        Args:
+            available: 曲を再生できるか判定する関数
+            after: 曲送りの起点の項目（省略時は再生中の曲）
+            wrap: この周回の曲をすべて再生した場合に次の周回の最初の曲を返すか
+        
+        Returns:
+            次の曲の項目、ない場合はNone
+        """
+        self._sync()
+        for _, entry in self._walk(available, self._start_after(after)):
+            return entry
+        if wrap:
+            return self._peek_cycle(available, after if after is not None else self._current())
+        return None
+    
+    def _current(self) -> Optional[PlaylistEntry]:
+        """再生中の曲の項目"""
+        return self.playlist.get_entry(self._id_at(self._cursor)) if self._cursor >= 0 else None
+    
+    def is_next_cycle(self, entry: Optional[PlaylistEntry]) -> bool:
+        """
+        次の周回の最初の曲として選んだ項目かチェック
+        
+        Args:
+            entry: 調べる項目
+        
+        Returns:
+            next_entry(wrap=True) が次の周回の最初の曲として返した項目の場合True
+        """
+        return entry is not None and self._wrap == entry.entry_id
+    
+    def previous_entry(self, available: Callable[[VideoInfo], bool],
+                       before: Optional[PlaylistEntry] = None) -> Optional[PlaylistEntry]:
+        """
+        再生順で前の曲を取得（確定済みの並びを遡る）
+        
+        Args:
+            available: 曲を再生できるか判定する関数
+            before: 曲送りの起点の項目（省略時は再生中の曲）
+        
+        Returns:
+            前の曲の項目、この周回の最初の曲の場合はNone
+        """
+        slot = self._start_after(before) - 2
+        while slot >= 0:
+            entry = self.playlist.get_entry(self._id_at(slot))
+            if entry is not None and available(entry.video):
+                return entry
+            slot -= 1
+        return None
+    
+    def upcoming(self, count: int, available: Callable[[VideoInfo], bool]) -> List[PlaylistEntry]:
+        """
+        再生中の曲に続く曲を再生順に取得（この周回の中のみ）
+        
+        Args:
+            count: 取得する曲数
+            available: 曲を再生できるか判定する関数
+        
+        Returns:
+            続く曲の項目（最大 count 曲）
+        """
+        self._sync()
+        entries = []
+        if count <= 0:
+            return entries
+        for _, entry in self._walk(available, self._cursor + 1):
+            entries.append(entry)
+            if len(entries) >= count:
+                break
+        return entries
+    
+    def moved_to(self, entry: PlaylistEntry, advance: bool = False):
+        """
+        曲の再生開始を並びに反映
+        
+        確定済みの曲（前の曲・次の曲）ならその位置へ移る。未再生の曲を選んで
+        再生した場合は、先に確定していた次の曲を残りに戻し、選んだ曲を次の位置に確定する。
+        次の周回の最初の曲として選んだ曲へ曲送りで進んだ場合は、新しい周回を始める。
+        
+        Args:
+            entry: 再生を始めた曲の項目
+            advance: 曲送り（曲の終了・次の曲・先の曲へのスキップ）で進んだ場合True
+        """
+        self._sync()
+        if not self.playlist.contains_entry(entry):
+            return
+        # 次の周回の最初の曲は、別の曲へ移った時点で選び直す
+        wrap, self._wrap = self._wrap, None
+        if advance and wrap == entry.entry_id:
+            self.new_cycle(current=entry)
+            return
+        slot = self._slot_of(entry.entry_id)
+        if slot <= self._cursor:
+            self._cursor = slot
+            return
+        if slot >= self._determined or slot > self._cursor + 1:
+            self._determined = self._cursor + 1
+            self._swap(slot, self._determined)
+            self._determined += 1
+        self._cursor += 1
+    
+    def new_cycle(self, current: Optional[PlaylistEntry] = None,
+                  avoid: Optional[PlaylistEntry] = None):
+        """
+        新しい周回を始める（すべての曲を再び未再生にする）
+        
+        Args:
+            current: 周回の最初の曲として扱う再生中の曲
+            avoid: 周回の最初に選ばない曲（直前に再生した曲）
+        """
+        self._sync()
+        self._wrap = None
+        self._determined = 0
+        self._cursor = -1
+        self._avoid = avoid.entry_id if avoid is not None else None
+        if current is not None and self.playlist.contains_entry(current):
+            self._swap(self._slot_of(current.entry_id), 0)
+            self._determined = 1
+            self._cursor = 0
@@ -0,0 +1,425 @@
+"""
+位置による挿入・削除と動画IDによる検索を高速に行うプレイリスト
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from ..models.video_info import VideoInfo
+
+
+class PlaylistEntry:
+    """プレイリストの1項目（同じ動画を複数回追加しても項目ごとに別のIDを持つ）"""
+    
+    __slots__ = ("entry_id", "video", "key", "_block")
+    
+    def __init__(self, entry_id: int, video: VideoInfo):
+        """
+        項目を初期化
+        
+        Args:
+            entry_id: プレイリスト内で一意な項目ID（削除されても再利用しない）
+            video: 動画情報
+        """
+        self.entry_id = entry_id
+        self.video = video
+        # 動画IDの索引のキー（プレースホルダーは動画IDが決まった後の検索時に更新）
+        self.key = video.video_id or ""
+        self._block: Optional["_Block"] = None
+    
+    def __repr__(self) -> str:
+        return f"PlaylistEntry({self.entry_id}, {self.key!r})"
+
+
+class _Block:
+    """連続する項目をまとめたブロック"""
+    
+    __slots__ = ("entries", "pos")
+    
+    def __init__(self, entries: List[PlaylistEntry], pos: int):
+        self.entries = entries
+        # プレイリスト内でのブロックの順番
+        self.pos = pos
+        for entry in entries:
+            entry._block = self
+
+
+class Playlist:
+    """ブロックに分割したリストによるプレイリスト
+    
+    項目を最大 2 * BLOCK_SIZE 件のブロックに分けて保持し、ブロックの件数を
+    Fenwick木で集計して位置からブロックを O(log n) で求める。位置による挿入・削除・
+    移動はブロック1つ分のリスト操作と O(log n) の集計の更新で済む
+    （ブロックの分割・結合時だけブロック数に比例する再構築を行う）。
+    各項目は追加時に一意なIDを持ち、項目から現在の位置を求められるため、
+    他の項目が増減しても同じ項目を指し続けられる。
+    動画IDの索引を持つため、重複の確認や動画IDによる検索は全体を走査しない。
+    
+    インデックス・スライス・反復・len などリストと同じ操作で動画を扱える。
+    """
+    
+    BLOCK_SIZE = 512
+    
+    def __init__(self, videos: Iterable[VideoInfo] = ()):
+        """
+        プレイリストを初期化
+        
+        Args:
+            videos: 最初に追加する動画情報
+        """
+        self._blocks: List[_Block] = []
+        # ブロックの件数のFenwick木（1始まり）
+        self._tree: List[int] = [0]
+        self._length = 0
+        self._next_id = 1
+        # 項目ID → 項目
+        self._by_id: Dict[int, PlaylistEntry] = {}
+        # 動画ID → {項目ID: 項目}（追加順）
+        self._by_video: Dict[str, Dict[int, PlaylistEntry]] = {}
+        self.extend(videos)
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def __bool__(self) -> bool:
+        return self._length > 0
+    
+    def __iter__(self) -> Iterator[VideoInfo]:
+        for block in self._blocks:
+            for entry in block.entries:
+                yield entry.video
+    
+    def __contains__(self, video) -> bool:
+        return self.find(video) is not None
+    
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self.entry_at(i).video for i in range(*index.indices(self._length))]
+        return self.entry_at(index).video
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Playlist, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"Playlist({len(self)} entries)"
+    
+    def _normalize(self, index: int) -> int:
+        """負のインデックスを変換（範囲外はIndexError）"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("playlist index out of range")
+        return index
+    
+    def _rebuild(self):
+        """ブロックの順番とFenwick木を作り直す（ブロックの増減時）"""
+        tree = [0] * (len(self._blocks) + 1)
+        for pos, block in enumerate(self._blocks):
+            block.pos = pos
+            i = pos + 1
+            tree[i] += len(block.entries)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+    
+    def _add_size(self, pos: int, delta: int):
+        """ブロックの件数の増減を集計に反映"""
+        tree = self._tree
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+    
+    def _start(self, pos: int) -> int:
+        """ブロックの先頭の位置"""
+        tree = self._tree
+        total = 0
+        while pos > 0:
+            total += tree[pos]
+            pos -= pos & -pos
+        return total
+    
+    def _locate(self, index: int):
+        """位置から (ブロック, ブロック内の位置) を求める"""
+        tree = self._tree
+        pos = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            following = pos + step
+            if following < len(tree) and tree[following] <= index:
+                pos = following
+                index -= tree[following]
+            step >>= 1
+        return self._blocks[pos], index
+    
+    def entry_at(self, index: int) -> PlaylistEntry:
+        """
+        指定位置の項目を取得
+        
+        Args:
+            index: 位置（負の値は末尾から）
+        
+        Returns:
+            項目
+        
+        Raises:
+            IndexError: 範囲外の場合
+        """
+        block, offset = self._locate(self._normalize(index))
+        return block.entries[offset]
+    
+    def index_of(self, entry: PlaylistEntry) -> int:
+        """
+        項目の現在の位置を取得
+        
+        Args:
+            entry: 項目
+        
+        Returns:
+            位置
+        
+        Raises:
+            ValueError: 項目がプレイリストにない場合
+        """
+        block = entry._block
+        if block is None or block.pos >= len(self._blocks) or self._blocks[block.pos] is not block:
+            raise ValueError("entry is not in the playlist")
+        return self._start(block.pos) + block.entries.index(entry)
+    
+    @property
+    def next_entry_id(self) -> int:
+        """次に追加する項目のID（項目IDは追加順に増える）"""
+        return self._next_id
+    
+    def get_entry(self, entry_id: int) -> Optional[PlaylistEntry]:
+        """
+        項目IDから項目を取得
+        
+        Args:
+            entry_id: 項目ID
+        
+        Returns:
+            項目（削除済みの場合はNone）
+        """
+        return self._by_id.get(entry_id)
+    
+    def contains_entry(self, entry: Optional[PlaylistEntry]) -> bool:
+        """項目がプレイリストに含まれるかチェック"""
+        return entry is not None and entry._block is not None
+    
+    def insert(self, index: int, video: VideoInfo) -> PlaylistEntry:
+        """
+        指定位置に動画を挿入（範囲外の位置は list.insert と同様に先頭・末尾へ）
+        
+        Args:
+            index: 挿入する位置
+            video: 動画情報
+        
+        Returns:
+            追加した項目
+        """
+        if index < 0:
+            index = max(0, index + self._length)
+        entry = PlaylistEntry(self._next_id, video)
+        self._next_id += 1
+        self._attach(min(index, self._length), entry)
+        return entry
+    
+    def append(self, video: VideoInfo) -> PlaylistEntry:
+        """末尾に動画を追加"""
+        return self.insert(self._length, video)
+    
+    def extend(self, videos: Iterable[VideoInfo]):
+        """末尾に動画をまとめて追加"""
+        for video in videos:
+            self.append(video)
+    
+    def _attach(self, index: int, entry: PlaylistEntry):
+        """項目を指定位置に入れ、索引と集計を更新"""
+        self._by_id[entry.entry_id] = entry
+        self._by_video.setdefault(entry.key, {})[entry.entry_id] = entry
+        self._length += 1
+        if not self._blocks:
+            self._blocks.append(_Block([entry], 0))
+            self._rebuild()
+            return
+        if index == self._length - 1:
+            block, offset = self._blocks[-1], len(self._blocks[-1].entries)
+        else:
+            block, offset = self._locate(index)
+        block.entries.insert(offset, entry)
+        entry._block = block
+        if len(block.entries) > 2 * self.BLOCK_SIZE:
+            self._split(block)
+        else:
+            self._add_size(block.pos, 1)
+    
+    def _split(self, block: _Block):
+        """大きくなったブロックを2つに分ける"""
+        half = len(block.entries) // 2
+        self._blocks.insert(block.pos + 1, _Block(block.entries[half:], block.pos + 1))
+        del block.entries[half:]
+        self._rebuild()
+    
+    def _detach(self, block: _Block, offset: int) -> PlaylistEntry:
+        """ブロック内の位置の項目を取り出し、索引と集計を更新"""
+        entry = block.entries.pop(offset)
+        entry._block = None
+        self._length -= 1
+        del self._by_id[entry.entry_id]
+        entries = self._by_video.get(entry.key)
+        if entries is not None:
+            entries.pop(entry.entry_id, None)
+            if not entries:
+                del self._by_video[entry.key]
+        
+        if not block.entries:
+            del self._blocks[block.pos]
+            self._rebuild()
+        elif not self._merge(block):
+            self._add_size(block.pos, -1)
+        return entry
+    
+    def _merge(self, block: _Block) -> bool:
+        """小さくなったブロックを次のブロックとまとめる（まとめた場合True）"""
+        pos = block.pos
+        if len(block.entries) >= self.BLOCK_SIZE // 4 or pos + 1 >= len(self._blocks):
+            return False
+        following = self._blocks[pos + 1]
+        if len(block.entries) + len(following.entries) > 2 * self.BLOCK_SIZE:
+            return False
+        for entry in following.entries:
+            entry._block = block
+        block.entries.extend(following.entries)
+        del self._blocks[pos + 1]
+        self._rebuild()
+        return True
+    
+    def remove_entry(self, entry: PlaylistEntry) -> int:
+        """
+        項目を削除
+        
+        Args:
+            entry: 削除する項目
+        
+        Returns:
+            削除した項目があった位置
+        
+        Raises:
+            ValueError: 項目がプレイリストにない場合
+        """
+        index = self.index_of(entry)
+        block = entry._block
+        self._detach(block, index - self._start(block.pos))
+        return index
+    
+    def pop(self, index: int = -1) -> VideoInfo:
+        """
+        指定位置の動画を取り出す
+        
+        Args:
+            index: 位置（省略時は末尾）
+        
+        Returns:
+            取り出した動画情報
+        """
+        block, offset = self._locate(self._normalize(index))
+        return self._detach(block, offset).video
+    
+    def __delitem__(self, index: int):
+        self.pop(index)
+    
+    def move(self, source: int, dest: int) -> PlaylistEntry:
+        """
+        項目を別の位置へ移動（項目IDは変わらない）
+        
+        Args:
+            source: 移動する項目の位置
+            dest: 移動先の位置（移動後の位置）
+        
+        Returns:
+            移動した項目
+        """
+        block, offset = self._locate(self._normalize(source))
+        entry = self._detach(block, offset)
+        self._attach(max(0, min(dest, self._length)), entry)
+        return entry
+    
+    def clear(self):
+        """すべての項目を削除"""
+        for block in self._blocks:
+            for entry in block.entries:
+                entry._block = None
+        self._blocks.clear()
+        self._tree = [0]
+        self._by_id.clear()
+        self._by_video.clear()
+        self._length = 0
+    
+    def entries(self) -> Iterator[PlaylistEntry]:
+        """項目を先頭から順に返す"""
+        for block in self._blocks:
+            yield from block.entries
+    
+    def _reindex_resolved(self):
+        """動画IDなしで追加された項目のうち、後から動画IDが決まったものを索引に移す"""
+        pending = self._by_video.get("")
+        if not pending:
+            return
+        for entry in [entry for entry in pending.values() if entry.video.video_id]:
+            del pending[entry.entry_id]
+            entry.key = entry.video.video_id
+            self._by_video.setdefault(entry.key, {})[entry.entry_id] = entry
+        if not pending:
+            del self._by_video[""]
+    
+    def entries_for(self, video_id: str) -> List[PlaylistEntry]:
+        """
+        動画IDが一致する項目を追加順に取得
+        
+        Args:
+            video_id: YouTubeの動画ID
+        
+        Returns:
+            項目の一覧（なければ空）
+        """
+        self._reindex_resolved()
+        return list(self._by_video.get(video_id or "", {}).values())
+    
+    def contains_video_id(self, video_id: str) -> bool:
+        """動画IDの曲がプレイリストにあるかチェック"""
+        self._reindex_resolved()
+        return bool(video_id) and video_id in self._by_video
+    
+    def find(self, video: VideoInfo) -> Optional[PlaylistEntry]:
+        """
+        動画情報のオブジェクトに対応する項目を探す（動画IDの索引から探す）
+        
+        Args:
+            video: 動画情報
+        
+        Returns:
+            最初に見つかった項目、なければNone
+        """
+        self._reindex_resolved()
+        candidates = self._by_video.get(getattr(video, "video_id", "") or "", {}).values()
+        matches = [entry for entry in candidates if entry.video is video]
+        if not matches:
+            return None
+        return min(matches, key=self.index_of)
+    
+    def index(self, video: VideoInfo) -> int:
+        """
+        動画情報のオブジェクトの位置を取得
+        
+        Raises:
+            ValueError: プレイリストにない場合
+        """
+        entry = self.find(video)
+        if entry is None:
+            raise ValueError("video is not in the playlist")
+        return self.index_of(entry)
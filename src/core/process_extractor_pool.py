@@ -0,0 +1,178 @@
+"""
+ワーカープロセスで動画情報を抽出するプール（UIスレッドとGILを共有しない）
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Union, Callable, List
+
+import yt_dlp
+
+from .paths import get_cache_dir
+from .extractor_pool import compact_info, compact_playlist
+from .extraction_executor import ExtractionQueueFullError, ExtractionTimeoutError
+
+# ワーカープロセス内で使い回す抽出器
+_worker_extractor = None
+
+
+def _init_worker(ydl_opts: Dict[str, Any],
+                 extractor_factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+    """ワーカープロセスの初期化（抽出器を1つだけ生成）"""
+    global _worker_extractor
+    factory = extractor_factory or yt_dlp.YoutubeDL
+    _worker_extractor = factory(ydl_opts)
+
+
+def _extract_payload(url: str) -> Optional[Dict[str, Any]]:
+    """ワーカープロセスで抽出し、軽量化したペイロードを返す"""
+    return compact_info(_worker_extractor.extract_info(url, download=False))
+
+
+def _extract_playlist_payload(url: str) -> List[Dict[str, Any]]:
+    """ワーカープロセスでプレイリストのエントリ一覧を取得"""
+    return compact_playlist(_worker_extractor.extract_info(url, download=False, process=False))
+
+
+def _worker_pid() -> int:
+    """ウォームアップ用: ワーカープロセスのPIDを返す"""
+    return os.getpid()
+
+
+class ProcessExtractorPool:
+    """ワーカープロセスごとに長寿命のYoutubeDLを保持する抽出器プール"""
+    
+    def __init__(self, ydl_opts: Dict[str, Any], size: int = 2,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 max_queue: int = 32, job_timeout: Optional[float] = 60.0,
+                 extractor_factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 mp_context=None):
+        """
+        プロセス抽出器プールを初期化（ワーカープロセスは最初の投入時に起動）
+        
+        Args:
+            ydl_opts: YoutubeDLに渡すオプション
+            size: ワーカープロセス数
+            cache_dir: yt-dlpのキャッシュディレクトリ
+            max_queue: 実行待ちにできる抽出ジョブ数の上限
+            job_timeout: 抽出1件あたりのタイムアウト（秒）
+            extractor_factory: 抽出器の生成関数（pickle可能であること。省略時は yt_dlp.YoutubeDL）
+            mp_context: multiprocessingのコンテキスト（省略時はプラットフォーム既定）
+        """
+        self.size = size
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.ydl_opts = dict(ydl_opts)
+        self.ydl_opts['cachedir'] = str(cache_dir or (get_cache_dir() / "yt-dlp"))
+        if job_timeout:
+            self.ydl_opts.setdefault('socket_timeout', job_timeout)
+        self.executor = ProcessPoolExecutor(
+            max_workers=size, mp_context=mp_context,
+            initializer=_init_worker, initargs=(self.ydl_opts, extractor_factory)
+        )
+        self._in_flight = 0
+        self._lock = threading.Lock()
+    
+    def _release(self, _future):
+        """完了したジョブを実行中の件数から外す"""
+        with self._lock:
+            self._in_flight -= 1
+    
+    def submit(self, fn: Callable[..., Any], *args: Any):
+        """
+        ワーカープロセスにジョブを投入
+        
+        Args:
+            fn: ワーカープロセスで実行する関数（pickle可能であること）
+            *args: 関数の引数
+        
+        Returns:
+            実行結果のFuture
+        
+        Raises:
+            ExtractionQueueFullError: 実行中・実行待ちのジョブが上限に達している場合
+        """
+        with self._lock:
+            if self._in_flight >= self.size + self.max_queue:
+                raise ExtractionQueueFullError(
+                    f"抽出待ちのジョブが上限（{self.max_queue}件）に達しています"
+                )
+            self._in_flight += 1
+        
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+    
+    async def extract(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        ワーカープロセスで動画情報を抽出
+        
+        Args:
+            url: YouTube動画のURL
+        
+        Returns:
+            軽量化した情報辞書（compact_info の形式）
+        """
+        return await self._run(_extract_payload, url)
+    
+    def submit_extract(self, url: str):
+        """
+        動画情報の抽出をワーカープロセスに投入（イベントループを使わずに結果を待つ場合用）
+        
+        Args:
+            url: YouTube動画のURL
+        
+        Returns:
+            軽量化した情報辞書（compact_info の形式）を結果とするFuture
+        
+        Raises:
+            ExtractionQueueFullError: 実行中・実行待ちのジョブが上限に達している場合
+        """
+        return self.submit(_extract_payload, url)
+    
+    async def extract_playlist(self, url: str) -> List[Dict[str, Any]]:
+        """
+        ワーカープロセスでプレイリストのエントリ一覧を取得
+        
+        Args:
+            url: プレイリストのURL
+        
+        Returns:
+            compact_playlist の形式のエントリ一覧
+        """
+        return await self._run(_extract_playlist_payload, url)
+    
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """ジョブを投入し、タイムアウト付きで完了を待つ"""
+        future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.job_timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise ExtractionTimeoutError(f"抽出が{self.job_timeout}秒以内に完了しませんでした")
+    
+    def warm_up(self):
+        """全ワーカープロセスを起動し、抽出器を事前に生成（完了は待たない）"""
+        for _ in range(self.size):
+            try:
+                self.submit(_worker_pid)
+            except ExtractionQueueFullError:
+                break
+    
+    def close(self):
+        """ワーカープロセスを停止（実行中の抽出は待たずに終了させる）"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        # 応答しない抽出で終了処理が止まらないようにワーカーを強制終了
+        processes = getattr(self.executor, '_processes', None) or {}
+        for process in list(processes.values()):
+            try:
+                process.terminate()
+            except Exception:
+                pass
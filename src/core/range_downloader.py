@@ -0,0 +1,229 @@
+"""
+バイト範囲を並行取得する再開可能なダウンローダー
+"""
+
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Optional, Dict, Any, Set, Tuple, Union
+
+import requests
+
+# Content-Range: bytes START-END/TOTAL
+_CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class RangeDownloadError(Exception):
+    """範囲取得によるダウンロードに失敗した"""
+
+
+class RangeDownloader:
+    """ストリームを固定長のバイト範囲に分割し、並行して取得するダウンローダー
+    
+    取得途中のファイル（.part）と完了済みの範囲を記録したサイドカー（.part.json）を
+    残すため、中断後に同じ保存先へダウンロードすると未取得の範囲だけを取得する。
+    全範囲の取得後に保存先へアトミックにリネームする。
+    """
+    
+    DEFAULT_CHUNK_SIZE = 1024 * 1024
+    STATE_SUFFIX = ".json"
+    
+    def __init__(self, session: Optional[requests.Session] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, max_parallel: int = 4,
+                 timeout: float = 30.0, retries: int = 2, max_downloads: int = 1):
+        """
+        ダウンローダーを初期化
+        
+        Args:
+            session: HTTPセッション（省略時は新規に作成）
+            chunk_size: 1リクエストで取得するバイト数
+            max_parallel: 1ファイルあたりの同時リクエスト数
+            timeout: 接続・読み込みタイムアウト（秒）
+            retries: 範囲ごとの再試行回数
+            max_downloads: 同時に行うダウンロード数（ワーカー数は max_downloads * max_parallel）
+        """
+        self.session = session or requests.Session()
+        self.chunk_size = max(1, chunk_size)
+        self.max_parallel = max(1, max_parallel)
+        self.timeout = timeout
+        self.retries = max(0, retries)
+        # 同時リクエスト数は download() ごとに max_parallel までに抑えるため、キューは制限しない
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_parallel * max(1, max_downloads),
+            thread_name_prefix="range-download"
+        )
+        self._closed = False
+    
+    @staticmethod
+    def part_path(dest: Union[str, Path]) -> Path:
+        """保存先に対応する取得途中のファイルのパス"""
+        dest = Path(dest)
+        return dest.with_name(dest.name + ".part")
+    
+    def _state_path(self, dest: Path) -> Path:
+        """取得済み範囲を記録するサイドカーのパス"""
+        part = self.part_path(dest)
+        return part.with_name(part.name + self.STATE_SUFFIX)
+    
+    def _probe(self, url: str) -> Tuple[Optional[int], bool]:
+        """
+        ストリームの全体サイズと範囲取得への対応を調べる
+        
+        Returns:
+            (全体サイズ（不明な場合はNone）, 範囲取得に対応しているか)
+        """
+        with self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True,
+                              timeout=self.timeout) as response:
+            response.raise_for_status()
+            match = _CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+            if response.status_code == 206 and match and match.group(3) != '*':
+                return int(match.group(3)), True
+            length = response.headers.get('Content-Length')
+            return (int(length) if length and length.isdigit() else None), False
+    
+    def _load_state(self, dest: Path, size: int) -> Set[int]:
+        """中断したダウンロードの取得済み範囲を読み込む（条件が一致しない場合は破棄）"""
+        part = self.part_path(dest)
+        try:
+            with open(self._state_path(dest), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        
+        if (not isinstance(state, dict) or state.get('size') != size
+                or state.get('chunk_size') != self.chunk_size or not part.is_file()
+                or part.stat().st_size != size):
+            return set()
+        return {int(index) for index in state.get('done', [])}
+    
+    def _save_state(self, dest: Path, size: int, done: Set[int]):
+        """取得済み範囲をサイドカーへアトミックに書き込む"""
+        state_path = self._state_path(dest)
+        fd, tmp_path = tempfile.mkstemp(dir=str(state_path.parent), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({'size': size, 'chunk_size': self.chunk_size, 'done': sorted(done)}, f)
+        os.replace(tmp_path, state_path)
+    
+    def _fetch_chunk(self, url: str, part: Path, index: int, size: int):
+        """1つの範囲を取得して取得途中のファイルの該当位置へ書き込む"""
+        start = index * self.chunk_size
+        end = min(start + self.chunk_size, size) - 1
+        last_error: Optional[Exception] = None
+        
+        for _ in range(self.retries + 1):
+            if self._closed:
+                raise RangeDownloadError("ダウンローダーは停止しています")
+            try:
+                with self.session.get(url, headers={'Range': f'bytes={start}-{end}'},
+                                      stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    match = _CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+                    if response.status_code != 206 or not match or int(match.group(1)) != start:
+                        raise RangeDownloadError(f"範囲 {start}-{end} の応答が不正です")
+                    data = response.content
+                if len(data) != end - start + 1:
+                    raise RangeDownloadError(f"範囲 {start}-{end} の長さが一致しません")
+                with open(part, "r+b") as f:
+                    f.seek(start)
+                    f.write(data)
+                return
+            except (requests.RequestException, RangeDownloadError) as e:
+                last_error = e
+        raise RangeDownloadError(f"範囲 {start}-{end} を取得できませんでした: {last_error}")
+    
+    def _download_sequential(self, url: str, dest: Path) -> Path:
+        """範囲取得に対応しないサーバーから1回のGETで取得"""
+        part = self.part_path(dest)
+        # 途中から再開できないため、既存の取得途中のファイルは使わない
+        self.discard(dest)
+        try:
+            with self.session.get(url, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                with open(part, "wb") as f:
+                    for data in response.iter_content(self.chunk_size):
+                        f.write(data)
+            os.replace(part, dest)
+        except BaseException:
+            self.discard(dest)
+            raise
+        return dest
+    
+    def download(self, url: str, dest: Union[str, Path]) -> Path:
+        """
+        ストリームを保存先にダウンロード（呼び出し元のスレッドで完了まで待つ）
+        
+        Args:
+            url: 取得するURL
+            dest: 保存先のパス（完了時にアトミックに作成される）
+        
+        Returns:
+            保存先のパス
+        
+        Raises:
+            RangeDownloadError: 範囲の取得に失敗した場合（取得済みの範囲は次回に再開できる）
+            requests.RequestException: サイズの取得に失敗した場合
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        size, ranged = self._probe(url)
+        if not ranged or not size:
+            return self._download_sequential(url, dest)
+        
+        part = self.part_path(dest)
+        done = self._load_state(dest, size)
+        if not done:
+            with open(part, "wb") as f:
+                f.truncate(size)
+        self._save_state(dest, size, done)
+        
+        pending = [i for i in range((size + self.chunk_size - 1) // self.chunk_size) if i not in done]
+        running: Dict[Any, int] = {}
+        try:
+            while pending or running:
+                # 同時リクエスト数を上限以内に保ちながら範囲を投入
+                while pending and len(running) < self.max_parallel:
+                    index = pending.pop(0)
+                    try:
+                        future = self._executor.submit(self._fetch_chunk, url, part, index, size)
+                    except RuntimeError:
+                        raise RangeDownloadError("ダウンローダーは停止しています")
+                    running[future] = index
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    future.result()
+                    done.add(index)
+                    self._save_state(dest, size, done)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        
+        os.replace(part, dest)
+        try:
+            self._state_path(dest).unlink()
+        except OSError:
+            pass
+        return dest
+    
+    def discard(self, dest: Union[str, Path]):
+        """
+        中断したダウンロードの取得途中のファイルを削除
+        
+        Args:
+            dest: 保存先のパス
+        """
+        dest = Path(dest)
+        for path in (self.part_path(dest), self._state_path(dest)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    
+    def close(self):
+        """実行待ちの範囲の取得を取り消す（実行中のリクエストは待たない）"""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,59 @@
+"""
+同一キーの同時リクエストを1回の処理にまとめるシングルフライト
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """同じキーで同時に要求された処理を1つのタスクで実行し、結果を共有する"""
+    
+    def __init__(self):
+        """シングルフライトを初期化"""
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+    
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        キーごとに処理を1回だけ実行し、その結果を待つ
+        
+        同じキーの処理が実行中であれば新たに開始せず、実行中の処理の結果を返す。
+        待機側がキャンセルされても共有中の処理は止めない。
+        
+        Args:
+            key: まとめる単位となるキー
+            factory: 処理を開始するコルーチン関数
+        
+        Returns:
+            処理の結果
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(factory())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(flight)
+    
+    def _forget(self, key: Hashable, flight: asyncio.Future):
+        """完了した処理を登録から外す"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # 待機者が全員キャンセルされた場合に例外が未取得のまま残らないようにする
+        if not flight.cancelled():
+            flight.exception()
+    
+    def in_flight(self, key: Hashable) -> bool:
+        """
+        指定キーの処理が実行中かチェック
+        
+        Args:
+            key: 確認するキー
+        
+        Returns:
+            実行中の場合True
+        """
+        return key in self._flights
+    
+    def __len__(self) -> int:
+        """実行中の処理数"""
+        return len(self._flights)
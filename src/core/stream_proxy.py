@@ -0,0 +1,631 @@
+"""
+VLCとストリームURLの間に入るローカルのキャッシュ付きHTTPプロキシ
+"""
+
+import bisect
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Callable, List, Iterator, Tuple, Union
+
+import requests
+
+from ..models.video_info import VideoInfo
+from .paths import get_cache_dir
+from .audio_cache import AudioCache
+from .extraction_executor import ExtractionExecutor, ExtractionQueueFullError
+
+# Range: bytes=START-[END]
+_RANGE_PATTERN = re.compile(r'bytes=(\d+)-(\d*)$')
+# Content-Range: bytes START-END/TOTAL
+_CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+)')
+_PATH_PATTERN = re.compile(r'/stream/([\w-]+)$')
+
+
+class StreamProxyError(Exception):
+    """上流のストリームから取得できない"""
+
+
+class RangeSet:
+    """取得済みのバイト範囲の集合（重なる範囲・隣接する範囲は結合する）
+    
+    範囲は半開区間 [start, end) で扱う。
+    """
+    
+    def __init__(self):
+        """空の集合を作成"""
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+    
+    def add(self, start: int, end: int):
+        """
+        範囲を追加
+        
+        Args:
+            start: 先頭のバイト位置
+            end: 末尾の次のバイト位置
+        """
+        if end <= start:
+            return
+        # start に重なるか隣接する最初の範囲から、end までに始まる範囲までを結合
+        i = bisect.bisect_left(self._ends, start)
+        j = bisect.bisect_right(self._starts, end)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+    
+    def covered_until(self, pos: int) -> int:
+        """
+        指定位置から連続して取得済みの範囲の終端
+        
+        Returns:
+            取得済みの範囲の末尾の次のバイト位置（pos が未取得の場合は pos）
+        """
+        k = bisect.bisect_right(self._starts, pos) - 1
+        if k >= 0 and self._ends[k] > pos:
+            return self._ends[k]
+        return pos
+    
+    def next_start(self, pos: int, limit: int) -> int:
+        """
+        指定位置より後で最初に取得済みの範囲が始まる位置
+        
+        Returns:
+            範囲の先頭のバイト位置（limit までにない場合は limit）
+        """
+        k = bisect.bisect_right(self._starts, pos)
+        return min(self._starts[k], limit) if k < len(self._starts) else limit
+    
+    def missing(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        指定範囲のうち未取得の範囲の一覧
+        
+        Args:
+            start: 先頭のバイト位置
+            end: 末尾の次のバイト位置
+        
+        Returns:
+            未取得の範囲 (start, end) の一覧
+        """
+        gaps = []
+        pos = start
+        while pos < end:
+            pos = self.covered_until(pos)
+            if pos >= end:
+                break
+            gap_end = self.next_start(pos, end)
+            gaps.append((pos, gap_end))
+            pos = gap_end
+        return gaps
+    
+    @property
+    def total(self) -> int:
+        """取得済みのバイト数"""
+        return sum(end - start for start, end in self)
+    
+    def clear(self):
+        """全ての範囲を削除"""
+        self._starts.clear()
+        self._ends.clear()
+    
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """範囲 (start, end) を先頭から順に返す"""
+        return iter(list(zip(self._starts, self._ends)))
+    
+    def __len__(self) -> int:
+        """範囲の数"""
+        return len(self._starts)
+
+
+class _ProxyTrack:
+    """1曲分の上流URLと、取得済みの範囲を保持するスパースファイル"""
+    
+    def __init__(self, video: VideoInfo, path: Path):
+        """
+        曲のキャッシュを初期化
+        
+        Args:
+            video: 曲の動画情報（上流URLは audio_url を参照する）
+            path: スパースファイルのパス
+        """
+        self.video = video
+        self.path = path
+        self.size: Optional[int] = None
+        self.ranges = RangeSet()
+        self.lock = threading.Lock()
+        self._file = None
+        self._closed = False
+        # 全範囲を取得して音声キャッシュへ渡したか
+        self.stored = False
+    
+    def _open_file(self):
+        """スパースファイルを開く（未作成の場合は作成）"""
+        if self._closed:
+            raise StreamProxyError(f"曲のキャッシュは削除されました: {self.video.video_id}")
+        if self._file is None:
+            self.path.touch()
+            self._file = open(self.path, "r+b")
+        return self._file
+    
+    def write(self, pos: int, data: bytes):
+        """取得したバイト列を書き込み、取得済みの範囲に加える"""
+        with self.lock:
+            f = self._open_file()
+            f.seek(pos)
+            f.write(data)
+            self.ranges.add(pos, pos + len(data))
+    
+    @property
+    def complete(self) -> bool:
+        """曲全体を取得済みか"""
+        return self.size is not None and self.ranges.covered_until(0) >= self.size
+    
+    def export(self, dest: Path):
+        """
+        取得済みの曲全体を dest に作成（ハードリンク、できない場合はコピー）
+        
+        Args:
+            dest: 作成するファイルのパス
+        """
+        with self.lock:
+            f = self._open_file()
+            f.flush()
+            try:
+                os.link(self.path, dest)
+            except OSError:
+                shutil.copyfile(self.path, dest)
+    
+    def read(self, pos: int, length: int) -> bytes:
+        """取得済みの範囲からバイト列を読み込む"""
+        with self.lock:
+            f = self._open_file()
+            f.flush()
+            f.seek(pos)
+            return f.read(length)
+    
+    def reset(self, size: Optional[int]):
+        """上流のストリームが変わった場合にキャッシュを破棄"""
+        with self.lock:
+            self.ranges.clear()
+            self.size = size
+            self.stored = False
+            # 音声キャッシュへ渡したファイルとリンクを共有している場合があるため、切り詰めずに作り直す
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+    
+    def close(self):
+        """スパースファイルを閉じて削除"""
+        with self.lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """/stream/{video_id} へのリクエストをキャッシュまたは上流から返すハンドラ"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        proxy: "StreamProxy" = self.server.proxy
+        match = _PATH_PATTERN.match(self.path)
+        track = proxy._get_track(match.group(1)) if match else None
+        if track is None:
+            self.send_error(404)
+            return
+        
+        range_match = _RANGE_PATTERN.match(self.headers.get('Range', ''))
+        start = int(range_match.group(1)) if range_match else 0
+        end = int(range_match.group(2)) if range_match and range_match.group(2) else None
+        
+        headers_sent = False
+        try:
+            upstream = None
+            if track.size is None:
+                upstream = proxy._open_upstream(track, start, end)
+            size = track.size
+            end = size - 1 if end is None else min(end, size - 1)
+            if start > end:
+                if upstream is not None:
+                    upstream.close()
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            
+            self.send_response(206 if range_match else 200)
+            if range_match:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            headers_sent = True
+            proxy._copy_range(track, self.wfile, start, end + 1, upstream)
+        except (BrokenPipeError, ConnectionResetError):
+            # VLCがシークなどで接続を切った
+            pass
+        except (requests.RequestException, StreamProxyError, OSError) as e:
+            # 停止中のプロキシでは中継できないのは想定どおり
+            if proxy.is_running:
+                print(f"Error proxying stream: {e}")
+            if not headers_sent:
+                self.send_error(502)
+            self.close_connection = True
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StreamProxy:
+    """VLCに上流のストリームURLの代わりに渡すループバックのHTTPプロキシ
+    
+    上流から取得したバイト列を曲ごとのスパースファイルに書き込み、同じ範囲への
+    再リクエスト（巻き戻しなど）はローカルから返す。上流が403を返した場合は
+    ストリームURLを再解決し、接続を切らずに新しいURLから続きを取得する。
+    次に再生する曲の先頭を先読みしておくと、再生開始時に上流への接続を待たない。
+    曲全体を取得し終えたスパースファイルは音声キャッシュへ渡すため、再生した曲を
+    キャッシュのために改めてダウンロードすることはない。
+    """
+    
+    DIR_NAME = "stream"
+    # 上流から読み込む単位（大きいと最初のバイト列を返すまでに時間がかかる）
+    CHUNK_SIZE = 16 * 1024
+    # 先読みする曲の先頭のバイト数（160kbpsで約25秒分）
+    HEAD_BYTES = 512 * 1024
+    # 失効・署名エラーとみなす上流のステータスコード
+    EXPIRED_STATUSES = (403, 410)
+    
+    def __init__(self, refresh: Optional[Callable[[VideoInfo], bool]] = None,
+                 cache_dir: Optional[Union[str, Path]] = None, max_tracks: int = 8,
+                 timeout: float = 30.0, host: str = "127.0.0.1",
+                 audio_cache: Optional[AudioCache] = None):
+        """
+        プロキシを初期化
+        
+        Args:
+            refresh: 曲のストリームURLを再解決する関数（プロキシのスレッドから呼ばれ、
+                完了まで待つ。成功時True）
+            cache_dir: スパースファイルの保存先の親ディレクトリ（省略時はアプリ標準の
+                ディレクトリ配下、インスタンスごとに専用のディレクトリを作成する）
+            max_tracks: キャッシュを保持する曲数（古い曲から削除）
+            timeout: 上流への接続・読み込みタイムアウト（秒）
+            host: 待ち受けるアドレス
+            audio_cache: 全体を取得した曲を保存する音声キャッシュ（省略時は保存しない）
+        """
+        self.refresh = refresh
+        self.cache_root = Path(cache_dir) if cache_dir else get_cache_dir() / self.DIR_NAME
+        # このインスタンス専用のディレクトリ（待ち受け開始時に作成）
+        self.cache_dir: Optional[Path] = None
+        self.audio_cache = audio_cache
+        self.max_tracks = max_tracks
+        self.timeout = timeout
+        self.host = host
+        self._tracks: "OrderedDict[str, _ProxyTrack]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        # 先頭の先読みと、取得済みの範囲を返している間の上流への接続に使う
+        self._executor = ExtractionExecutor(
+            max_workers=4, job_timeout=None, thread_name_prefix="stream-proxy"
+        )
+        self._head_jobs = set()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def is_running(self) -> bool:
+        """待ち受け中か"""
+        return self._server is not None
+    
+    def start(self):
+        """待ち受けを開始（起動済みの場合は何もしない）"""
+        with self._lock:
+            if self._server is not None:
+                return
+            # 同じディレクトリを使う他のインスタンスのファイルには触れない
+            self.cache_root.mkdir(parents=True, exist_ok=True)
+            self.cache_dir = Path(tempfile.mkdtemp(prefix="proxy-", dir=str(self.cache_root)))
+            server = ThreadingHTTPServer((self.host, 0), _ProxyHandler)
+            server.daemon_threads = True
+            server.proxy = self
+            self._thread = threading.Thread(
+                target=server.serve_forever, name="stream-proxy", daemon=True
+            )
+            self._thread.start()
+            self._server = server
+    
+    def stop(self):
+        """待ち受けを停止し、スパースファイルとこのインスタンスのディレクトリを削除"""
+        with self._lock:
+            server, self._server = self._server, None
+            tracks = list(self._tracks.values())
+            self._tracks.clear()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        self._executor.shutdown(wait=False)
+        for track in tracks:
+            track.close()
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._session.close()
+    
+    def url_for(self, video: VideoInfo) -> str:
+        """
+        曲をプロキシに登録し、VLCに渡すURLを取得
+        
+        Args:
+            video: 再生する曲（audio_url が上流のURLとして使われる）
+        
+        Returns:
+            プロキシのURL
+        """
+        self._register(video)
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/stream/{video.video_id}"
+    
+    def _register(self, video: VideoInfo) -> _ProxyTrack:
+        """曲を登録（保持する曲数を超えた場合は古い曲を削除）"""
+        self.start()
+        with self._lock:
+            track = self._tracks.get(video.video_id)
+            if track is None:
+                track = _ProxyTrack(video, self.cache_dir / f"{video.video_id}.sparse")
+                self._tracks[video.video_id] = track
+            track.video = video
+            self._tracks.move_to_end(video.video_id)
+            evicted = []
+            while len(self._tracks) > self.max_tracks:
+                evicted.append(self._tracks.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return track
+    
+    def cached_ranges(self, video_id: str) -> Optional[RangeSet]:
+        """
+        曲の取得済みの範囲を取得
+        
+        Args:
+            video_id: YouTubeの動画ID
+        
+        Returns:
+            取得済みの範囲、登録されていない場合はNone
+        """
+        track = self._get_track(video_id)
+        return track.ranges if track is not None else None
+    
+    def _get_track(self, video_id: str) -> Optional[_ProxyTrack]:
+        """登録済みの曲を取得"""
+        with self._lock:
+            return self._tracks.get(video_id)
+    
+    def _open_upstream(self, track: _ProxyTrack, start: int,
+                       end: Optional[int]) -> requests.Response:
+        """
+        上流に範囲リクエストを送る（URLが失効していれば再解決して再試行）
+        
+        Raises:
+            StreamProxyError: 上流から取得できない場合
+            requests.RequestException: 通信に失敗した場合
+        """
+        headers = {'Range': f"bytes={start}-{'' if end is None else end}"}
+        for attempt in range(2):
+            url = track.video.audio_url
+            if not url:
+                raise StreamProxyError(f"ストリームURLがありません: {track.video.video_id}")
+            response = self._session.get(url, headers=headers, stream=True, timeout=self.timeout)
+            if response.status_code in self.EXPIRED_STATUSES and attempt == 0:
+                response.close()
+                # 他の経路（StreamRefresherなど）で既に更新されていればそのURLを使う
+                if track.video.audio_url == url and not (self.refresh and self.refresh(track.video)):
+                    break
+                continue
+            response.raise_for_status()
+            self._check_size(track, response)
+            return response
+        raise StreamProxyError(f"ストリームURLの再解決に失敗しました: {track.video.video_id}")
+    
+    def _check_size(self, track: _ProxyTrack, response: requests.Response):
+        """上流の応答から全体サイズを取得（再解決で別のストリームになった場合は破棄）"""
+        match = _CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+        if match:
+            size = int(match.group(3))
+        elif response.status_code == 200 and response.headers.get('Content-Length', '').isdigit():
+            size = int(response.headers['Content-Length'])
+        else:
+            response.close()
+            raise StreamProxyError("上流のストリームのサイズが不明です")
+        
+        if track.size is None:
+            track.size = size
+        elif track.size != size:
+            response.close()
+            track.reset(size)
+            raise StreamProxyError("上流のストリームが変わりました")
+    
+    def _connect_ahead(self, track: _ProxyTrack, start: int,
+                       end: int) -> Optional["Future[requests.Response]"]:
+        """次の未取得範囲への接続をバックグラウンドで開始（開始できない場合はNone）"""
+        try:
+            return self._executor.submit(self._open_upstream, track, start, end)
+        except (RuntimeError, ExtractionQueueFullError):
+            return None
+    
+    def _copy_range(self, track: _ProxyTrack, out, start: int, end: int,
+                    upstream: Optional[requests.Response] = None):
+        """
+        範囲 [start, end) を取得済みの部分はスパースファイルから、それ以外は上流から書き出す
+        
+        取得済みの範囲を返している間に、続く未取得範囲への上流の接続を開いておく。
+        
+        Args:
+            track: 対象の曲
+            out: 書き出し先（Noneの場合はスパースファイルへの取得のみ）
+            start: 先頭のバイト位置
+            end: 末尾の次のバイト位置
+            upstream: start から開いている上流の応答（あれば最初の未取得範囲に使う）
+        """
+        pos = start
+        # (接続先の位置, 接続中のFuture)
+        ahead: Optional[Tuple[int, Future]] = None
+        try:
+            while pos < end:
+                cached_end = min(track.ranges.covered_until(pos), end)
+                if cached_end > pos:
+                    if upstream is None and ahead is None and cached_end < end and out is not None:
+                        future = self._connect_ahead(
+                            track, cached_end, track.ranges.next_start(cached_end, end) - 1
+                        )
+                        ahead = (cached_end, future) if future is not None else None
+                    while pos < cached_end:
+                        if out is None:
+                            pos = cached_end
+                            break
+                        data = track.read(pos, min(self.CHUNK_SIZE, cached_end - pos))
+                        out.write(data)
+                        pos += len(data)
+                    continue
+                
+                gap_end = track.ranges.next_start(pos, end)
+                if upstream is None and ahead is not None:
+                    ahead_pos, future = ahead
+                    ahead = None
+                    if ahead_pos == pos:
+                        upstream = future.result()
+                    else:
+                        future.add_done_callback(_close_response)
+                if upstream is None:
+                    upstream = self._open_upstream(track, pos, gap_end - 1)
+                before = pos
+                try:
+                    # 範囲リクエストを無視した上流は先頭から返すため、手前を読み飛ばす
+                    offset = 0 if upstream.status_code == 206 else pos
+                    for data in upstream.iter_content(self.CHUNK_SIZE):
+                        if offset:
+                            skip = min(offset, len(data))
+                            data, offset = data[skip:], offset - skip
+                        data = data[:gap_end - pos]
+                        if not data:
+                            if pos >= gap_end:
+                                break
+                            continue
+                        track.write(pos, data)
+                        if out is not None:
+                            out.write(data)
+                        pos += len(data)
+                        if pos >= gap_end:
+                            break
+                except requests.RequestException:
+                    # 途中まで取得できていれば続きから接続し直す
+                    if pos == before:
+                        raise
+                finally:
+                    upstream.close()
+                    upstream = None
+                if pos == before:
+                    raise StreamProxyError("上流のストリームが途中で終了しました")
+            self._store_if_complete(track)
+        finally:
+            if ahead is not None:
+                ahead[1].add_done_callback(_close_response)
+    
+    def _store_if_complete(self, track: _ProxyTrack):
+        """曲全体を取得し終えたスパースファイルを音声キャッシュへ渡す"""
+        if self.audio_cache is None or track.stored or not track.complete:
+            return
+        video_id = track.video.video_id
+        track.stored = True
+        if video_id in self.audio_cache:
+            return
+        dest = self.audio_cache.cache_dir / f"{video_id}.proxy{AudioCache.DOWNLOAD_SUFFIX}"
+        try:
+            self.audio_cache.cache_dir.mkdir(parents=True, exist_ok=True)
+            track.export(dest)
+            self.audio_cache.store(video_id, dest)
+        except (OSError, StreamProxyError) as e:
+            track.stored = False
+            print(f"Error caching proxied audio: {e}")
+        finally:
+            if dest.exists():
+                dest.unlink()
+    
+    def prefetch_head(self, video: VideoInfo, nbytes: Optional[int] = None) -> Optional[Future]:
+        """
+        曲の先頭をバックグラウンドでスパースファイルに取得
+        
+        再生開始時は取得済みの先頭をローカルから返すため、上流への接続を待たずに
+        再生が始まる。
+        
+        Args:
+            video: 先読みする曲
+            nbytes: 取得するバイト数（省略時は HEAD_BYTES）
+        
+        Returns:
+            取得のFuture、取得済み・取得中・開始できなかった場合はNone
+        """
+        if not video.video_id or not video.audio_url:
+            return None
+        nbytes = nbytes or self.HEAD_BYTES
+        track = self._register(video)
+        with self._lock:
+            if self.has_head(video.video_id, nbytes) or video.video_id in self._head_jobs:
+                return None
+            try:
+                future = self._executor.submit(self._fill_head, track, nbytes)
+            except (RuntimeError, ExtractionQueueFullError):
+                return None
+            self._head_jobs.add(video.video_id)
+        future.add_done_callback(lambda _: self._finish_head(video.video_id))
+        return future
+    
+    def _fill_head(self, track: _ProxyTrack, nbytes: int):
+        """曲の先頭 nbytes バイトを取得"""
+        upstream = None
+        if track.size is None:
+            upstream = self._open_upstream(track, 0, nbytes - 1)
+        self._copy_range(track, None, 0, min(nbytes, track.size), upstream)
+    
+    def _finish_head(self, video_id: str):
+        """完了した先頭の取得を登録から外す"""
+        with self._lock:
+            self._head_jobs.discard(video_id)
+    
+    def has_head(self, video_id: str, nbytes: Optional[int] = None) -> bool:
+        """
+        曲の先頭を取得済みかチェック
+        
+        Args:
+            video_id: YouTubeの動画ID
+            nbytes: 先頭として必要なバイト数（省略時は HEAD_BYTES、曲がそれより短い場合は曲全体）
+        
+        Returns:
+            取得済みの場合True
+        """
+        track = self._tracks.get(video_id)
+        if track is None or track.size is None:
+            return False
+        return track.ranges.covered_until(0) >= min(nbytes or self.HEAD_BYTES, track.size)
+
+
+def _close_response(future: Future):
+    """使わなかった上流の接続を閉じる"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
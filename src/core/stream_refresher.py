@@ -0,0 +1,128 @@
+"""
+ストリームURLの失効前バックグラウンド更新
+"""
+
+import asyncio
+import time
+import weakref
+from typing import List, Optional
+
+from ..models.video_info import VideoInfo
+from .media_player import MediaPlayer
+from .youtube_downloader import YouTubeDownloader
+
+
+class StreamRefresher:
+    """失効が近いストリームURLを再生順の近い曲から優先して再取得するスケジューラ
+    
+    未解決の曲（プレイリスト展開による仮エントリ）は対象外で、再生時の解決と
+    先読み（TrackPrefetcher）に任せる。
+    """
+    
+    def __init__(self, player: MediaPlayer, downloader: YouTubeDownloader,
+                 lookahead: int = 3, priority_margin: float = 30 * 60,
+                 refresh_margin: float = 10 * 60, interval: float = 30.0,
+                 max_refreshes_per_tick: int = 5, retry_delay: float = 5 * 60):
+        """
+        スケジューラを初期化
+        
+        Args:
+            player: メディアプレイヤー
+            downloader: ストリームURLの再取得に使うダウンローダー
+            lookahead: 現在の曲に続いて（再生順で）優先的に更新する曲数
+            priority_margin: 現在の曲と先読み対象の曲を更新する失効までの残り秒数
+            refresh_margin: それ以外の曲を更新する失効までの残り秒数
+            interval: チェック間隔（秒）
+            max_refreshes_per_tick: 1回のチェックで更新する最大曲数
+            retry_delay: 解決に失敗した曲を再試行するまでの秒数
+        """
+        self.player = player
+        self.downloader = downloader
+        self.lookahead = lookahead
+        self.priority_margin = priority_margin
+        self.refresh_margin = refresh_margin
+        self.interval = interval
+        self.max_refreshes_per_tick = max_refreshes_per_tick
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+        # 解決に失敗した曲 → 再試行可能になる時刻
+        self._retry_after: "weakref.WeakKeyDictionary[VideoInfo, float]" = weakref.WeakKeyDictionary()
+    
+    def start(self):
+        """バックグラウンド更新を開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        """バックグラウンド更新を停止"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+    
+    async def _run(self):
+        """定期的に失効間近のURLを更新"""
+        while True:
+            await self.refresh_due()
+            await asyncio.sleep(self.interval)
+    
+    def collect_due(self, now: Optional[float] = None) -> List[VideoInfo]:
+        """
+        更新が必要な曲を優先度順に列挙
+        
+        Args:
+            now: 現在時刻（省略時はtime.time()）
+        
+        Returns:
+            現在の曲 → 先読み対象の曲 → その他の曲 の順に並んだ更新対象
+        """
+        if now is None:
+            now = time.time()
+        
+        playlist = list(self.player.playlist)
+        if not playlist:
+            return []
+        
+        current = min(max(self.player.current_index, 0), len(playlist) - 1)
+        # 現在の曲と、再生順（シャッフル・リピートを含む）で次に続く曲を優先
+        priority = []
+        seen = set()
+        for video in [playlist[current]] + list(self.player.upcoming(self.lookahead + 1)):
+            if id(video) not in seen and len(priority) <= self.lookahead:
+                seen.add(id(video))
+                priority.append(video)
+        others = [
+            video for video in playlist[current + 1:] + playlist[:current] if id(video) not in seen
+        ]
+        
+        due = []
+        for videos, margin in ((priority, self.priority_margin), (others, self.refresh_margin)):
+            for video in videos:
+                if self._retry_after.get(video, 0.0) > now:
+                    continue
+                if video.is_stream_expired(margin=margin, now=now):
+                    due.append(video)
+        
+        return due
+    
+    async def refresh_due(self) -> int:
+        """
+        更新が必要な曲のストリームURLを再取得
+        
+        Returns:
+            更新に成功した曲数
+        """
+        refreshed = 0
+        # オフラインモードでは通信しない
+        if self.player.offline:
+            return refreshed
+        for video in self.collect_due()[:self.max_refreshes_per_tick]:
+            try:
+                if await self.downloader.resolve_stream(video):
+                    refreshed += 1
+                    self._retry_after.pop(video, None)
+                    continue
+            except Exception as e:
+                print(f"Error refreshing stream URL: {e}")
+            # 非公開・削除済みの曲などで毎回の再試行を繰り返さない
+            self._retry_after[video] = time.time() + self.retry_delay
+        return refreshed
@@ -0,0 +1,271 @@
+"""
+再生時のストリーム解決と次の曲の先読み
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from ..models.video_info import VideoInfo
+from .media_player import MediaPlayer
+from .youtube_downloader import YouTubeDownloader
+
+
+class TrackPrefetcher:
+    """曲のストリームURLを再生直前に解決し、続く曲をバックグラウンドで先読みする
+    
+    再生開始時には次の1曲だけを解決し、同じ曲の再生が prefetch_delay 秒続いた
+    時点で続く prefetch_count 曲まで先読みを広げる。すぐに飛ばされる曲の先の
+    曲は解決しない。プレイヤーにストリームプロキシがある場合は、先読みした曲の
+    先頭もプロキシに取得しておく。
+    """
+    
+    def __init__(self, player: MediaPlayer, downloader: YouTubeDownloader,
+                 prefetch_count: int = 3, prefetch_delay: float = 10.0,
+                 cache_prefetched: bool = False):
+        """
+        先読みを初期化
+        
+        Args:
+            player: メディアプレイヤー
+            downloader: ストリームURLの解決に使うダウンローダー
+            prefetch_count: 再生が続いた場合に先読みする曲数
+            prefetch_delay: 先読みを広げるまでの再生継続時間（秒）
+            cache_prefetched: 先読みした曲の音声も音声キャッシュに保存するか
+        """
+        self.player = player
+        self.downloader = downloader
+        self.prefetch_count = prefetch_count
+        self.prefetch_delay = prefetch_delay
+        self.cache_prefetched = cache_prefetched
+        # 解決中の曲 → 解決タスク（同じ曲の解決は1回にまとめる）
+        self._tasks: Dict[VideoInfo, asyncio.Task] = {}
+        self._prefetch_timer: Optional[asyncio.TimerHandle] = None
+        # 曲送りが連続した場合に最後の操作だけを再生するための世代番号
+        self._generation = 0
+        # 解決待ちの再生要求の対象インデックス（連続した曲送りの起点にする）
+        self._target_index: Optional[int] = None
+    
+    def _resolve(self, video: VideoInfo) -> asyncio.Task:
+        """曲の解決タスクを取得（未開始の場合は開始）"""
+        task = self._tasks.get(video)
+        if task is None:
+            task = asyncio.ensure_future(self.downloader.resolve_stream(video))
+            self._tasks[video] = task
+            task.add_done_callback(lambda done: self._forget(video, done))
+        return task
+    
+    def _needs_resolution(self, video: VideoInfo) -> bool:
+        """再生前にストリームURLの解決が必要か（キャッシュ済みの曲・オフラインモードでは不要）"""
+        return video.needs_resolution() and not self.player.is_cached(video) and not self.player.offline
+    
+    def _forget(self, video: VideoInfo, task: asyncio.Task):
+        """完了した解決タスクを登録から外す"""
+        if self._tasks.get(video) is task:
+            del self._tasks[video]
+        if not task.cancelled() and task.exception():
+            print(f"Error resolving stream URL: {task.exception()}")
+    
+    async def ensure_resolved(self, video: VideoInfo) -> bool:
+        """
+        曲のストリームURLが再生可能な状態になるまで待つ
+        
+        Args:
+            video: 対象の曲
+        
+        Returns:
+            再生可能なストリームURLがある場合True
+        """
+        if not self._needs_resolution(video):
+            return True
+        try:
+            return bool(await asyncio.shield(self._resolve(video)))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            return False
+    
+    def upcoming(self, count: int) -> List[VideoInfo]:
+        """
+        再生順（シャッフル・リピートを含む）で次に続く曲を取得
+        
+        まだ何も再生していない場合は現在選択中の曲から数える。
+        
+        Args:
+            count: 取得する曲数
+        
+        Returns:
+            続く曲の一覧（最大 count 曲）
+        """
+        return list(self.player.upcoming(count))
+    
+    def prefetch(self, count: Optional[int] = None) -> int:
+        """
+        続く曲のうち未解決のものの解決と、先頭の先読みを開始（完了は待たない）
+        
+        Args:
+            count: 先読みする曲数（省略時は prefetch_count）
+        
+        Returns:
+            新たに解決を開始した曲数
+        """
+        if count is None:
+            count = self.prefetch_count
+        if self.player.offline:
+            return 0
+        
+        started = 0
+        for video in self.upcoming(count):
+            if not self._needs_resolution(video):
+                self._warm_head(video)
+            elif video not in self._tasks:
+                task = self._resolve(video)
+                task.add_done_callback(lambda done, video=video: self._on_prefetched(video, done))
+                started += 1
+        return started
+    
+    def _on_prefetched(self, video: VideoInfo, task: asyncio.Task):
+        """先読みで解決した曲の先頭を取得し、必要なら音声をキャッシュに保存"""
+        if task.cancelled() or task.exception() or not task.result():
+            return
+        self._warm_head(video)
+        cache = self.player.audio_cache
+        if self.cache_prefetched and cache is not None:
+            cache.schedule_download(video.video_id, video.audio_url)
+    
+    def _warm_head(self, video: VideoInfo):
+        """ストリームプロキシに曲の先頭を先読みさせる（キャッシュ済みの曲は不要）"""
+        proxy = self.player.stream_proxy
+        if proxy is not None and video.audio_url and not self.player.is_cached(video):
+            proxy.prefetch_head(video)
+    
+    def _schedule_prefetch(self):
+        """次の1曲を先読みし、再生が続いた場合の先読みを予約"""
+        self._cancel_timer()
+        self.prefetch(1)
+        if self.prefetch_count > 1:
+            loop = asyncio.get_running_loop()
+            self._prefetch_timer = loop.call_later(self.prefetch_delay, self.prefetch)
+    
+    def _cancel_timer(self):
+        """予約済みの先読みを取り消す"""
+        if self._prefetch_timer:
+            self._prefetch_timer.cancel()
+            self._prefetch_timer = None
+    
+    async def play_index(self, index: int, advance: bool = False) -> bool:
+        """
+        指定した曲をストリームURLを解決してから再生
+        
+        解決待ちの間に別の曲の再生が要求された場合、この要求は破棄される。
+        
+        Args:
+            index: 再生する曲のインデックス
+            advance: 曲送りで求めた先の曲の場合True
+        
+        Returns:
+            再生開始成功時True
+        """
+        playlist = self.player.playlist
+        if not (0 <= index < len(playlist)):
+            return False
+        
+        self._generation += 1
+        generation = self._generation
+        self._target_index = index
+        video = playlist[index]
+        if not self.player.is_available(video):
+            if generation == self._generation:
+                self._target_index = None
+            return False
+        
+        try:
+            resolved = await self.ensure_resolved(video)
+        finally:
+            if generation == self._generation:
+                self._target_index = None
+        if not resolved or generation != self._generation:
+            return False
+        
+        # 解決を待つ間にプレイリストが変更された場合は曲の位置を探し直す
+        playlist = self.player.playlist
+        if index >= len(playlist) or playlist[index] is not video:
+            try:
+                index = playlist.index(video)
+            except ValueError:
+                return False
+        
+        if not self.player.play_index(index, advance):
+            return False
+        self._schedule_prefetch()
+        return True
+    
+    async def play_current(self) -> bool:
+        """
+        現在選択されている曲を再生
+        
+        Returns:
+            再生開始成功時True
+        """
+        return await self.play_index(self.player.current_index)
+    
+    def _base_index(self) -> int:
+        """曲送りの起点（解決待ちの再生要求があればその曲）"""
+        if self._target_index is not None:
+            return self._target_index
+        return self.player.current_index
+    
+    async def next_track(self, auto: bool = False) -> bool:
+        """
+        次の曲を再生（オフラインモードではキャッシュ済みでない曲を飛ばす）
+        
+        Args:
+            auto: 曲の終了による曲送りの場合True（1曲リピートでは同じ曲を再生）
+        
+        Returns:
+            次の曲の再生開始成功時True
+        """
+        index = self.player.next_index(self._base_index(), auto=auto)
+        if index is None:
+            return False
+        return await self.play_index(index, advance=True)
+    
+    async def previous_track(self) -> bool:
+        """
+        前の曲を再生（オフラインモードではキャッシュ済みでない曲を飛ばす）
+        
+        Returns:
+            前の曲の再生開始成功時True
+        """
+        index = self.player.previous_index(self._base_index())
+        if index is None:
+            return False
+        return await self.play_index(index)
+    
+    async def skip(self, count: int) -> bool:
+        """
+        count 曲先（負の値で前）の曲を再生（途中の曲は解決も再生もしない）
+        
+        Args:
+            count: 進む曲数（負の値で戻る）
+        
+        Returns:
+            再生開始成功時True
+        """
+        index = self.player.skip_index(count, self._base_index())
+        if index is None:
+            return False
+        return await self.play_index(index, advance=count > 0)
+    
+    @property
+    def pending(self) -> int:
+        """解決中の曲数"""
+        return len(self._tasks)
+    
+    def stop(self):
+        """予約済みの先読みと解決中のタスクを取り消す"""
+        self._cancel_timer()
+        self._generation += 1
+        self._target_index = None
+        for task in list(self._tasks.values()):
+            task.cancel()
+        self._tasks.clear()
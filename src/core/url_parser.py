@@ -0,0 +1,185 @@
+"""
+YouTube URLの高速パーサー（yt-dlpを使わずに動画ID等を抽出）
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+# スキーム・ホスト・パス・クエリ・フラグメントへの分解
+_URL_PATTERN = re.compile(
+    r'^\s*(?:https?://)?'
+    r'(?P<host>(?:(?:www|m|music)\.)?youtube(?:-nocookie)?\.com|youtu\.be)'
+    r'(?::\d+)?'
+    r'(?P<path>/[^?#\s]*)?'
+    r'(?:\?(?P<query>[^#\s]*))?'
+    r'(?:#(?P<fragment>\S*))?\s*$',
+    re.IGNORECASE,
+)
+# 動画ID（英数字・"_"・"-" の11文字）
+_VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+# プレイリストIDとして許可する文字
+_PLAYLIST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+# /shorts/ID, /embed/ID などパスに動画IDを含む形式
+_PATH_ID_PATTERN = re.compile(r'^/(?:shorts|embed|live|v|e)/([A-Za-z0-9_-]{11})/?$')
+# 開始時間（"90", "90s", "1m30s", "1h2m3s"）
+_TIME_PATTERN = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$')
+# 時刻表記の再生位置（"83", "1:23", "1:02:03", "1:23.456"）
+_CLOCK_PATTERN = re.compile(r'^(?:(?:(\d+):)?(\d+):)?(\d+)(?:\.(\d{1,3}))?$')
+
+
+class ParsedURL:
+    """解析済みのYouTube URL（変更不可）
+    
+    parse_youtube_url は同じURLに同じオブジェクトを返すため、属性は変更できない。
+    """
+    
+    __slots__ = ('video_id', 'playlist_id', 'start_time')
+    
+    def __init__(self, video_id: str = "", playlist_id: str = "",
+                 start_time: Optional[int] = None):
+        """
+        解析結果を初期化
+        
+        Args:
+            video_id: 動画ID（プレイリストのみのURLでは空文字列）
+            playlist_id: プレイリストID
+            start_time: 再生開始位置（秒）
+        """
+        object.__setattr__(self, 'video_id', video_id)
+        object.__setattr__(self, 'playlist_id', playlist_id)
+        object.__setattr__(self, 'start_time', start_time)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("ParsedURL is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError("ParsedURL is immutable")
+    
+    @property
+    def is_playlist(self) -> bool:
+        """動画を含まないプレイリストURLか"""
+        return bool(self.playlist_id) and not self.video_id
+    
+    @property
+    def canonical_url(self) -> str:
+        """正規化したURL（動画URLはwatch形式、プレイリストURLはplaylist形式）"""
+        if self.video_id:
+            return f"https://www.youtube.com/watch?v={self.video_id}"
+        return self.playlist_url
+    
+    @property
+    def playlist_url(self) -> str:
+        """プレイリストページのURL（プレイリストIDがない場合は空文字列）"""
+        if not self.playlist_id:
+            return ""
+        return f"https://www.youtube.com/playlist?list={self.playlist_id}"
+    
+    def __eq__(self, other) -> bool:
+        """解析結果の比較"""
+        if not isinstance(other, ParsedURL):
+            return NotImplemented
+        return (self.video_id, self.playlist_id, self.start_time) == \
+            (other.video_id, other.playlist_id, other.start_time)
+    
+    def __hash__(self) -> int:
+        """ハッシュ値"""
+        return hash((self.video_id, self.playlist_id, self.start_time))
+    
+    def __repr__(self) -> str:
+        """デバッグ用文字列表現"""
+        return (f"ParsedURL(video_id='{self.video_id}', playlist_id='{self.playlist_id}', "
+                f"start_time={self.start_time})")
+
+
+def _parse_time(value: str) -> Optional[int]:
+    """開始時間の文字列を秒に変換"""
+    match = _TIME_PATTERN.match(value)
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def parse_timestamp(text: str) -> Optional[int]:
+    """
+    再生位置の文字列をミリ秒に変換
+    
+    時刻表記（"1:23", "1:02:03", 小数点以下はミリ秒まで）と
+    YouTubeの開始時間の表記（"90s", "1m30s"）に対応する。
+    
+    Args:
+        text: 再生位置の文字列
+    
+    Returns:
+        ミリ秒、解析できない場合はNone
+    """
+    value = text.strip().lower()
+    match = _CLOCK_PATTERN.match(value)
+    if match:
+        hours, minutes, seconds = (int(group) if group else 0 for group in match.groups()[:3])
+        fraction = int((match.group(4) or "").ljust(3, "0"))
+        return ((hours * 60 + minutes) * 60 + seconds) * 1000 + fraction
+    seconds = _parse_time(value)
+    return seconds * 1000 if seconds is not None else None
+
+
+@lru_cache(maxsize=4096)
+def parse_youtube_url(url: str) -> Optional[ParsedURL]:
+    """
+    YouTube URLを解析
+    
+    watch / youtu.be / shorts / embed / live / music.youtube.com / playlist 形式に対応。
+    
+    Args:
+        url: 解析するURL（スキームは省略可）
+    
+    Returns:
+        動画IDまたはプレイリストIDを含むYouTube URLの場合は解析結果、それ以外はNone
+    """
+    if not url:
+        return None
+    
+    match = _URL_PATTERN.match(url)
+    if not match:
+        return None
+    
+    host = match.group('host').lower()
+    path = match.group('path') or '/'
+    video_id = ""
+    playlist_id = ""
+    start_time = None
+    
+    query = match.group('query')
+    if query:
+        for pair in query.split('&'):
+            key, _, value = pair.partition('=')
+            if key == 'v':
+                video_id = value
+            elif key == 'list':
+                playlist_id = value
+            elif key in ('t', 'start'):
+                start_time = _parse_time(value)
+    
+    fragment = match.group('fragment')
+    if fragment and fragment.startswith('t='):
+        start_time = _parse_time(fragment[2:])
+    
+    if host == 'youtu.be':
+        video_id = path.strip('/')
+    elif path not in ('/watch', '/watch/', '/playlist', '/playlist/'):
+        path_match = _PATH_ID_PATTERN.match(path)
+        if not path_match:
+            return None
+        video_id = path_match.group(1)
+    elif path.startswith('/playlist'):
+        video_id = ""
+    
+    if video_id and not _VIDEO_ID_PATTERN.match(video_id):
+        return None
+    if playlist_id and not _PLAYLIST_ID_PATTERN.match(playlist_id):
+        playlist_id = ""
+    if not video_id and not playlist_id:
+        return None
+    
+    return ParsedURL(video_id, playlist_id, start_time)
@@ -3,22 +3,97 @@ YouTube動画情報取得・音声URL抽出
 """
 
 import asyncio
-import yt_dlp
-from typing import Optional
+import concurrent.futures
+import copy
+from typing import Optional, AsyncIterator, Sequence, List, Dict, Any
 from ..models.video_info import VideoInfo
+from .metadata_cache import MetadataCache
+from .extractor_pool import ExtractorPool, compact_info
+from .process_extractor_pool import ProcessExtractorPool
+from .single_flight import SingleFlight
+from .url_parser import parse_youtube_url
+
+
+class BulkResult:
+    """一括取得における1件分の結果"""
+    
+    def __init__(self, index: int, url: str, video: Optional[VideoInfo] = None,
+                 error: str = "", videos: Optional[List[VideoInfo]] = None):
+        """
+        一括取得結果を初期化
+        
+        Args:
+            index: 投入順のインデックス
+            url: 対象のURL
+            video: 取得できた動画情報（失敗時はNone）
+            error: 失敗時のエラーメッセージ
+            videos: プレイリストURLの場合は展開した仮エントリの一覧
+        """
+        self.index = index
+        self.url = url
+        self.video = video
+        self.error = error
+        self.videos = videos or []
+    
+    @property
+    def ok(self) -> bool:
+        """取得に成功したか"""
+        return self.video is not None or bool(self.videos)
+    
+    def __repr__(self) -> str:
+        """デバッグ用文字列表現"""
+        return f"BulkResult(index={self.index}, url='{self.url}', ok={self.ok}, error='{self.error}')"
 
 
 class YouTubeDownloader:
     """YouTube動画情報取得・音声URL抽出"""
     
-    def __init__(self):
-        """YouTubeDownloaderを初期化"""
+    # この秒数以内に失効するストリームURLはキャッシュから返さない
+    STREAM_EXPIRY_MARGIN = 10 * 60
+    
+    # 抽出バックエンド（thread: ワーカースレッド / process: ワーカープロセス）
+    BACKENDS = ("thread", "process")
+    
+    def __init__(self, metadata_cache: Optional[MetadataCache] = None,
+                 bulk_concurrency: int = 4, pool_size: int = 4,
+                 max_queue: int = 32, job_timeout: Optional[float] = 60.0,
+                 backend: str = "thread"):
+        """
+        YouTubeDownloaderを初期化
+        
+        Args:
+            metadata_cache: メタデータキャッシュ（省略時は標準のキャッシュを使用）
+            bulk_concurrency: 一括取得時の同時取得数の上限
+            pool_size: 再利用するyt-dlp抽出器（ワーカースレッド）の数
+            max_queue: 実行待ちにできる抽出ジョブ数の上限
+            job_timeout: 抽出1件あたりのタイムアウト（秒）
+            backend: 抽出バックエンド（"thread" または "process"）
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"不明な抽出バックエンドです: {backend}")
+        
         self.ydl_opts = {
             'format': 'bestaudio/best',
             'noplaylist': True,
             'quiet': True,
             'no_warnings': True,
         }
+        # オフライン再生で曲名などを表示できるよう、TTL経過後もメタデータを保持
+        self.metadata_cache = (
+            metadata_cache if metadata_cache is not None
+            else MetadataCache(stale_ttl=MetadataCache.DEFAULT_STALE_TTL)
+        )
+        self.bulk_concurrency = bulk_concurrency
+        # 抽出器の初期化とHTTPセッションを呼び出し間で使い回す
+        self.backend = backend
+        pool_class = ProcessExtractorPool if backend == "process" else ExtractorPool
+        self.extractor_pool = pool_class(
+            self.ydl_opts, size=pool_size, max_queue=max_queue, job_timeout=job_timeout
+        )
+        # 同じ動画への同時リクエストは1回の抽出にまとめる
+        self._flights = SingleFlight()
+        # オフラインモードではキャッシュだけを参照し、通信しない
+        self.offline = False
     
     def _is_youtube_url(self, url: str) -> bool:
         """
@@ -28,17 +103,31 @@ class YouTubeDownloader:
             url: 判定するURL
             
         Returns:
-            YouTube URLの場合True
+            動画IDまたはプレイリストIDを含むYouTube URLの場合True
         """
-        return 'youtube.com' in url or 'youtu.be' in url
+        return parse_youtube_url(url) is not None
     
-    async def get_video_info(self, url: str) -> Optional[VideoInfo]:
+    def _extract_video_id(self, url: str) -> str:
         """
-        YouTube URLから動画情報を取得
+        URLから動画IDを抽出（キャッシュのキー用）
         
         Args:
             url: YouTube動画のURL
             
+        Returns:
+            動画ID、抽出できない場合は空文字列
+        """
+        parsed = parse_youtube_url(url)
+        return parsed.video_id if parsed else ''
+    
+    async def get_video_info(self, url: str, use_cache: bool = True) -> Optional[VideoInfo]:
+        """
+        YouTube URLから動画情報を取得（オフラインモードではキャッシュのみを参照）
+        
+        Args:
+            url: YouTube動画のURL
+            use_cache: メタデータキャッシュを参照するか
+            
         Returns:
             取得成功時はVideoInfo、失敗時はNone
         """
@@ -50,29 +139,286 @@ class YouTubeDownloader:
         if not self._is_youtube_url(url):
             return None
         
+        video_id = self._extract_video_id(url)
+        if self.offline:
+            return self._get_offline_video_info(url, video_id)
+        if use_cache:
+            cached = self.metadata_cache.get(video_id)
+            if cached and cached.get('audio_url'):
+                video = VideoInfo.from_dict(cached)
+                # 間もなく失効するストリームURLはキャッシュヒットとみなさない
+                if not video.is_stream_expired(margin=self.STREAM_EXPIRY_MARGIN):
+                    video.url = url
+                    return video
+        
+        video = await self._fetch_shared(url, video_id)
+        if video is None:
+            return None
+        
+        # 同じ抽出結果を受け取った呼び出し元ごとに別のインスタンスを返す
+        video = copy.copy(video)
+        video.url = url
+        return video
+    
+    def _get_offline_video_info(self, url: str, video_id: str) -> Optional[VideoInfo]:
+        """
+        オフラインモードでキャッシュから動画情報を取得（ストリームURLの失効は問わない）
+        
+        Args:
+            url: YouTube動画のURL
+            video_id: URLから抽出した動画ID
+            
+        Returns:
+            キャッシュにある場合はVideoInfo、ない場合はNone
+        """
+        cached = self.metadata_cache.get(video_id, allow_stale=True)
+        if not cached:
+            return None
+        video = VideoInfo.from_dict(cached)
+        video.url = url
+        return video
+    
+    async def expand_playlist(self, url: str) -> List[VideoInfo]:
+        """
+        プレイリストの各曲を仮エントリとして展開
+        
+        エントリ一覧の取得（ページ単位の一覧取得のみ）だけを行い、各曲の
+        ストリームURLは解決しない。仮エントリは再生前に resolve_stream で解決する。
+        
+        Args:
+            url: プレイリストのURL
+            
+        Returns:
+            仮エントリの一覧（取得失敗時は空リスト）
+        """
+        parsed = parse_youtube_url((url or "").strip())
+        if self.offline or not parsed or not parsed.playlist_id:
+            return []
+        
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
-                    None, ydl.extract_info, url, False
-                )
-                
-                if not info:
-                    return None
+            entries = await self.extractor_pool.extract_playlist(parsed.playlist_url)
+        except Exception as e:
+            print(f"Error expanding playlist: {e}")
+            return []
+        
+        videos = []
+        for entry in entries:
+            video = VideoInfo(
+                url=f"https://www.youtube.com/watch?v={entry['id']}",
+                title=entry.get('title') or 'Unknown Title',
+                duration=int(entry.get('duration') or 0),
+                channel=entry.get('channel') or 'Unknown Channel',
+                video_id=entry['id']
+            )
+            video.is_placeholder = True
+            videos.append(video)
+        return videos
+    
+    def video_key(self, url: str) -> str:
+        """
+        重複判定用のキーを取得（同じ動画の異なるURL表記は同じキーになる）
+        
+        Args:
+            url: YouTube動画のURL
+            
+        Returns:
+            動画ID、抽出できない場合は前後の空白を除いたURL
+        """
+        url = (url or "").strip()
+        return self._extract_video_id(url) or url
+    
+    async def _fetch_shared(self, url: str, video_id: str) -> Optional[VideoInfo]:
+        """
+        動画IDごとに抽出をまとめて実行（実行中の抽出があればその結果を共有）
+        
+        Args:
+            url: YouTube動画のURL
+            video_id: URLから抽出した動画ID
+            
+        Returns:
+            取得成功時はVideoInfo（呼び出し元間で共有される）、失敗時はNone
+        """
+        return await self._flights.do(
+            video_id or url, lambda: self._fetch_video_info(url, video_id)
+        )
+    
+    async def iter_video_infos(self, urls: Sequence[str],
+                               max_concurrency: Optional[int] = None) -> AsyncIterator[BulkResult]:
+        """
+        複数URLの動画情報を並行して取得し、投入順に結果を返す
+        
+        取得は最大 max_concurrency 件ずつ並行に行い、先頭から順に
+        完了したものをその都度 yield する。プレイリストURLは expand_playlist で
+        仮エントリに展開し、結果の videos に入れる。
+        
+        Args:
+            urls: YouTube動画のURL一覧
+            max_concurrency: 同時取得数の上限（省略時は bulk_concurrency）
+            
+        Yields:
+            各URLの取得結果（投入順）
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.bulk_concurrency))
+        
+        async def fetch(url: str) -> Optional[VideoInfo]:
+            async with semaphore:
+                return await self.get_video_info(url)
+        
+        async def expand(url: str) -> List[VideoInfo]:
+            async with semaphore:
+                return await self.expand_playlist(url)
+        
+        playlists = [bool(parsed and parsed.is_playlist)
+                     for parsed in (parse_youtube_url((url or "").strip()) for url in urls)]
+        tasks = [
+            asyncio.ensure_future(expand(url) if is_playlist else fetch(url))
+            for url, is_playlist in zip(urls, playlists)
+        ]
+        try:
+            for index, (url, task) in enumerate(zip(urls, tasks)):
+                if not self.validate_url(url):
+                    yield BulkResult(index, url, error="無効なYouTube URLです")
+                    continue
                 
-                video = VideoInfo(
-                    url=url,
-                    title=info.get('title', 'Unknown Title'),
-                    duration=info.get('duration', 0),
-                    channel=info.get('uploader', 'Unknown Channel'),
-                    audio_url=info.get('url', '')
-                )
-                video.is_loaded = True
-                return video
+                try:
+                    fetched = await task
+                except Exception as e:
+                    yield BulkResult(index, url, error=str(e) or "不明なエラーが発生しました")
+                    continue
                 
+                if playlists[index]:
+                    if fetched:
+                        yield BulkResult(index, url, videos=fetched)
+                    elif self.offline:
+                        yield BulkResult(index, url, error="オフラインモードではプレイリストを展開できません")
+                    else:
+                        yield BulkResult(index, url, error="プレイリストの取得に失敗しました")
+                elif fetched:
+                    yield BulkResult(index, url, video=fetched)
+                else:
+                    yield BulkResult(index, url, error="動画情報の取得に失敗しました")
+        finally:
+            # 途中で打ち切られた場合は残りの取得をキャンセル
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    async def _fetch_video_info(self, url: str, video_id: str) -> Optional[VideoInfo]:
+        """
+        yt-dlpで動画情報を取得し、メタデータキャッシュを更新
+        
+        Args:
+            url: YouTube動画のURL
+            video_id: URLから抽出した動画ID
+            
+        Returns:
+            取得成功時はVideoInfo、失敗時はNone
+        """
+        try:
+            return self._video_from_info(url, video_id, compact_info(await self.extractor_pool.extract(url)))
         except Exception as e:
             print(f"Error extracting video info: {e}")
             return None
     
+    def _video_from_info(self, url: str, video_id: str,
+                         info: Optional[Dict[str, Any]]) -> Optional[VideoInfo]:
+        """抽出した情報辞書からVideoInfoを作成し、メタデータキャッシュを更新"""
+        if not info:
+            return None
+        
+        video = VideoInfo(
+            url=url,
+            title=info.get('title', 'Unknown Title'),
+            duration=info.get('duration', 0),
+            channel=info.get('uploader', 'Unknown Channel'),
+            audio_url=info.get('url', ''),
+            video_id=info.get('id') or video_id,
+            formats=info.get('formats', [])
+        )
+        video.is_loaded = True
+        
+        if video.audio_url:
+            self.metadata_cache.put(video.video_id, video.to_dict())
+        return video
+    
+    async def resolve_stream(self, video: VideoInfo) -> bool:
+        """
+        ストリームURLを再取得して動画情報を更新（キャッシュは参照しない）
+        
+        Args:
+            video: 更新する動画情報
+            
+        Returns:
+            更新成功時True
+        """
+        if self.offline or not video or not video.url:
+            return False
+        
+        fresh = await self._fetch_shared(video.url, video.video_id or self._extract_video_id(video.url))
+        return self._apply_stream(video, fresh)
+    
+    def resolve_stream_blocking(self, video: VideoInfo, timeout: Optional[float] = None) -> bool:
+        """
+        ストリームURLを再取得して動画情報を更新（呼び出し元のスレッドで完了まで待つ）
+        
+        イベントループを経由しないため、ループの外のスレッド（ストリームプロキシなど）から
+        ループの処理を待たずに呼び出せる。
+        
+        Args:
+            video: 更新する動画情報
+            timeout: 抽出を待つ最大秒数（省略時は完了まで待つ）
+            
+        Returns:
+            更新成功時True
+        """
+        if self.offline or not video or not video.url:
+            return False
+        
+        video_id = video.video_id or self._extract_video_id(video.url)
+        try:
+            future = self.extractor_pool.submit_extract(video.url)
+        except Exception as e:
+            print(f"Error extracting video info: {e}")
+            return False
+        try:
+            fresh = self._video_from_info(video.url, video_id, compact_info(future.result(timeout=timeout)))
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            print(f"Error extracting video info: timed out after {timeout}s")
+            return False
+        except Exception as e:
+            print(f"Error extracting video info: {e}")
+            return False
+        return self._apply_stream(video, fresh)
+    
+    def _apply_stream(self, video: VideoInfo, fresh: Optional[VideoInfo]) -> bool:
+        """再取得した情報で動画情報を更新（取得できなかった場合はFalse）"""
+        if not fresh or not fresh.audio_url:
+            return False
+        
+        video.audio_url = fresh.audio_url
+        video.formats = fresh.formats
+        video.video_id = video.video_id or fresh.video_id
+        # 仮エントリで欠けている項目は取得結果で補う
+        if not video.title:
+            video.title = fresh.title
+        if not video.channel or video.is_placeholder:
+            video.channel = fresh.channel
+        if not video.duration:
+            video.duration = fresh.duration
+        video.is_loaded = True
+        video.is_placeholder = False
+        return True
+    
+    def warm_up(self):
+        """抽出ワーカーを事前に起動（起動直後の初回抽出を速くする）"""
+        self.extractor_pool.warm_up()
+    
+    def close(self):
+        """抽出器プールを停止し（実行中の抽出の完了は待たない）、メタデータキャッシュを書き込む"""
+        self.extractor_pool.close()
+        self.metadata_cache.close()
+    
     def validate_url(self, url: str) -> bool:
         """
         URLの形式を検証
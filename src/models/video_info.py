@@ -2,14 +2,47 @@
 動画情報を管理するデータモデル
 """
 
-from typing import Optional
+import re
+import time
+from typing import Optional, List, Dict, Any
+from urllib.parse import urlparse, parse_qs
+
+# 署名付きストリームURLのパス形式（/videoplayback/expire/1700000000/...）
+_PATH_EXPIRE_PATTERN = re.compile(r'/expire/(\d+)')
+
+
+def parse_stream_expiry(url: str) -> Optional[float]:
+    """
+    署名付きストリームURLから有効期限を取得
+    
+    Args:
+        url: googlevideo等の音声ストリームURL
+        
+    Returns:
+        有効期限（UNIX時刻）、含まれていない場合はNone
+    """
+    if not url:
+        return None
+    
+    try:
+        values = parse_qs(urlparse(url).query).get('expire')
+        if values:
+            return float(values[0])
+        
+        match = _PATH_EXPIRE_PATTERN.search(url)
+        if match:
+            return float(match.group(1))
+    except ValueError:
+        pass
+    return None
 
 
 class VideoInfo:
     """動画情報を管理するクラス"""
     
     def __init__(self, url: str, title: str = "", duration: int = 0, 
-                 channel: str = "", audio_url: str = ""):
+                 channel: str = "", audio_url: str = "", video_id: str = "",
+                 formats: Optional[List[Dict[str, Any]]] = None):
         """
         動画情報を初期化
         
@@ -19,13 +52,70 @@ class VideoInfo:
             duration: 動画の長さ（秒）
             channel: チャンネル名
             audio_url: 音声ストリームのURL
+            video_id: YouTubeの動画ID
+            formats: 利用可能な音声フォーマットの一覧
         """
         self.url = url
         self.title = title
         self.duration = duration
         self.channel = channel
+        # audio_url の設定時に有効期限（expires_at）も更新される
         self.audio_url = audio_url
+        self.video_id = video_id
+        self.formats = formats or []
         self.is_loaded = False
+        # プレイリスト展開で作られた、ストリーム未解決の仮エントリか
+        self.is_placeholder = False
+    
+    @property
+    def audio_url(self) -> str:
+        """音声ストリームのURL"""
+        return self._audio_url
+    
+    @audio_url.setter
+    def audio_url(self, value: str):
+        """音声ストリームのURLを設定し、有効期限を更新"""
+        self._audio_url = value
+        self.expires_at = parse_stream_expiry(value)
+    
+    def seconds_until_expiry(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        ストリームURLが失効するまでの秒数
+        
+        Args:
+            now: 現在時刻（省略時はtime.time()）
+            
+        Returns:
+            残り秒数（失効済みなら負の値）、有効期限が不明な場合はNone
+        """
+        if self.expires_at is None:
+            return None
+        if now is None:
+            now = time.time()
+        return self.expires_at - now
+    
+    def is_stream_expired(self, margin: float = 0.0, now: Optional[float] = None) -> bool:
+        """
+        ストリームURLが失効済み（またはmargin秒以内に失効）かチェック
+        
+        Args:
+            margin: 失効とみなす余裕時間（秒）
+            now: 現在時刻（省略時はtime.time()）
+            
+        Returns:
+            失効済みまたは間もなく失効する場合True
+        """
+        remaining = self.seconds_until_expiry(now)
+        return remaining is not None and remaining <= margin
+    
+    def needs_resolution(self) -> bool:
+        """
+        再生前にストリームURLの取得（再取得）が必要かチェック
+        
+        Returns:
+            ストリームURLが未取得または失効済みの場合True
+        """
+        return not self.audio_url or self.is_stream_expired()
     
     def __str__(self) -> str:
         """文字列表現"""
@@ -58,4 +148,44 @@ class VideoInfo:
         Returns:
             True if valid, False otherwise
         """
-        return bool(self.url and self.title and self.audio_url and self.is_loaded) 
\ No newline at end of file
+        return bool(self.url and self.title and self.audio_url and self.is_loaded) 
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        キャッシュ保存用の辞書に変換
+        
+        Returns:
+            JSONシリアライズ可能な辞書
+        """
+        return {
+            'url': self.url,
+            'title': self.title,
+            'duration': self.duration,
+            'channel': self.channel,
+            'audio_url': self.audio_url,
+            'video_id': self.video_id,
+            'formats': self.formats,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VideoInfo":
+        """
+        辞書からVideoInfoを復元
+        
+        Args:
+            data: to_dict() で作成した辞書
+            
+        Returns:
+            復元されたVideoInfo（is_loaded=True）
+        """
+        video = cls(
+            url=data.get('url', ''),
+            title=data.get('title', ''),
+            duration=data.get('duration', 0),
+            channel=data.get('channel', ''),
+            audio_url=data.get('audio_url', ''),
+            video_id=data.get('video_id', ''),
+            formats=data.get('formats'),
+        )
+        video.is_loaded = True
+        return video
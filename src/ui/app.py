@@ -3,14 +3,21 @@
 """
 
 import asyncio
+import functools
+from typing import List, Optional
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal
 from textual.widgets import Header, Footer, Static
 from textual.binding import Binding
 
 from .widgets import PlaylistWidget, PlayerControlWidget
-from .screens import URLInputScreen, DeleteConfirmScreen
-from ..core import MediaPlayer, YouTubeDownloader
+from .screens import URLInputScreen, DeleteConfirmScreen, SeekInputScreen
+from ..core import (
+    MediaPlayer, YouTubeDownloader, StreamRefresher, TrackPrefetcher, AudioCache,
+    StreamProxy, CommandCoalescer, get_profile, parse_youtube_url
+)
+from ..core.buffering import PROFILES
+from ..models.video_info import VideoInfo
 
 
 class YouTubePlayerApp(App):
@@ -55,23 +62,100 @@ class YouTubePlayerApp(App):
         Binding("p", "previous_track", "前の曲"),
         Binding("left", "seek_backward", "巻き戻し"),
         Binding("right", "seek_forward", "早送り"),
+        Binding("shift+left", "seek_backward_long", "大きく巻き戻し", show=False),
+        Binding("shift+right", "seek_forward_long", "大きく早送り", show=False),
+        Binding("t", "seek_to_timestamp", "時刻へ移動"),
         Binding("d", "delete_current", "削除"),
+        Binding("o", "toggle_offline", "オフライン"),
+        Binding("s", "toggle_shuffle", "シャッフル"),
+        Binding("r", "cycle_repeat", "リピート"),
+        Binding("b", "cycle_buffering", "バッファ設定"),
         Binding("q", "quit", "終了"),
     ]
     
-    def __init__(self):
-        """アプリケーションを初期化"""
+    # プロキシからの再解決要求を待つ最大秒数
+    PROXY_REFRESH_TIMEOUT = 30.0
+    # リピートモードの表示名（'r'キーでこの順に切り替える）
+    REPEAT_LABELS = {
+        MediaPlayer.REPEAT_OFF: "",
+        MediaPlayer.REPEAT_ALL: "全曲リピート",
+        MediaPlayer.REPEAT_ONE: "1曲リピート",
+    }
+    
+    def __init__(self, extractor_backend: str = "thread",
+                 audio_cache_size: int = AudioCache.DEFAULT_MAX_BYTES,
+                 cache_prefetched: bool = False, cache_policy: str = "lru",
+                 stream_proxy: bool = True, offline: bool = False, crossfade: float = 0.0,
+                 shuffle: bool = False, repeat: str = MediaPlayer.REPEAT_OFF,
+                 seek_step: float = 5.0, long_seek_step: float = 60.0,
+                 input_window: float = CommandCoalescer.DEFAULT_WINDOW,
+                 buffering: str = "balanced"):
+        """
+        アプリケーションを初期化
+        
+        Args:
+            extractor_backend: 動画情報の抽出バックエンド（"thread" または "process"）
+            audio_cache_size: 音声キャッシュの容量上限（バイト、0でキャッシュしない）
+            cache_prefetched: 先読みした曲の音声もキャッシュに保存するか
+            cache_policy: 音声キャッシュの削除ポリシー（"lru" / "lfu" / "gdsf"）
+            stream_proxy: ストリームをローカルのプロキシ経由で再生するか
+            offline: オフラインモードで起動するか（キャッシュ済みの曲だけを再生）
+            crossfade: 曲間のクロスフェードの秒数（0-12、0で無効）
+            shuffle: シャッフル再生で起動するか
+            repeat: リピートモード（"off" / "one" / "all"）
+            seek_step: 左右キーでシークする秒数
+            long_seek_step: Shift+左右キーでシークする秒数
+            input_window: 連打した曲送り・シークをまとめる時間（秒、0でまとめない）
+            buffering: ストリーム再生のバッファ設定（"low-latency" / "balanced" / "resilient"）
+        """
         super().__init__()
         self.title = "YouTube Audio Player"
-        self.player = MediaPlayer()
-        self.downloader = YouTubeDownloader()
+        # 再生した音声をローカルに保存し、繰り返し再生時は通信せずに再生
+        self.audio_cache = (
+            AudioCache(max_bytes=audio_cache_size, policy=cache_policy) if audio_cache_size > 0 else None
+        )
+        # 取得済みの範囲をローカルから返し、失効したURLは再解決して中継
+        self.stream_proxy = (
+            StreamProxy(refresh=self._refresh_for_proxy, audio_cache=self.audio_cache)
+            if stream_proxy else None
+        )
+        self.player = MediaPlayer(
+            audio_cache=self.audio_cache, stream_proxy=self.stream_proxy, crossfade=crossfade,
+            buffering_profile=buffering
+        )
+        # ストリーム再生のバッファ設定（キャッシュ済みの曲は常に低遅延）
+        self.buffering_profile = buffering
+        self.downloader = YouTubeDownloader(backend=extractor_backend)
+        # 失効が近いストリームURLをバックグラウンドで再取得
+        self.stream_refresher = StreamRefresher(self.player, self.downloader)
+        # 曲のストリームURLは再生時に解決し、続く曲を先読み
+        self.track_prefetcher = TrackPrefetcher(
+            self.player, self.downloader, cache_prefetched=cache_prefetched
+        )
         self.playlist_widget = None
         self.control_widget = None
+        self.seek_step = seek_step
+        self.long_seek_step = long_seek_step
+        # 連打・長押しした曲送りとシークをまとめ、曲を開くのは1回にする
+        self.input_coalescer = CommandCoalescer(window=input_window)
         
-        # 定期更新タスク
-        self._update_task = None
-        # URL処理中フラグ
+        # 状態変化の反映をイベントループへ依頼済みか（VLCのイベントをまとめて1回で反映）
+        self._state_pending = False
+        # 処理中の動画キー（URL表記によらず動画IDで判定）
         self._processing_urls = set()
+        # 一括追加のバックグラウンドタスク
+        self._bulk_tasks = set()
+        # 解決待ちを含む再生操作のタスク
+        self._playback_tasks = set()
+        # プロキシのスレッドから再解決を依頼するイベントループ
+        self._loop = None
+        self.offline = False
+        if offline:
+            self.set_offline(True)
+        self.shuffle = False
+        if shuffle:
+            self.set_shuffle(True)
+        self.set_repeat(repeat)
     
     def compose(self) -> ComposeResult:
         """アプリケーションの構成"""
@@ -95,19 +179,58 @@ class YouTubePlayerApp(App):
     
     def on_mount(self):
         """アプリケーション起動時の処理"""
-        self._start_update_loop()
+        # 初回の追加を待たせないよう抽出ワーカーを先に起動
+        self.downloader.warm_up()
+        self.stream_refresher.start()
+        # 曲の終了はプレイヤーの所有スレッドで通知されるためイベントループ上で次の曲へ進める
+        # （終了した曲を添えて、反映までに曲送りされた場合は進めない）
+        loop = self._loop = asyncio.get_running_loop()
+        self.player.set_on_track_end_callback(
+            lambda: loop.call_soon_threadsafe(self._on_track_end, self.player.current_video)
+        )
+        # クロスフェードによる曲の切り替えも所有スレッドから通知される
+        self.player.set_on_track_change_callback(
+            lambda: loop.call_soon_threadsafe(self._on_track_changed)
+        )
+        # 再生状態はポーリングせず、VLCのイベントで変化した時だけ表示を更新
+        self.player.set_on_state_change_callback(self._post_state_change)
         self._update_instruction_banner()
     
-    def _start_update_loop(self):
-        """定期更新ループを開始"""
-        self._update_task = asyncio.create_task(self._update_loop())
+    def _refresh_for_proxy(self, video: VideoInfo) -> bool:
+        """
+        プロキシのスレッドからストリームURLを再解決（完了まで待つ）
+        
+        イベントループは経由しない。ループがプレイヤーの操作を待ち、プレイヤーが
+        VLCを待ち、VLCがこのプロキシを待つという待ち合いにならないよう、
+        抽出器へ直接投入してプロキシのスレッドで待つ。
+        
+        Args:
+            video: 上流が失効を返した曲
+            
+        Returns:
+            再解決に成功した場合True
+        """
+        try:
+            return self.downloader.resolve_stream_blocking(video, timeout=self.PROXY_REFRESH_TIMEOUT)
+        except Exception as e:
+            print(f"Error refreshing stream URL: {e}")
+            return False
     
-    async def _update_loop(self):
-        """定期的にプレイヤー状態を更新"""
-        while True:
-            if self.control_widget:
-                self.control_widget.update_display()
-            await asyncio.sleep(0.5)
+    def _post_state_change(self):
+        """プレイヤーの状態変化をイベントループへ渡す（VLCのスレッドから呼ばれる）"""
+        if self._state_pending or self._loop is None:
+            return
+        self._state_pending = True
+        self._loop.call_soon_threadsafe(self._on_player_state_changed)
+    
+    def _on_player_state_changed(self):
+        """プレイヤーの状態変化を表示へ反映"""
+        # 反映中に届いた変化は改めて依頼されるよう、状態を読む前に戻す
+        self._state_pending = False
+        if self.control_widget:
+            self.control_widget.update_display()
+        # 曲の終わりが近づいたら次の曲を開いておく（曲間の無音をなくす）
+        self.player.maybe_preload()
     
     def _update_instruction_banner(self):
         """指示バナーを更新"""
@@ -116,10 +239,17 @@ class YouTubePlayerApp(App):
                 banner = self.query_one("#instruction_banner")
                 playlist_size = self.player.get_playlist_size()
                 
+                modes = [
+                    "オフライン" if self.offline else "",
+                    "シャッフル" if self.shuffle else "",
+                    self.REPEAT_LABELS.get(self.repeat, ""),
+                ]
+                suffix = "".join(f" | {mode}" for mode in modes if mode)
+                
                 if playlist_size == 0:
-                    banner.update("YouTube音楽プレイヤー | 'a'キーでURL追加 | プレイリストが空です")
+                    banner.update(f"YouTube音楽プレイヤー | 'a'キーでURL追加 | プレイリストが空です{suffix}")
                 else:
-                    banner.update(f"YouTube音楽プレイヤー | 'a'キーでURL追加 | {playlist_size}曲がプレイリストにあります")
+                    banner.update(f"YouTube音楽プレイヤー | 'a'キーでURL追加 | {playlist_size}曲がプレイリストにあります{suffix}")
             except:
                 pass
     
@@ -128,16 +258,31 @@ class YouTubePlayerApp(App):
         if not url:
             raise ValueError("URLが入力されていません")
         
-        # 既に処理中のURLかチェック
-        if url in self._processing_urls:
-            raise ValueError("このURLは既に処理中です")
+        # 空白・改行区切りで複数のURLが入力された場合は一括追加
+        urls = url.split()
+        if len(urls) > 1:
+            self.add_urls(urls)
+            return
         
         # URL検証
         if not self.downloader.validate_url(url):
             raise ValueError("無効なYouTube URLです。正しいURLを入力してください")
         
-        # 処理中URLリストに追加
-        self._processing_urls.add(url)
+        # プレイリストURLは仮エントリとして展開
+        parsed = parse_youtube_url(url.strip())
+        if parsed and parsed.is_playlist:
+            await self._add_playlist(url)
+            return
+        
+        # 同じ動画を処理中の場合は取得結果を共有し、重複して追加しない
+        key = self.downloader.video_key(url)
+        if key in self._processing_urls:
+            if not await self.downloader.get_video_info(url):
+                raise ValueError("動画情報の取得に失敗しました。URLを確認してください")
+            return
+        
+        # 処理中リストに追加
+        self._processing_urls.add(key)
         
         try:
             video_info = await self.downloader.get_video_info(url)
@@ -146,6 +291,8 @@ class YouTubePlayerApp(App):
                 self.playlist_widget.update_playlist()
                 self._update_instruction_banner()
                 # 成功メッセージは呼び出し元で表示される
+            elif self.offline:
+                raise ValueError("オフラインモードでは以前に取得した曲のみ追加できます")
             else:
                 raise ValueError("動画情報の取得に失敗しました。URLを確認してください")
         except ValueError:
@@ -155,60 +302,276 @@ class YouTubePlayerApp(App):
             # その他のエラーは詳細メッセージ付きで再スロー
             raise ValueError(f"処理中にエラーが発生しました: {str(e)}")
         finally:
-            # 処理完了後に処理中URLリストから削除
-            self._processing_urls.discard(url)
+            # 処理完了後に処理中リストから削除
+            self._processing_urls.discard(key)
+    
+    async def _add_playlist(self, url: str) -> int:
+        """
+        プレイリストを仮エントリとして一括追加（ストリームURLは再生が近い曲から順に解決）
+        
+        Args:
+            url: プレイリストのURL
+            
+        Returns:
+            追加した曲数
+        """
+        if self.offline:
+            raise ValueError("オフラインモードではプレイリストを展開できません")
+        videos = await self.downloader.expand_playlist(url)
+        added = self.player.add_many(videos)
+        if not added:
+            raise ValueError("プレイリストの取得に失敗しました。URLを確認してください")
+        
+        self.playlist_widget.update_playlist()
+        self._update_instruction_banner()
+        # 最初に再生する曲だけを先に解決しておく
+        self.track_prefetcher.prefetch(1)
+        self.notify(f"✅ プレイリストから{added}曲を追加しました")
+        return added
+    
+    def add_urls(self, urls: List[str]) -> asyncio.Task:
+        """
+        複数URLをバックグラウンドで一括追加
+        
+        Args:
+            urls: 追加するURL一覧
+            
+        Returns:
+            一括追加を実行するタスク
+        """
+        task = asyncio.create_task(self._ingest_urls(urls))
+        self._bulk_tasks.add(task)
+        task.add_done_callback(self._bulk_tasks.discard)
+        return task
+    
+    async def _ingest_urls(self, urls: List[str]) -> int:
+        """
+        複数URLを並行取得し、投入順にプレイリストへ追加（プレイリストURLは仮エントリとして展開）
+        
+        Args:
+            urls: 追加するURL一覧
+            
+        Returns:
+            追加に成功した曲数
+        """
+        self.notify(f"{len(urls)}件のURLを取得しています...")
+        added = 0
+        expanded = 0
+        
+        async for result in self.downloader.iter_video_infos(urls):
+            if result.videos:
+                count = self.player.add_many(result.videos)
+            else:
+                count = 1 if result.ok and self.player.add_to_playlist(result.video) else 0
+            if count:
+                added += count
+                expanded += bool(result.videos)
+                self.playlist_widget.update_playlist()
+                self._update_instruction_banner()
+            else:
+                error = result.error or "プレイリストに追加できませんでした"
+                self.notify(f"❌ {result.url}: {error}", severity="error")
+        
+        if expanded:
+            # 最初に再生する曲だけを先に解決しておく
+            self.track_prefetcher.prefetch(1)
+            self.notify(f"✅ {added}曲を追加しました（プレイリスト{expanded}件を含む）")
+        else:
+            self.notify(f"✅ {added}/{len(urls)}曲を追加しました")
+        return added
     
     def action_add_url(self):
         """URL追加アクション"""
         self.push_screen(URLInputScreen(self._handle_url_input))
     
+    def _start_playback(self, operation) -> asyncio.Task:
+        """
+        ストリームURLの解決を待つ再生操作をバックグラウンドで実行
+        
+        Args:
+            operation: TrackPrefetcherの再生操作のコルーチン
+            
+        Returns:
+            再生操作を実行するタスク
+        """
+        task = asyncio.create_task(self._run_playback(operation))
+        self._playback_tasks.add(task)
+        task.add_done_callback(self._playback_tasks.discard)
+        return task
+    
+    async def _run_playback(self, operation) -> bool:
+        """再生操作の完了後にプレイリスト表示を更新"""
+        if not await operation:
+            return False
+        if self.playlist_widget:
+            self.playlist_widget.update_playlist()
+        return True
+    
+    def _on_track_end(self, ended: Optional[VideoInfo] = None):
+        """曲の終了時に次の曲へ進む（終了した曲から既に曲送りされていれば何もしない）"""
+        if ended is not None and ended is not self.player.current_video:
+            return
+        self._start_playback(self.track_prefetcher.next_track(auto=True))
+    
+    def _on_track_changed(self):
+        """クロスフェードで次の曲に切り替わった時に表示を更新し、続く曲を先読み"""
+        if self.playlist_widget:
+            self.playlist_widget.update_playlist()
+        self.track_prefetcher.prefetch()
+    
     def action_play_pause(self):
         """再生/一時停止"""
         if self.player.is_playing:
             self.player.pause()
+        elif not self.player.get_current_video():
+            # 未解決の曲は解決してから再生（表示は再生開始後に更新）
+            self._start_playback(self.track_prefetcher.play_current())
+            return
         else:
-            if not self.player.get_current_video():
-                self.player.play_current()
-            else:
-                self.player.pause()
+            self.player.pause()
         self.playlist_widget.update_playlist()
     
     def action_next_track(self):
-        """次の曲"""
-        if self.player.next_track():
-            self.playlist_widget.update_playlist()
+        """次の曲（連打した分はまとめて曲を飛ばす）"""
+        self.input_coalescer.submit("skip", 1, self._skip_tracks)
     
     def action_previous_track(self):
-        """前の曲"""
-        if self.player.previous_track():
+        """前の曲（連打した分はまとめて曲を戻る）"""
+        self.input_coalescer.submit("skip", -1, self._skip_tracks)
+    
+    def _skip_tracks(self, count: int) -> asyncio.Task:
+        """まとめた曲送りを実行"""
+        return self._start_playback(self.track_prefetcher.skip(count))
+    
+    def set_offline(self, offline: bool):
+        """
+        オフラインモードを切り替える
+        
+        オフラインモードでは通信せず、メタデータはキャッシュから、音声は
+        キャッシュ済みのファイルから再生する。キャッシュされていない曲は飛ばす。
+        
+        Args:
+            offline: オフラインモードにする場合True
+        """
+        self.offline = offline
+        self.player.offline = offline
+        self.downloader.offline = offline
+        if offline:
+            # 通信を伴う解決・先読みを取り消す
+            self.track_prefetcher.stop()
+        if self.playlist_widget:
             self.playlist_widget.update_playlist()
+        self._update_instruction_banner()
+    
+    def action_toggle_offline(self):
+        """オフラインモードの切り替え"""
+        self.set_offline(not self.offline)
+        if self.offline:
+            self.notify("📴 オフラインモード: キャッシュ済みの曲のみ再生します")
+        else:
+            self.notify("📶 オンラインモードに戻りました")
+    
+    def set_shuffle(self, enabled: bool):
+        """
+        シャッフル再生を切り替える
+        
+        Args:
+            enabled: シャッフル再生にする場合True
+        """
+        self.shuffle = enabled
+        self.player.set_shuffle(enabled)
+        # 続く曲が変わるため先読みし直す
+        if self.player.get_current_video() is not None:
+            self.track_prefetcher.prefetch(1)
+        self._update_instruction_banner()
+    
+    def action_toggle_shuffle(self):
+        """シャッフル再生の切り替え"""
+        self.set_shuffle(not self.shuffle)
+        self.notify("🔀 シャッフル再生" if self.shuffle else "➡️ 順番に再生")
+    
+    def set_repeat(self, mode: str):
+        """
+        リピートモードを設定
+        
+        Args:
+            mode: リピートモード（"off" / "one" / "all"）
+        
+        Raises:
+            ValueError: 不明なモードの場合
+        """
+        self.player.set_repeat(mode)
+        self.repeat = mode
+        self._update_instruction_banner()
+    
+    def action_cycle_repeat(self):
+        """リピートモードを オフ → 全曲 → 1曲 の順に切り替え"""
+        modes = list(self.REPEAT_LABELS)
+        self.set_repeat(modes[(modes.index(self.repeat) + 1) % len(modes)])
+        self.notify(f"🔁 {self.REPEAT_LABELS[self.repeat] or 'リピートなし'}")
+    
+    def action_cycle_buffering(self):
+        """ストリーム再生のバッファ設定を 低遅延 → 標準 → 安定重視 の順に切り替え"""
+        names = list(PROFILES)
+        name = names[(names.index(self.buffering_profile) + 1) % len(names)]
+        self.player.set_buffering_profile(name)
+        self.buffering_profile = name
+        self.notify(f"📶 バッファ設定: {get_profile(name).label}（次に開く曲から反映）")
     
     def action_seek_forward(self):
-        """早送り"""
-        position = self.player.get_position()
-        self.player.set_position(min(1.0, position + 0.05))
+        """早送り（seek_step 秒、連打した分はまとめてシーク）"""
+        self.input_coalescer.submit("seek", self.seek_step, self.player.seek_relative)
     
     def action_seek_backward(self):
-        """巻き戻し"""
-        position = self.player.get_position()
-        self.player.set_position(max(0.0, position - 0.05))
+        """巻き戻し（seek_step 秒、連打した分はまとめてシーク）"""
+        self.input_coalescer.submit("seek", -self.seek_step, self.player.seek_relative)
+    
+    def action_seek_forward_long(self):
+        """大きく早送り（long_seek_step 秒）"""
+        self.input_coalescer.submit("seek", self.long_seek_step, self.player.seek_relative)
+    
+    def action_seek_backward_long(self):
+        """大きく巻き戻し（long_seek_step 秒）"""
+        self.input_coalescer.submit("seek", -self.long_seek_step, self.player.seek_relative)
+    
+    def action_seek_to_timestamp(self):
+        """再生位置を入力して移動"""
+        if self.player.get_current_video() is not None:
+            self.push_screen(SeekInputScreen(self.player.seek_to))
     
     def action_delete_current(self):
         """現在の曲を削除"""
         if (self.player.playlist and 
             self.player.current_index < len(self.player.playlist)):
             video = self.player.playlist[self.player.current_index]
-            self.push_screen(DeleteConfirmScreen(video.title, self._handle_delete_confirmation))
+            # 確認中に曲が進んでも、確認した曲を削除する
+            self.push_screen(DeleteConfirmScreen(
+                video.title, functools.partial(self._handle_delete_confirmation, video=video)
+            ))
     
-    async def _handle_delete_confirmation(self, confirmed: bool):
-        """削除確認のコールバック"""
+    async def _handle_delete_confirmation(self, confirmed: bool, video: Optional[VideoInfo] = None):
+        """削除確認のコールバック（曲の指定がなければ現在の曲を削除）"""
         if confirmed:
-            if self.player.remove_from_playlist(self.player.current_index):
+            if video is not None:
+                removed = self.player.remove_video(video)
+            else:
+                removed = self.player.remove_from_playlist(self.player.current_index)
+            if removed:
                 self.playlist_widget.update_playlist()
                 self._update_instruction_banner()
     
     async def on_unmount(self):
         """アプリケーション終了時の処理"""
-        if self._update_task:
-            self._update_task.cancel()
-        self.player.stop() 
\ No newline at end of file
+        self.input_coalescer.cancel()
+        for task in list(self._bulk_tasks | self._playback_tasks):
+            task.cancel()
+        self.stream_refresher.stop()
+        self.track_prefetcher.stop()
+        # 抽出中のジョブがあっても終了を待たせない
+        self.downloader.close()
+        if self.audio_cache is not None:
+            self.audio_cache.close()
+        self.player.stop()
+        self.player.close()
+        if self.stream_proxy is not None:
+            self.stream_proxy.stop() 
\ No newline at end of file
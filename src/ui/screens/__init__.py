@@ -4,5 +4,6 @@
 
 from .url_input_screen import URLInputScreen
 from .delete_confirm_screen import DeleteConfirmScreen
+from .seek_input_screen import SeekInputScreen
 
-__all__ = ["URLInputScreen", "DeleteConfirmScreen"] 
\ No newline at end of file
+__all__ = ["URLInputScreen", "DeleteConfirmScreen", "SeekInputScreen"] 
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+再生位置入力用のモーダルスクリーン
+"""
+
+from typing import Callable, Optional
+from textual.screen import ModalScreen
+from textual.containers import Container
+from textual.widgets import Input, Static
+from textual.app import ComposeResult
+
+from ...core.url_parser import parse_timestamp
+
+
+class SeekInputScreen(ModalScreen):
+    """再生位置入力用のモーダルスクリーン"""
+    
+    CSS = """
+    SeekInputScreen {
+        align: center middle;
+    }
+    
+    #seek_input_dialog {
+        width: 50%;
+        height: 11;
+        border: thick $primary 80%;
+        background: $surface;
+        padding: 1;
+    }
+    
+    #seek_title {
+        text-align: center;
+        color: $text;
+    }
+    
+    #seek_input_field {
+        width: 1fr;
+        margin: 1 0 0 0;
+    }
+    
+    #seek_status {
+        text-align: center;
+        height: 1;
+        color: $error;
+    }
+    """
+    
+    def __init__(self, callback: Callable[[int], None]):
+        """
+        再生位置入力スクリーンを初期化
+        
+        Args:
+            callback: 入力した再生位置（ミリ秒）を受け取るコールバック関数
+        """
+        super().__init__()
+        self.callback = callback
+        self._status_area: Optional[Static] = None
+    
+    def compose(self) -> ComposeResult:
+        """スクリーンの構成"""
+        with Container(id="seek_input_dialog"):
+            yield Static("移動先の再生位置を入力してください（例: 1:23, 1:02:03, 90s）:", id="seek_title")
+            yield Input(placeholder="1:23", id="seek_input_field")
+            self._status_area = Static("", id="seek_status")
+            yield self._status_area
+    
+    def on_mount(self):
+        """モーダル表示時にフォーカス設定"""
+        self.query_one("#seek_input_field", Input).focus()
+    
+    def on_input_submitted(self, event: Input.Submitted):
+        """Enter キー押下時の処理"""
+        time_ms = parse_timestamp(event.value)
+        if time_ms is None:
+            if self._status_area:
+                self._status_area.update("再生位置の形式が正しくありません")
+            return
+        self.callback(time_ms)
+        self.dismiss()
+    
+    def on_key(self, event):
+        """キー操作"""
+        if event.key == "escape":
+            self.dismiss()
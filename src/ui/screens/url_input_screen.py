@@ -91,7 +91,7 @@ class URLInputScreen(ModalScreen):
     def compose(self) -> ComposeResult:
         """スクリーンの構成"""
         with Container(id="url_input_dialog"):
-            yield Static("YouTube URLを入力してください:", id="title")
+            yield Static("YouTube URLを入力してください（空白区切りで複数指定可）:", id="title")
             self._url_input = Input(
                 placeholder="https://www.youtube.com/watch?v=...",
                 id="url_input_field"
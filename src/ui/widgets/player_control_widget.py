@@ -11,7 +11,11 @@ from ...core.media_player import MediaPlayer
 
 
 class PlayerControlWidget(Container):
-    """プレイヤーコントロールウィジェット"""
+    """プレイヤーコントロールウィジェット
+    
+    プレイヤーの状態変化の通知ごとに update_display を呼び出す。
+    表示する内容（秒単位の再生位置など）が前回と同じ場合は再描画しない。
+    """
     
     def __init__(self, player: MediaPlayer):
         """
@@ -26,6 +30,8 @@ class PlayerControlWidget(Container):
         self.time_label = Static("00:00 / 00:00")
         self.remaining_label = Static("残り: --:--")
         self.status_label = Static("停止中")
+        # 前回表示した状態
+        self._rendered_state = None
         
     def compose(self) -> ComposeResult:
         """ウィジェットの構成"""
@@ -38,18 +44,26 @@ class PlayerControlWidget(Container):
             yield self.remaining_label
     
     def update_display(self):
-        """表示を更新"""
+        """表示を更新（表示する内容が前回から変わっていなければ何もしない）"""
         current_video = self.player.get_current_video()
+        current_time = self.player.time_ms // 1000
+        total_time = self.player.length_ms // 1000
+        buffering = int(self.player.buffering)
+        state = (current_video, self.player.is_playing, current_time, total_time,
+                 buffering, self.player.last_error)
+        if state == self._rendered_state:
+            return
+        self._rendered_state = state
         
         if current_video and self.player.is_playing:
             # タイトルを短縮表示
             title = current_video.title
             if len(title) > 30:
                 title = title[:27] + "..."
-            self.status_label.update(f"🎵 [bold]{title}[/bold]")
-            
-            current_time = self.player.get_time() // 1000
-            total_time = self.player.get_length() // 1000
+            if buffering < 100:
+                self.status_label.update(f"🎵 [bold]{title}[/bold] [dim](バッファ中 {buffering}%)[/dim]")
+            else:
+                self.status_label.update(f"🎵 [bold]{title}[/bold]")
             
             if total_time > 0:
                 # 進行率計算
@@ -69,7 +83,9 @@ class PlayerControlWidget(Container):
                 self._reset_display()
         else:
             # 停止中または曲なし
-            if current_video:
+            if current_video and self.player.last_error:
+                self.status_label.update(f"⚠️  [red]{self.player.last_error}[/red]")
+            elif current_video:
                 # 一時停止中
                 title = current_video.title
                 if len(title) > 30:
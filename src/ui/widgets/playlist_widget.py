@@ -30,15 +30,18 @@ class PlaylistWidget(ListView):
             self.append(empty_item)
             return
         
+        # current_index はプレイリスト内の位置を探すため、行ごとには呼ばない
+        current = self.player.current_index
         for i, video in enumerate(self.player.playlist):
             # 現在再生中の曲にマークを付ける
-            prefix = "▶ " if i == self.player.current_index else "  "
+            prefix = "▶ " if i == current else "  "
             
             # 時間表示
             duration_str = video.format_duration()
             
             # アイテムテキスト作成
             item_text = f"{prefix}{video.title} - {video.channel} [{duration_str}]"
+            available = self.player.is_available(video)
             
             # 長すぎる場合は短縮
             if len(item_text) > 80:
@@ -48,6 +51,10 @@ class PlaylistWidget(ListView):
                     short_title = video.title[:max_title_len - 3] + "..."
                     item_text = f"{prefix}{short_title} - {video.channel} [{duration_str}]"
             
+            # オフラインモードで再生できない曲は薄く表示
+            if not available:
+                item_text = f"[dim]{item_text} (未キャッシュ)[/dim]"
+            
             self.append(ListItem(Label(item_text)))
     
     def get_selected_index(self) -> int:
@@ -2,9 +2,21 @@
 pytest設定ファイル
 """
 
+import threading
 import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, MagicMock
+from src.core.media_player import MediaPlayer
 from src.models.video_info import VideoInfo
+from src.core.paths import CACHE_DIR_ENV
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """キャッシュの保存先をテストごとの一時ディレクトリに切り替える"""
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_DIR_ENV, str(cache_dir))
+    return cache_dir
 
 
 @pytest.fixture
@@ -21,6 +33,89 @@ def sample_video_info():
     return video
 
 
+@pytest.fixture
+def make_player():
+    """曲 t0, t1, ... を並べたプレイリストを持つMediaPlayerを作成する関数
+    
+    VLCはテスト側で patch('src.core.media_player.vlc') しておく。
+    placeholder=True の場合はストリームURLが未解決の仮エントリを並べる。
+    """
+    def make(count: int, placeholder: bool = False) -> MediaPlayer:
+        player = MediaPlayer()
+        for i in range(count):
+            if placeholder:
+                video = VideoInfo(f"https://youtu.be/t{i}", f"t{i}", video_id=f"t{i}")
+                video.is_placeholder = True
+            else:
+                video = VideoInfo(f"https://youtu.be/t{i}", f"t{i}",
+                                  audio_url=f"https://example.com/t{i}.mp3", video_id=f"t{i}")
+                video.is_loaded = True
+            player.add_to_playlist(video)
+        return player
+    return make
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """サーバーの body を配信するテスト用ハンドラ
+    
+    /ranged はRangeリクエストに対応し、/audio はRangeを無視して全体を返す。
+    /expired は403を返す。受け付けたRangeヘッダーを server.ranges に記録し、
+    server.fail_from 以降の範囲には500を返す。
+    """
+    
+    def do_GET(self):
+        if self.path == "/expired":
+            self.send_error(403)
+            return
+        if self.path == "/ranged" and self.headers.get("Range"):
+            self._send_range(self.headers["Range"])
+            return
+        if self.path not in ("/audio", "/ranged"):
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+    
+    def _send_range(self, header: str):
+        body = self.server.body
+        self.server.ranges.append(header)
+        start, _, end = header[len("bytes="):].partition("-")
+        start = int(start or 0)
+        end = int(end) if end else len(body) - 1
+        if self.server.fail_from is not None and start >= self.server.fail_from:
+            self.send_error(500)
+            return
+        data = body[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{start + len(data) - 1}/{len(body)}")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def range_server():
+    """音声を配信するローカルHTTPサーバー
+    
+    body（配信するデータ）と fail_from はテスト側で変更できる。url はサーバーのベースURL。
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    server.body = bytes(range(256)) * 40
+    server.ranges = []
+    server.fail_from = None
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 @pytest.fixture
 def mock_vlc_instance():
     """VLCインスタンスのモックを作成"""
@@ -4,6 +4,7 @@
 
 import pytest
 import asyncio
+import threading
 from unittest.mock import Mock, patch, AsyncMock
 from src.ui.app import YouTubePlayerApp
 from src.models.video_info import VideoInfo
@@ -107,23 +108,46 @@ class TestYouTubePlayerAppIntegration:
     @patch('src.ui.app.MediaPlayer')
     @patch('src.ui.app.YouTubeDownloader')
     async def test_handle_url_input_duplicate_processing(self, mock_downloader_class, mock_player_class):
-        """重複処理防止のテスト"""
+        """処理中の動画と同じ動画のURLは結果を共有し、重複追加しないテスト"""
         app = YouTubePlayerApp()
         
-        url = "https://www.youtube.com/watch?v=test"
+        url = "https://youtu.be/test?t=10"
         
-        # 既に処理中URLリストに追加
-        app._processing_urls.add(url)
+        # 同じ動画IDが既に処理中
+        app._processing_urls.add("test")
         
         # モックダウンローダーの設定
         mock_downloader = Mock()
+        mock_downloader.validate_url.return_value = True
+        mock_downloader.video_key.return_value = "test"
+        mock_downloader.get_video_info = AsyncMock(return_value=Mock())
         app.downloader = mock_downloader
+        app.player = Mock()
         
-        with pytest.raises(ValueError, match="このURLは既に処理中です"):
-            await app._handle_url_input(url)
+        # エラーにならないことを確認
+        await app._handle_url_input(url)
         
-        # validate_urlが呼ばれないことを確認（重複処理が防止される）
-        mock_downloader.validate_url.assert_not_called()
+        # 取得は共有され、プレイリストへの追加は先行する処理に任せる
+        mock_downloader.get_video_info.assert_called_once_with(url)
+        app.player.add_to_playlist.assert_not_called()
+        assert "test" in app._processing_urls
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_handle_url_input_duplicate_processing_failure(self, mock_downloader_class, mock_player_class):
+        """共有した取得が失敗した場合のテスト"""
+        app = YouTubePlayerApp()
+        app._processing_urls.add("test")
+        
+        mock_downloader = Mock()
+        mock_downloader.validate_url.return_value = True
+        mock_downloader.video_key.return_value = "test"
+        mock_downloader.get_video_info = AsyncMock(return_value=None)
+        app.downloader = mock_downloader
+        
+        with pytest.raises(ValueError, match="動画情報の取得に失敗しました"):
+            await app._handle_url_input("https://www.youtube.com/watch?v=test")
     
     @pytest.mark.asyncio
     @patch('src.ui.app.MediaPlayer')
@@ -147,6 +171,7 @@ class TestYouTubePlayerAppIntegration:
         # モックダウンローダーの設定
         mock_downloader = Mock()
         mock_downloader.validate_url.return_value = True
+        mock_downloader.video_key.return_value = "test"
         mock_downloader.get_video_info = AsyncMock(return_value=mock_video_info)
         app.downloader = mock_downloader
         
@@ -175,7 +200,7 @@ class TestYouTubePlayerAppIntegration:
         # バナーが更新されることを確認
         app._update_instruction_banner.assert_called_once()
         # 処理完了後にURLが処理中リストから削除されることを確認
-        assert url not in app._processing_urls
+        assert "test" not in app._processing_urls
     
     @pytest.mark.asyncio
     @patch('src.ui.app.MediaPlayer')
@@ -189,6 +214,7 @@ class TestYouTubePlayerAppIntegration:
         # モックダウンローダーの設定（None を返す）
         mock_downloader = Mock()
         mock_downloader.validate_url.return_value = True
+        mock_downloader.video_key.return_value = "test"
         mock_downloader.get_video_info = AsyncMock(return_value=None)
         app.downloader = mock_downloader
         
@@ -199,7 +225,7 @@ class TestYouTubePlayerAppIntegration:
             await app._handle_url_input(url)
         
         # 処理完了後にURLが処理中リストから削除されることを確認
-        assert url not in app._processing_urls
+        assert "test" not in app._processing_urls
     
     @pytest.mark.asyncio
     @patch('src.ui.app.MediaPlayer')
@@ -213,6 +239,7 @@ class TestYouTubePlayerAppIntegration:
         # モックダウンローダーの設定（例外を発生させる）
         mock_downloader = Mock()
         mock_downloader.validate_url.return_value = True
+        mock_downloader.video_key.return_value = "test"
         mock_downloader.get_video_info = AsyncMock(side_effect=Exception("Test error"))
         app.downloader = mock_downloader
         
@@ -223,7 +250,130 @@ class TestYouTubePlayerAppIntegration:
             await app._handle_url_input(url)
         
         # 処理完了後にURLが処理中リストから削除されることを確認
-        assert url not in app._processing_urls
+        assert "test" not in app._processing_urls
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_handle_url_input_playlist(self, mock_downloader_class, mock_player_class):
+        """プレイリストURLが仮エントリとして展開・追加されるテスト"""
+        app = YouTubePlayerApp()
+        url = "https://www.youtube.com/playlist?list=PLabc"
+        placeholders = [VideoInfo(f"https://www.youtube.com/watch?v=v{i}", f"Track {i}") for i in range(3)]
+        
+        app.downloader = Mock()
+        app.downloader.validate_url.return_value = True
+        app.downloader.expand_playlist = AsyncMock(return_value=placeholders)
+        app.downloader.get_video_info = AsyncMock()
+        app.player = Mock()
+        app.player.add_many.return_value = 3
+        app.playlist_widget = Mock()
+        app._update_instruction_banner = Mock()
+        app.track_prefetcher = Mock()
+        app.notify = Mock()
+        
+        await app._handle_url_input(url)
+        
+        app.downloader.expand_playlist.assert_called_once_with(url)
+        app.downloader.get_video_info.assert_not_called()
+        app.player.add_many.assert_called_once_with(placeholders)
+        app.playlist_widget.update_playlist.assert_called_once()
+        app.track_prefetcher.prefetch.assert_called_once_with(1)
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_handle_url_input_empty_playlist(self, mock_downloader_class, mock_player_class):
+        """プレイリストの展開に失敗した場合のテスト"""
+        app = YouTubePlayerApp()
+        app.downloader = Mock()
+        app.downloader.validate_url.return_value = True
+        app.downloader.expand_playlist = AsyncMock(return_value=[])
+        app.player = Mock()
+        app.player.add_many.return_value = 0
+        
+        with pytest.raises(ValueError, match="プレイリストの取得に失敗しました"):
+            await app._handle_url_input("https://www.youtube.com/playlist?list=PLabc")
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_handle_url_input_multiple_urls(self, mock_downloader_class, mock_player_class):
+        """複数URL入力時に一括追加が開始されるテスト"""
+        app = YouTubePlayerApp()
+        app.add_urls = Mock()
+        
+        await app._handle_url_input("https://youtu.be/a https://youtu.be/b\nhttps://youtu.be/c")
+        
+        app.add_urls.assert_called_once_with(
+            ["https://youtu.be/a", "https://youtu.be/b", "https://youtu.be/c"]
+        )
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_ingest_urls_adds_in_order_and_reports_failures(self, mock_downloader_class, mock_player_class):
+        """一括追加で成功分が順に追加され、失敗分が通知されるテスト"""
+        from src.core.youtube_downloader import BulkResult
+        
+        app = YouTubePlayerApp()
+        first = VideoInfo("https://youtu.be/a", "A", audio_url="https://example.com/a.mp3")
+        second = VideoInfo("https://youtu.be/c", "C", audio_url="https://example.com/c.mp3")
+        
+        async def fake_iter(urls):
+            yield BulkResult(0, urls[0], video=first)
+            yield BulkResult(1, urls[1], error="動画情報の取得に失敗しました")
+            yield BulkResult(2, urls[2], video=second)
+        
+        app.downloader = Mock()
+        app.downloader.iter_video_infos = fake_iter
+        app.player = Mock()
+        app.player.add_to_playlist.return_value = True
+        app.playlist_widget = Mock()
+        app._update_instruction_banner = Mock()
+        app.notify = Mock()
+        
+        added = await app._ingest_urls(["https://youtu.be/a", "https://youtu.be/b", "https://youtu.be/c"])
+        
+        assert added == 2
+        assert [c.args[0] for c in app.player.add_to_playlist.call_args_list] == [first, second]
+        assert app.playlist_widget.update_playlist.call_count == 2
+        messages = [c.args[0] for c in app.notify.call_args_list]
+        assert "❌ https://youtu.be/b: 動画情報の取得に失敗しました" in messages
+        assert messages[-1] == "✅ 2/3曲を追加しました"
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_ingest_urls_expands_playlists(self, mock_downloader_class, mock_player_class):
+        """一括追加でプレイリストURLの仮エントリがまとめて追加されるテスト"""
+        from src.core.youtube_downloader import BulkResult
+        
+        app = YouTubePlayerApp()
+        single = VideoInfo("https://youtu.be/a", "A", audio_url="https://example.com/a.mp3")
+        placeholders = [VideoInfo(f"https://www.youtube.com/watch?v=v{i}", f"Track {i}") for i in range(3)]
+        
+        async def fake_iter(urls):
+            yield BulkResult(0, urls[0], video=single)
+            yield BulkResult(1, urls[1], videos=placeholders)
+        
+        app.downloader = Mock()
+        app.downloader.iter_video_infos = fake_iter
+        app.player = Mock()
+        app.player.add_to_playlist.return_value = True
+        app.player.add_many.return_value = 3
+        app.playlist_widget = Mock()
+        app.track_prefetcher = Mock()
+        app._update_instruction_banner = Mock()
+        app.notify = Mock()
+        
+        added = await app._ingest_urls(["https://youtu.be/a", "https://www.youtube.com/playlist?list=PLabc"])
+        
+        assert added == 4
+        app.player.add_to_playlist.assert_called_once_with(single)
+        app.player.add_many.assert_called_once_with(placeholders)
+        app.track_prefetcher.prefetch.assert_called_once_with(1)
+        assert app.notify.call_args_list[-1].args[0] == "✅ 4曲を追加しました（プレイリスト1件を含む）"
     
     @patch('src.ui.app.MediaPlayer')
     @patch('src.ui.app.YouTubeDownloader')
@@ -244,9 +394,10 @@ class TestYouTubePlayerAppIntegration:
         # コールバックが設定されていることを確認
         assert hasattr(args[0], 'callback')
     
+    @pytest.mark.asyncio
     @patch('src.ui.app.MediaPlayer')
     @patch('src.ui.app.YouTubeDownloader')
-    def test_action_play_pause_not_playing(self, mock_downloader_class, mock_player_class):
+    async def test_action_play_pause_not_playing(self, mock_downloader_class, mock_player_class):
         """再生/一時停止アクション（停止中）のテスト"""
         app = YouTubePlayerApp()
         
@@ -256,17 +407,61 @@ class TestYouTubePlayerAppIntegration:
         mock_player.get_current_video.return_value = None
         app.player = mock_player
         
+        # 再生時の解決はTrackPrefetcherが行う
+        app.track_prefetcher = Mock()
+        app.track_prefetcher.play_current = AsyncMock(return_value=True)
+        
         # モックプレイリストウィジェットの設定
         mock_playlist_widget = Mock()
         app.playlist_widget = mock_playlist_widget
         
         app.action_play_pause()
+        await asyncio.gather(*app._playback_tasks)
         
         # play_currentが呼ばれることを確認
-        mock_player.play_current.assert_called_once()
+        app.track_prefetcher.play_current.assert_awaited_once()
         # プレイリストウィジェットが更新されることを確認
         mock_playlist_widget.update_playlist.assert_called_once()
     
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_action_next_track_and_track_end(self, mock_downloader_class, mock_player_class):
+        """曲送り・曲の終了で解決を待つ再生操作が実行されるテスト"""
+        app = YouTubePlayerApp()
+        app.track_prefetcher = Mock()
+        app.track_prefetcher.skip = AsyncMock(return_value=True)
+        app.track_prefetcher.next_track = AsyncMock(return_value=False)
+        app.playlist_widget = Mock()
+        
+        app.action_next_track()
+        app.input_coalescer.flush()
+        app._on_track_end()
+        await asyncio.gather(*app._playback_tasks)
+        
+        app.track_prefetcher.skip.assert_awaited_once_with(1)
+        app.track_prefetcher.next_track.assert_awaited_once_with(auto=True)
+        # 再生に成功した操作だけ表示を更新
+        app.playlist_widget.update_playlist.assert_called_once()
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_track_end_after_skip_ignored(self, mock_downloader_class, mock_player_class):
+        """終了した曲から既に曲送りされている場合は次の曲へ進まないテスト"""
+        app = YouTubePlayerApp()
+        app.track_prefetcher = Mock()
+        app.track_prefetcher.next_track = AsyncMock(return_value=True)
+        ended, current = Mock(), Mock()
+        app.player.current_video = current
+        
+        app._on_track_end(ended)
+        assert not app._playback_tasks
+        
+        app._on_track_end(current)
+        await asyncio.gather(*app._playback_tasks)
+        app.track_prefetcher.next_track.assert_awaited_once()
+    
     @patch('src.ui.app.MediaPlayer')
     @patch('src.ui.app.YouTubeDownloader')
     def test_action_play_pause_playing(self, mock_downloader_class, mock_player_class):
@@ -335,39 +530,182 @@ class TestYouTubePlayerAppIntegration:
         mock_player.remove_from_playlist.assert_not_called()
     
     @pytest.mark.asyncio
-    @patch('src.ui.app.asyncio.create_task')
     @patch('src.ui.app.MediaPlayer')
     @patch('src.ui.app.YouTubeDownloader')
-    async def test_start_update_loop(self, mock_downloader_class, mock_player_class, mock_create_task):
-        """更新ループ開始のテスト"""
+    async def test_on_unmount_shuts_down_background_work(self, mock_downloader_class, mock_player_class):
+        """終了時に抽出エグゼキュータとバックグラウンド処理が停止されるテスト"""
         app = YouTubePlayerApp()
+        app.stream_refresher = Mock()
         
-        app._start_update_loop()
+        await app.on_unmount()
         
-        # asyncio.create_taskが呼ばれることを確認
-        mock_create_task.assert_called_once()
+        app.downloader.close.assert_called_once()
+        app.stream_refresher.stop.assert_called_once()
+        app.player.stop.assert_called_once()
     
     @pytest.mark.asyncio
-    @patch('src.ui.app.asyncio.sleep', new_callable=AsyncMock)
     @patch('src.ui.app.MediaPlayer')
     @patch('src.ui.app.YouTubeDownloader')
-    async def test_update_loop_iteration(self, mock_downloader_class, mock_player_class, mock_sleep):
-        """更新ループの1回の実行テスト"""
+    async def test_state_changes_coalesced_into_loop(self, mock_downloader_class, mock_player_class):
+        """VLCのスレッドからの状態変化がまとめてイベントループ上で反映されるテスト"""
         app = YouTubePlayerApp()
+        app._loop = asyncio.get_running_loop()
+        app.control_widget = Mock()
+        
+        # 反映前に届いた複数の通知は1回の更新にまとめる
+        threads = [threading.Thread(target=app._post_state_change) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        await asyncio.sleep(0)
+        
+        app.control_widget.update_display.assert_called_once()
+        app.player.maybe_preload.assert_called_once()
+        
+        # 反映後の変化は改めて反映される
+        app._post_state_change()
+        await asyncio.sleep(0)
+        assert app.control_widget.update_display.call_count == 2
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_no_polling_while_idle(self, mock_downloader_class, mock_player_class):
+        """状態変化がなければ表示を更新しないテスト"""
+        app = YouTubePlayerApp()
+        app._loop = asyncio.get_running_loop()
+        app.control_widget = Mock()
         
-        # モックコントロールウィジェットの設定
-        mock_control_widget = Mock()
-        app.control_widget = mock_control_widget
+        await asyncio.sleep(0.05)
         
-        # 1回だけ実行するためにsleepで例外を発生させる
-        mock_sleep.side_effect = Exception("Stop loop")
+        app.control_widget.update_display.assert_not_called()
+        app.player.maybe_preload.assert_not_called()
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_refresh_for_proxy_does_not_wait_on_event_loop(self, mock_downloader_class, mock_player_class):
+        """プロキシのスレッドからの再解決がイベントループを経由せずに完了するテスト"""
+        app = YouTubePlayerApp()
+        video = VideoInfo(url="https://www.youtube.com/watch?v=dQw4w9WgXcQ", video_id="dQw4w9WgXcQ")
+        app.downloader.resolve_stream = AsyncMock(return_value=True)
+        app.downloader.resolve_stream_blocking = Mock(return_value=True)
+        app._loop = asyncio.get_running_loop()
+        
+        # イベントループが塞がっていても再解決できる
+        assert app._refresh_for_proxy(video) is True
+        app.downloader.resolve_stream_blocking.assert_called_once_with(
+            video, timeout=YouTubePlayerApp.PROXY_REFRESH_TIMEOUT
+        )
+        app.downloader.resolve_stream.assert_not_called()
+        
+        app.downloader.resolve_stream_blocking.side_effect = RuntimeError("closed")
+        assert app._refresh_for_proxy(video) is False
+    
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    def test_toggle_offline(self, mock_downloader_class, mock_player_class):
+        """オフラインモードの切り替えがプレイヤーとダウンローダーに反映されるテスト"""
+        app = YouTubePlayerApp(offline=True)
+        
+        assert app.player.offline is True
+        assert app.downloader.offline is True
         
-        try:
-            await app._update_loop()
-        except Exception:
-            pass  # 例外を無視
+        app.notify = Mock()
+        app.track_prefetcher = Mock()
+        app.action_toggle_offline()
         
-        # コントロールウィジェットの更新が呼ばれることを確認
-        mock_control_widget.update_display.assert_called_once()
-        # sleepが呼ばれることを確認
-        mock_sleep.assert_called_once_with(0.5) 
\ No newline at end of file
+        assert app.offline is False
+        assert app.player.offline is False
+        assert app.downloader.offline is False
+        app.track_prefetcher.stop.assert_not_called()
+    
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    def test_seek_actions_use_seconds(self, mock_downloader_class, mock_player_class):
+        """左右キーのシークが曲の長さによらず設定した秒数で移動するテスト"""
+        app = YouTubePlayerApp(seek_step=10.0, long_seek_step=90.0, input_window=0)
+        
+        app.action_seek_forward()
+        app.action_seek_backward()
+        app.action_seek_forward_long()
+        app.action_seek_backward_long()
+        
+        assert [c.args[0] for c in app.player.seek_relative.call_args_list] == [10.0, -10.0, 90.0, -90.0]
+        app.player.set_position.assert_not_called()
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_bursty_keys_are_coalesced(self, mock_downloader_class, mock_player_class):
+        """連打した曲送り・シークがまとめて1回だけ実行されるテスト"""
+        app = YouTubePlayerApp(input_window=0.02)
+        app.track_prefetcher = Mock()
+        app.track_prefetcher.skip = AsyncMock(return_value=True)
+        app.playlist_widget = Mock()
+        
+        for _ in range(5):
+            app.action_next_track()
+        app.action_previous_track()
+        await asyncio.sleep(0.05)
+        await asyncio.gather(*app._playback_tasks)
+        app.track_prefetcher.skip.assert_awaited_once_with(4)
+        
+        for _ in range(10):
+            app.action_seek_forward()
+        # 別の種類の操作が届くと待っていたシークを先に実行
+        app.action_next_track()
+        app.player.seek_relative.assert_called_once_with(50.0)
+        await asyncio.sleep(0.05)
+        await asyncio.gather(*app._playback_tasks)
+        assert app.track_prefetcher.skip.await_count == 2
+    
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    def test_cycle_buffering_profile(self, mock_downloader_class, mock_player_class):
+        """バッファ設定の切り替えがプレイヤーに反映されるテスト"""
+        app = YouTubePlayerApp(buffering="balanced")
+        app.notify = Mock()
+        
+        assert mock_player_class.call_args.kwargs["buffering_profile"] == "balanced"
+        app.action_cycle_buffering()
+        app.player.set_buffering_profile.assert_called_with("resilient")
+        app.action_cycle_buffering()
+        app.player.set_buffering_profile.assert_called_with("low-latency")
+        assert app.buffering_profile == "low-latency"
+    
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    def test_shuffle_and_repeat_modes(self, mock_downloader_class, mock_player_class):
+        """シャッフルとリピートの切り替えがプレイヤーに反映されるテスト"""
+        app = YouTubePlayerApp(shuffle=True, repeat="one")
+        
+        assert app.shuffle is True
+        app.player.set_shuffle.assert_called_once_with(True)
+        app.player.set_repeat.assert_called_with("one")
+        
+        app.notify = Mock()
+        app.track_prefetcher = Mock()
+        app.action_toggle_shuffle()
+        app.action_cycle_repeat()
+        
+        assert app.shuffle is False
+        app.player.set_shuffle.assert_called_with(False)
+        assert app.repeat == "off"
+        app.action_cycle_repeat()
+        assert app.repeat == "all"
+        app.player.set_repeat.assert_called_with("all")
+    
+    @pytest.mark.asyncio
+    @patch('src.ui.app.MediaPlayer')
+    @patch('src.ui.app.YouTubeDownloader')
+    async def test_offline_rejects_uncached_url(self, mock_downloader_class, mock_player_class):
+        """オフラインモードでキャッシュにない曲の追加はエラーになるテスト"""
+        app = YouTubePlayerApp(offline=True)
+        app.downloader.validate_url.return_value = True
+        app.downloader.video_key.return_value = "abc"
+        app.downloader.get_video_info = AsyncMock(return_value=None)
+        
+        with pytest.raises(ValueError, match="オフラインモード"):
+            await app._handle_url_input("https://youtu.be/abc")
\ No newline at end of file
@@ -0,0 +1,536 @@
+"""
+キャッシュのテスト
+"""
+
+import json
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from src.core.metadata_cache import MetadataCache
+from src.core.audio_cache import AudioCache
+from src.core.range_downloader import RangeDownloader, RangeDownloadError
+from src.core.eviction import LRUPolicy, LFUPolicy, GDSFPolicy, CacheStats, make_policy
+from src.models.video_info import VideoInfo
+
+
+class TestMetadataCache:
+    """MetadataCacheクラスのテスト"""
+    
+    def test_put_and_get(self, tmp_path):
+        """保存と取得のテスト"""
+        cache = MetadataCache(cache_dir=tmp_path)
+        
+        cache.put("abc", {"title": "Song"})
+        
+        assert cache.get("abc") == {"title": "Song"}
+        assert cache.get("missing") is None
+        assert "abc" in cache
+    
+    def test_persisted_to_disk(self, tmp_path):
+        """ディスクへの永続化のテスト"""
+        cache = MetadataCache(cache_dir=tmp_path)
+        cache.put("abc", {"title": "Song"})
+        cache.close()
+        
+        reloaded = MetadataCache(cache_dir=tmp_path)
+        
+        assert reloaded.get("abc") == {"title": "Song"}
+    
+    def test_contains_has_no_side_effects(self, tmp_path):
+        """in による存在確認が統計・参照順を変えず、TTLを考慮するテスト"""
+        cache = MetadataCache(cache_dir=tmp_path, ttl=60, max_entries=2)
+        with patch('src.core.metadata_cache.time.time', return_value=1000.0):
+            cache.put("a", {"title": "A"})
+            cache.put("b", {"title": "B"})
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1010.0):
+            assert "a" in cache
+            assert "missing" not in cache
+            assert (cache.stats.hits, cache.stats.misses) == (0, 0)
+            cache.put("c", {"title": "C"})
+        
+        # "a" は参照済み扱いにならず、最も古いエントリとして削除される
+        assert list(cache._entries) == ["b", "c"]
+        with patch('src.core.metadata_cache.time.time', return_value=1061.0):
+            assert "b" not in cache
+        assert len(cache) == 2
+    
+    def test_puts_are_saved_together(self, tmp_path):
+        """追加のたびにファイルを書き込まず、flush・待ち時間の後にまとめて書き込むテスト"""
+        cache = MetadataCache(cache_dir=tmp_path)
+        path = tmp_path / MetadataCache.FILE_NAME
+        
+        for i in range(3):
+            cache.put(f"v{i}", {"title": f"T{i}"})
+        assert not path.exists()
+        
+        cache.flush()
+        assert set(json.loads(path.read_text(encoding="utf-8"))) == {"v0", "v1", "v2"}
+        
+        cache.SAVE_DELAY = 0.01
+        cache.put("v3", {"title": "T3"})
+        deadline = time.monotonic() + 5
+        while cache._dirty and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert "v3" in json.loads(path.read_text(encoding="utf-8"))
+        cache.close()
+    
+    def test_ttl_expiry(self, tmp_path):
+        """TTL経過後にエントリが無効になるテスト"""
+        cache = MetadataCache(cache_dir=tmp_path, ttl=60)
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1000.0):
+            cache.put("abc", {"title": "Song"})
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1059.0):
+            assert cache.get("abc") == {"title": "Song"}
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1061.0):
+            assert cache.get("abc") is None
+        
+        assert len(cache) == 0
+    
+    def test_stale_entries_kept_for_offline(self, tmp_path):
+        """TTL経過後も stale_ttl の間は allow_stale で取得できるテスト"""
+        cache = MetadataCache(cache_dir=tmp_path, ttl=60, stale_ttl=100)
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1000.0):
+            cache.put("abc", {"title": "Song"})
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1100.0):
+            assert cache.get("abc") is None
+            assert cache.get("abc", allow_stale=True) == {"title": "Song"}
+        
+        with patch('src.core.metadata_cache.time.time', return_value=1161.0):
+            assert cache.get("abc", allow_stale=True) is None
+        
+        assert len(cache) == 0
+    
+    def test_max_entries_evicts_least_recently_used(self, tmp_path):
+        """件数上限を超えた場合に最も古いエントリが削除されるテスト"""
+        cache = MetadataCache(cache_dir=tmp_path, max_entries=2)
+        
+        cache.put("a", {"title": "A"})
+        cache.put("b", {"title": "B"})
+        cache.get("a")  # aを最近使用したことにする
+        cache.put("c", {"title": "C"})
+        
+        assert len(cache) == 2
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+    
+    def test_invalidate_and_clear(self, tmp_path):
+        """エントリ削除と全削除のテスト"""
+        cache = MetadataCache(cache_dir=tmp_path)
+        cache.put("a", {"title": "A"})
+        cache.put("b", {"title": "B"})
+        
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        
+        cache.clear()
+        assert len(cache) == 0
+        assert json.loads((tmp_path / MetadataCache.FILE_NAME).read_text()) == {}
+    
+    def test_corrupted_file_is_ignored(self, tmp_path):
+        """壊れたキャッシュファイルを無視するテスト"""
+        (tmp_path / MetadataCache.FILE_NAME).write_text("{not json")
+        
+        cache = MetadataCache(cache_dir=tmp_path)
+        
+        assert len(cache) == 0
+    
+    def test_video_info_round_trip(self, tmp_path, sample_video_info):
+        """VideoInfoの保存と復元のテスト"""
+        cache = MetadataCache(cache_dir=tmp_path)
+        sample_video_info.video_id = "dQw4w9WgXcQ"
+        sample_video_info.formats = [{"format_id": "251", "ext": "webm"}]
+        
+        cache.put(sample_video_info.video_id, sample_video_info.to_dict())
+        cache.flush()
+        restored = VideoInfo.from_dict(MetadataCache(cache_dir=tmp_path).get("dQw4w9WgXcQ"))
+        
+        assert restored.title == sample_video_info.title
+        assert restored.channel == sample_video_info.channel
+        assert restored.duration == sample_video_info.duration
+        assert restored.formats == sample_video_info.formats
+        assert restored.is_valid() is True
+
+    
+    def test_stats_and_lfu_policy(self, tmp_path):
+        """ヒット率の統計と削除ポリシーの切り替えのテスト"""
+        cache = MetadataCache(cache_dir=tmp_path, max_entries=2, policy="lfu")
+        cache.put("popular", {"title": "A"})
+        cache.put("once", {"title": "B"})
+        cache.get("popular")
+        cache.get("popular")
+        cache.get("missing")
+        
+        cache.put("new", {"title": "C"})
+        
+        assert "once" not in cache._entries
+        assert "popular" in cache._entries
+        assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+        
+        # 参照回数は永続化され、再読み込み後も保持される
+        cache.flush()
+        reloaded = MetadataCache(cache_dir=tmp_path, max_entries=2, policy="lfu")
+        assert reloaded.policy.frequency("popular") == 3
+
+
+class TestAudioCache:
+    """AudioCacheクラスのテスト"""
+    
+    def _write(self, tmp_path, name: str, size: int):
+        """指定サイズのファイルを作成"""
+        path = tmp_path / f"{name}.src"
+        path.write_bytes(b"a" * size)
+        return path
+    
+    def test_store_and_get(self, tmp_path):
+        """保存と取得のテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio", max_bytes=1000)
+        
+        path = cache.store("abc", self._write(tmp_path, "abc", 100))
+        
+        assert cache.get_path("abc") == path
+        assert path.read_bytes() == b"a" * 100
+        assert cache.get_path("missing") is None
+        assert cache.total_bytes == 100
+        assert "abc" in cache
+        cache.close()
+    
+    def test_lru_eviction_by_size(self, tmp_path):
+        """容量上限を超えると最も古くアクセスされた曲から削除されるテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio", max_bytes=300)
+        first = cache.store("a", self._write(tmp_path, "a", 100))
+        cache.store("b", self._write(tmp_path, "b", 100))
+        cache.store("c", self._write(tmp_path, "c", 100))
+        cache.get_path("a")
+        
+        cache.store("d", self._write(tmp_path, "d", 100))
+        
+        assert "b" not in cache
+        assert {"a", "c", "d"} == {k for k in "abcd" if k in cache}
+        assert first.exists()
+        assert cache.total_bytes == 300
+        cache.close()
+    
+    def test_pinned_entries_are_not_evicted(self, tmp_path):
+        """ピン留めされた曲は容量を超えても削除されないテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio", max_bytes=200)
+        cache.pin("a")
+        cache.store("a", self._write(tmp_path, "a", 150))
+        
+        # 新しい曲の方が削除される
+        assert cache.store("b", self._write(tmp_path, "b", 100)) is None
+        assert "a" in cache and "b" not in cache
+        
+        cache.pin("b")
+        cache.store("b", self._write(tmp_path, "b", 100))
+        assert cache.total_bytes == 250
+        
+        # ピン留めの解除で容量内に収まるまで削除
+        cache.unpin("a")
+        assert "a" not in cache
+        assert cache.total_bytes == 100
+        cache.close()
+    
+    def test_persisted_to_disk(self, tmp_path):
+        """インデックスの永続化と中断されたダウンロードの片付けのテスト"""
+        cache_dir = tmp_path / "audio"
+        cache = AudioCache(cache_dir=cache_dir)
+        cache.store("abc", self._write(tmp_path, "abc", 10))
+        cache.close()
+        (cache_dir / "def.1234.part").write_bytes(b"partial")
+        
+        reloaded = AudioCache(cache_dir=cache_dir)
+        
+        assert reloaded.get_path("abc") is not None
+        assert not list(cache_dir.glob("*.part"))
+        reloaded.close()
+    
+    def test_hits_are_saved_lazily(self, tmp_path):
+        """キャッシュヒットのたびにインデックスを書き込まず、close時にまとめて書き込むテスト"""
+        cache_dir = tmp_path / "audio"
+        cache = AudioCache(cache_dir=cache_dir)
+        cache.store("abc", self._write(tmp_path, "abc", 10))
+        saved = (cache_dir / AudioCache.INDEX_FILE).read_text(encoding="utf-8")
+        
+        for _ in range(3):
+            cache.get_path("abc")
+        
+        assert (cache_dir / AudioCache.INDEX_FILE).read_text(encoding="utf-8") == saved
+        cache.close()
+        
+        reloaded = AudioCache(cache_dir=cache_dir)
+        assert reloaded._entries["abc"]['hits'] == 4
+        reloaded.close()
+    
+    def test_hits_are_saved_after_delay(self, tmp_path):
+        """キャッシュヒットの更新が待ち時間の後に書き込まれるテスト"""
+        cache_dir = tmp_path / "audio"
+        cache = AudioCache(cache_dir=cache_dir)
+        cache.SAVE_DELAY = 0.01
+        cache.store("abc", self._write(tmp_path, "abc", 10))
+        
+        cache.get_path("abc")
+        
+        deadline = time.monotonic() + 5
+        while cache._dirty and time.monotonic() < deadline:
+            time.sleep(0.01)
+        index = json.loads((cache_dir / AudioCache.INDEX_FILE).read_text(encoding="utf-8"))
+        assert index["abc"]['hits'] == 2
+        cache.close()
+    
+    def test_missing_file_is_dropped(self, tmp_path):
+        """ファイルが消えたエントリはキャッシュミスになるテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        cache.store("abc", self._write(tmp_path, "abc", 10)).unlink()
+        
+        assert cache.get_path("abc") is None
+        assert len(cache) == 0
+        cache.close()
+    
+    def test_download(self, tmp_path, range_server):
+        """ダウンロードしてキャッシュに保存するテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        
+        path = cache.download("abc", f"{range_server.url}/audio")
+        
+        assert path.read_bytes() == range_server.body
+        assert cache.download("def", f"{range_server.url}/missing") is None
+        assert "def" not in cache
+        assert not list((tmp_path / "audio").glob("*.part"))
+        cache.close()
+    
+    def test_schedule_download_deduplicates(self, tmp_path, range_server):
+        """同じ曲のバックグラウンドダウンロードが重複しないテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        
+        future = cache.schedule_download("abc", f"{range_server.url}/audio")
+        duplicate = cache.schedule_download("abc", f"{range_server.url}/audio")
+        
+        assert future.result(timeout=5) is not None
+        assert duplicate is None
+        assert cache.schedule_download("abc", f"{range_server.url}/audio") is None
+        cache.close()
+    
+    def test_download_resumes_after_restart(self, tmp_path, range_server):
+        """中断したダウンロードが再起動後に続きから再開されるテスト"""
+        cache_dir = tmp_path / "audio"
+        cache = AudioCache(cache_dir=cache_dir, chunk_size=1024, max_parallel=2)
+        range_server.fail_from = 4096
+        
+        assert cache.download("abc", f"{range_server.url}/ranged") is None
+        cache.close()
+        assert list(cache_dir.glob("*.part"))
+        
+        range_server.fail_from = None
+        range_server.ranges = []
+        reloaded = AudioCache(cache_dir=cache_dir, chunk_size=1024, max_parallel=2)
+        path = reloaded.download("abc", f"{range_server.url}/ranged")
+        
+        assert path.read_bytes() == range_server.body
+        assert "bytes=0-1023" not in range_server.ranges
+        assert not list(cache_dir.glob("*.part*"))
+        reloaded.close()
+    
+    def test_gdsf_keeps_short_popular_tracks(self, tmp_path):
+        """GDSFでは長いミックスより頻繁に再生される短い曲が残るテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio", max_bytes=1000, policy="gdsf")
+        cache.store("short", self._write(tmp_path, "short", 100))
+        cache.get_path("short")
+        cache.store("mix", self._write(tmp_path, "mix", 800))
+        
+        cache.store("other", self._write(tmp_path, "other", 200))
+        
+        assert "short" in cache and "other" in cache
+        assert "mix" not in cache
+        assert cache.stats.hits == 1
+        assert cache.stats.hit_bytes == 100
+        assert cache.stats.miss_bytes == 1100
+        cache.close()
+
+
+class TestEvictionPolicies:
+    """削除ポリシーのテスト"""
+    
+    def test_lru_order(self):
+        """LRUは最も古く参照された項目を返すテスト"""
+        policy = LRUPolicy()
+        for key in "abc":
+            policy.insert(key)
+        policy.access("a")
+        
+        assert policy.victim() == "b"
+        assert policy.victim(lambda key: key == "b") == "c"
+    
+    def test_lfu_order(self):
+        """LFUは参照回数の最も少ない項目を返すテスト"""
+        policy = LFUPolicy()
+        for key in "abc":
+            policy.insert(key)
+        policy.access("a")
+        policy.access("a")
+        policy.access("b")
+        
+        assert policy.victim() == "c"
+        policy.remove("c", evicted=True)
+        assert policy.victim() == "b"
+        assert policy.victim(lambda key: key == "b") == "a"
+        assert policy.frequency("a") == 3
+        assert len(policy) == 2
+    
+    def test_gdsf_prefers_evicting_large_items(self):
+        """GDSFは同じ参照回数なら大きい項目を返すテスト"""
+        policy = GDSFPolicy()
+        policy.insert("small", size=100)
+        policy.insert("large", size=10000)
+        
+        assert policy.victim() == "large"
+    
+    def test_gdsf_ages_out_stale_items(self):
+        """GDSFでは削除のたびに L が上がり、参照されなくなった項目もいずれ削除されるテスト"""
+        policy = GDSFPolicy()
+        policy.insert("old", size=1, frequency=5)
+        for i in range(10):
+            policy.insert(f"new{i}", size=1)
+            victim = policy.victim()
+            policy.remove(victim, evicted=True)
+            if victim == "old":
+                break
+        
+        assert "old" not in policy
+    
+    def test_heap_compaction(self):
+        """参照を繰り返してもヒープが際限なく大きくならないテスト"""
+        policy = LFUPolicy()
+        policy.insert("a")
+        for _ in range(1000):
+            policy.access("a")
+        
+        assert len(policy._heap) < 100
+        assert policy.victim() == "a"
+    
+    def test_stats(self):
+        """ヒット率・バイトヒット率のテスト"""
+        stats = CacheStats()
+        assert stats.hit_rate == 0.0
+        
+        stats.record_hit(300)
+        stats.record_miss(100)
+        stats.record_miss()
+        stats.add_miss_bytes(600)
+        
+        assert stats.requests == 3
+        assert stats.hit_rate == pytest.approx(1 / 3)
+        assert stats.byte_hit_rate == pytest.approx(0.3)
+        
+        stats.reset()
+        assert stats.requests == 0
+    
+    def test_make_policy(self):
+        """名前からポリシーを生成するテスト"""
+        assert isinstance(make_policy("gdsf"), GDSFPolicy)
+        with pytest.raises(ValueError):
+            make_policy("fifo")
+
+
+class TestRangeDownloader:
+    """RangeDownloaderクラスのテスト"""
+    
+    def test_parallel_chunks(self, tmp_path, range_server):
+        """バイト範囲に分割して取得するテスト"""
+        downloader = RangeDownloader(chunk_size=1000, max_parallel=3)
+        
+        path = downloader.download(f"{range_server.url}/ranged", tmp_path / "song.audio")
+        
+        assert path.read_bytes() == range_server.body
+        # サイズ確認の1回 + 11個の範囲
+        assert len(range_server.ranges) == 12
+        assert "bytes=10000-10239" in range_server.ranges
+        assert not list(tmp_path.glob("*.part*"))
+        downloader.close()
+    
+    def test_concurrent_downloads(self, tmp_path, range_server):
+        """複数のダウンロードを同時に行っても範囲の投入が失敗しないテスト"""
+        downloader = RangeDownloader(chunk_size=256, max_parallel=2)
+        errors = []
+        
+        def download(name):
+            try:
+                downloader.download(f"{range_server.url}/ranged", tmp_path / name)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=download, args=(f"song{i}.audio",)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        
+        assert errors == []
+        for i in range(3):
+            assert (tmp_path / f"song{i}.audio").read_bytes() == range_server.body
+        downloader.close()
+    
+    def test_concurrent_cache_downloads(self, tmp_path, range_server):
+        """キャッシュのバックグラウンドダウンロードを同時に行えるテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio", chunk_size=256, max_parallel=2, max_downloads=2)
+        
+        futures = [cache.schedule_download(video_id, f"{range_server.url}/ranged") for video_id in ("a", "b")]
+        
+        for future in futures:
+            assert future.result(timeout=10) is not None
+        assert "a" in cache and "b" in cache
+        cache.close()
+    
+    def test_resume_fetches_only_missing_ranges(self, tmp_path, range_server):
+        """中断後は未取得の範囲だけを取得するテスト"""
+        dest = tmp_path / "song.audio"
+        downloader = RangeDownloader(chunk_size=1024, max_parallel=1, retries=0)
+        range_server.fail_from = 5120
+        
+        with pytest.raises(RangeDownloadError):
+            downloader.download(f"{range_server.url}/ranged", dest)
+        
+        state = json.loads(RangeDownloader.part_path(dest).with_suffix(".part.json").read_text())
+        assert state["done"] == [0, 1, 2, 3, 4]
+        assert not dest.exists()
+        
+        range_server.fail_from = None
+        range_server.ranges = []
+        downloader.download(f"{range_server.url}/ranged", dest)
+        
+        assert dest.read_bytes() == range_server.body
+        assert range_server.ranges[1:] == [f"bytes={i * 1024}-{i * 1024 + 1023}" for i in range(5, 10)]
+        downloader.close()
+    
+    def test_chunk_size_change_restarts(self, tmp_path, range_server):
+        """分割サイズが変わった場合は最初から取得し直すテスト"""
+        dest = tmp_path / "song.audio"
+        range_server.fail_from = 5120
+        with pytest.raises(RangeDownloadError):
+            RangeDownloader(chunk_size=1024, max_parallel=1, retries=0).download(
+                f"{range_server.url}/ranged", dest
+            )
+        
+        range_server.fail_from = None
+        range_server.ranges = []
+        RangeDownloader(chunk_size=2048).download(f"{range_server.url}/ranged", dest)
+        
+        assert dest.read_bytes() == range_server.body
+        assert "bytes=0-2047" in range_server.ranges
+    
+    def test_fallback_without_range_support(self, tmp_path, range_server):
+        """Rangeに対応しないサーバーからは1回のGETで取得するテスト"""
+        downloader = RangeDownloader(chunk_size=100)
+        
+        path = downloader.download(f"{range_server.url}/audio", tmp_path / "song.audio")
+        
+        assert path.read_bytes() == range_server.body
+        assert not list(tmp_path.glob("*.part*"))
+        downloader.close()
\ No newline at end of file
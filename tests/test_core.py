@@ -2,14 +2,55 @@
 コアロジックのテスト
 """
 
+import os
+import time
 import pytest
 import asyncio
+import threading
 from unittest.mock import Mock, patch, AsyncMock
 from src.core.media_player import MediaPlayer
 from src.core.youtube_downloader import YouTubeDownloader
+from src.core.metadata_cache import MetadataCache
+from src.core.stream_refresher import StreamRefresher
+from src.core.track_prefetcher import TrackPrefetcher
+from src.core.audio_cache import AudioCache
+from src.core.command_coalescer import CommandCoalescer
+from src.core.command_queue import CommandQueue
+from src.core.crossfade import Crossfader, equal_power_gains
+from src.core.extractor_pool import ExtractorPool, compact_info, compact_playlist
+from src.core.process_extractor_pool import ProcessExtractorPool
+from src.core.single_flight import SingleFlight
+from src.core.extraction_executor import (
+    ExtractionExecutor, ExtractionQueueFullError, ExtractionTimeoutError
+)
 from src.models.video_info import VideoInfo
 
 
+class StubExtractor:
+    """プロセスプールのテスト用の抽出器（pickle可能なようにモジュール直下に定義）"""
+    
+    def __init__(self, opts):
+        self.opts = opts
+    
+    def extract_info(self, url, download=False, process=True):
+        if "list=" in url:
+            # 展開前のプレイリストはエントリを遅延して列挙する
+            return {'_type': 'playlist', 'entries': (
+                {'_type': 'url', 'id': f"v{i}", 'title': f"Track {i}", 'duration': 60.0 + i}
+                for i in range(3)
+            )}
+        return {
+            'id': url[-3:], 'title': f"pid={os.getpid()}", 'duration': 60,
+            'uploader': "Stub", 'url': "https://example.com/a.mp3",
+            'description': "x" * 10000,
+            'formats': [
+                {'format_id': '251', 'ext': 'webm', 'acodec': 'opus', 'abr': 160,
+                 'url': "https://example.com/a.webm", 'http_headers': {'User-Agent': 'x'}},
+                {'format_id': '137', 'ext': 'mp4', 'acodec': 'none', 'url': "https://example.com/v.mp4"},
+            ],
+        }
+
+
 class TestMediaPlayer:
     """MediaPlayerクラスのテスト"""
     
@@ -31,7 +72,8 @@ class TestMediaPlayer:
         assert player.current_index == 0
         assert player.is_playing is False
         
-        mock_vlc.Instance.assert_called_once_with('--intf=dummy', '--no-video', '--quiet', '--no-sout-all', '--sout-keep')
+        mock_vlc.Instance.assert_called_once_with('--intf=dummy', '--no-video', '--quiet', '--no-sout-all', '--sout-keep',
+                                                  '--network-caching=1000', '--file-caching=300')
         mock_instance.media_player_new.assert_called_once()
     
     @patch('src.core.media_player.vlc')
@@ -66,6 +108,481 @@ class TestMediaPlayer:
         assert result is False
         assert len(player.playlist) == 0
     
+    @patch('src.core.media_player.vlc')
+    def test_add_placeholders(self, mock_vlc):
+        """ストリーム未解決の仮エントリをまとめて追加するテスト"""
+        player = MediaPlayer()
+        placeholder = VideoInfo("https://youtu.be/abc", "Placeholder", video_id="abc")
+        placeholder.is_placeholder = True
+        unresolved = VideoInfo("https://youtu.be/def", "Not a placeholder")
+        
+        assert player.add_many([placeholder, unresolved]) == 1
+        assert player.playlist == [placeholder]
+    
+    @patch('src.core.media_player.vlc')
+    def test_offline_plays_only_cached_tracks(self, mock_vlc, tmp_path):
+        """オフラインモードではキャッシュ済みの曲だけを再生し、それ以外は飛ばすテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        source = tmp_path / "c.src"
+        source.write_bytes(b"a" * 10)
+        cache.store("c", source)
+        player = MediaPlayer(audio_cache=cache)
+        for video_id in ("a", "b", "c"):
+            video = VideoInfo(
+                f"https://youtu.be/{video_id}", video_id,
+                audio_url=f"https://example.com/{video_id}.mp3", video_id=video_id
+            )
+            video.is_loaded = True
+            player.add_to_playlist(video)
+        player.offline = True
+        
+        assert player.play_current() is False
+        assert player.is_available(player.playlist[1]) is False
+        assert player.next_track() is True
+        assert player.current_index == 2
+        assert player.previous_track() is False
+        player.instance.media_new.assert_called_once_with(str(tmp_path / "audio" / "c.audio"))
+        cache.close()
+    
+    @staticmethod
+    def _vlc_event(**values):
+        """VLCイベントの代わり（event.u.* に値を持つ）"""
+        event = Mock()
+        for name, value in values.items():
+            setattr(event.u, name, value)
+        return event
+    
+    def _make_gapless_player(self, mock_vlc, count: int = 3):
+        """稼働中と待機用で別のVLCプレイヤーを持つプレイヤーを作成"""
+        primary, standby = Mock(), Mock()
+        primary.get_length.return_value = 180000
+        mock_vlc.Instance.return_value.media_player_new.side_effect = [primary, standby]
+        player = MediaPlayer()
+        for i in range(count):
+            video = VideoInfo(f"https://youtu.be/t{i}", f"t{i}",
+                              audio_url=f"https://example.com/t{i}.mp3", video_id=f"t{i}")
+            video.is_loaded = True
+            player.add_to_playlist(video)
+        return player, primary, standby
+    
+    @patch('src.core.media_player.vlc')
+    def test_preloaded_next_track_swaps_players(self, mock_vlc):
+        """待機用のプレイヤーで開いた次の曲にプレイヤーを入れ替えて再生するテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        
+        assert player.preload_next() is True
+        
+        media = player.instance.media_new.return_value
+        media.add_option.assert_called_with(":start-paused")
+        standby.play.assert_called_once()
+        
+        assert player.next_track() is True
+        
+        standby.set_pause.assert_called_once_with(0)
+        primary.stop.assert_called_once()
+        assert player.player is standby
+        assert player.current_video.title == "t1"
+        # 入れ替えた曲は新たに開き直さない
+        assert player.instance.media_new.call_count == 2
+    
+    @patch('src.core.media_player.vlc')
+    def test_maybe_preload_waits_for_end_of_track(self, mock_vlc):
+        """曲の残り時間が PRELOAD_SECONDS を切るまで次の曲を開かないテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        
+        player._on_length_changed(self._vlc_event(new_length=180000), primary)
+        player._on_time_changed(self._vlc_event(new_time=90000), primary)
+        player.sync()
+        assert player.maybe_preload() is False
+        
+        player._on_time_changed(self._vlc_event(new_time=170000), primary)
+        player.sync()
+        assert player.maybe_preload() is True
+        standby.set_media.assert_called_once()
+        # 再生位置はVLCのイベントから得るため、ctypes経由で問い合わせない
+        primary.get_time.assert_not_called()
+    
+    @patch('src.core.media_player.vlc')
+    def test_skipping_elsewhere_closes_standby(self, mock_vlc):
+        """開いてある曲と別の曲を再生した場合は待機中の曲を閉じるテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        player.preload_next()
+        
+        player.current_index = 2
+        assert player.play_current() is True
+        
+        standby.stop.assert_called_once()
+        assert player.player is primary
+        assert player.current_video.title == "t2"
+    
+    @patch('src.core.media_player.vlc')
+    def test_unresolved_next_track_not_preloaded(self, mock_vlc):
+        """ストリームURLが未解決の次の曲は開かないテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.playlist[1].audio_url = ""
+        player.play_current()
+        
+        assert player.preload_next() is False
+        standby.set_media.assert_not_called()
+    
+    @patch('src.core.media_player.vlc')
+    def test_end_reached_from_standby_ignored(self, mock_vlc):
+        """待機中のプレイヤーからの終了通知は無視されるテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        callback = Mock()
+        player.set_on_track_end_callback(callback)
+        
+        player._on_end_reached(Mock(), standby)
+        player.sync()
+        callback.assert_not_called()
+        
+        player._on_end_reached(Mock(), primary)
+        player.sync()
+        callback.assert_called_once()
+    
+    @patch('src.core.media_player.vlc')
+    def test_stale_end_reached_ignored_after_skip(self, mock_vlc):
+        """終了通知の処理前に別の曲を開いた場合は次の曲へ進まないテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        callback = Mock()
+        player.set_on_track_end_callback(callback)
+        
+        # 通知をキューに積んだ後に、同じプレイヤーで別の曲を開き直す
+        player._commands.call(lambda: (player._on_end_reached(Mock(), primary), player.play_index(2)))
+        player.sync()
+        
+        callback.assert_not_called()
+        assert player.current_video.title == "t2"
+    
+    @patch('src.core.media_player.vlc')
+    def test_concurrent_commands_and_track_ends(self, mock_vlc):
+        """曲送り・削除と曲の終了が同時に起きても操作が所有スレッドで直列に実行されるテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc, count=60)
+        threads_seen = set()
+        for vlc_player in (primary, standby):
+            vlc_player.set_media.side_effect = lambda media: threads_seen.add(threading.current_thread().name)
+        player.play_current()
+        errors = []
+        
+        def hammer(action):
+            try:
+                for _ in range(200):
+                    action()
+            except Exception as e:
+                errors.append(e)
+        
+        def delete():
+            if len(player.playlist) > 5:
+                player.remove_from_playlist(player.current_index)
+        
+        actions = [player.next_track, player.previous_track, delete, player.preload_next,
+                   lambda: player._on_end_reached(Mock(), player.player)]
+        workers = [threading.Thread(target=hammer, args=(action,)) for action in actions]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        player.sync()
+        
+        assert errors == []
+        assert 4 <= len(player.playlist) <= 60
+        assert 0 <= player.current_index < len(player.playlist)
+        assert threads_seen == {"media-player"}
+        player.close()
+    
+    @patch('src.core.media_player.vlc')
+    def test_state_change_notified_on_visible_changes(self, mock_vlc):
+        """表示に関わる変化があった時だけ状態変化が通知されるテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        changed = Mock()
+        player.set_on_state_change_callback(changed)
+        
+        player._on_length_changed(self._vlc_event(new_length=180000), primary)
+        player.sync()
+        assert changed.call_count == 1
+        
+        # 同じ秒の中の再生位置の変化は通知しない
+        player._on_time_changed(self._vlc_event(new_time=1200), primary)
+        player._on_time_changed(self._vlc_event(new_time=1450), primary)
+        player.sync()
+        assert changed.call_count == 2
+        assert player.time_ms == 1450
+        assert player.length_ms == 180000
+        
+        player._on_buffering(self._vlc_event(new_cache=42.0), primary)
+        player.sync()
+        assert changed.call_count == 3
+        assert player.buffering == 42.0
+        
+        player._on_paused(Mock(), primary)
+        player.sync()
+        assert player.is_playing is False
+        assert changed.call_count == 4
+        player._on_playing(Mock(), primary)
+        player.sync()
+        assert player.is_playing is True
+        assert changed.call_count == 5
+        
+        player._on_error(Mock(), primary)
+        player.sync()
+        assert player.is_playing is False
+        assert player.last_error
+        assert changed.call_count == 6
+    
+    @patch('src.core.media_player.vlc')
+    def test_state_events_from_standby_ignored(self, mock_vlc):
+        """待機中のプレイヤーのイベントは再生中の曲の状態を変えないテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        player.preload_next()
+        changed = Mock()
+        player.set_on_state_change_callback(changed)
+        
+        player._on_length_changed(self._vlc_event(new_length=200000), standby)
+        player._on_time_changed(self._vlc_event(new_time=5000), standby)
+        player._on_paused(Mock(), standby)
+        player._on_error(Mock(), standby)
+        player.sync()
+        
+        changed.assert_not_called()
+        assert player.is_playing is True
+        assert player.length_ms == 0
+        
+        # 入れ替え後は待機中に受け取った長さを使う
+        player.next_track()
+        assert player.length_ms == 200000
+    
+    @patch('src.core.media_player.vlc')
+    def test_crossfade_starts_before_end_and_ramps(self, mock_vlc):
+        """時間イベントを基準に曲の終わりの手前でフェードを始め、音量を入れ替えるテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        changed = Mock()
+        player.set_on_track_change_callback(changed)
+        player.play_current()
+        fader = Crossfader(player, 4.0)
+        
+        fader._handle(("length", primary, 180000, 0.0))
+        fader._handle(("time", primary, 170000, 0.0))
+        # 残り10秒: 次の曲を開き、フェード開始位置（残り4秒）まで眠る
+        assert fader._tick(0.0) == pytest.approx(6.0)
+        standby.set_media.assert_called_once()
+        standby.set_pause.assert_not_called()
+        
+        # イベントの間は時計で補間し、残り4秒でフェードを開始
+        assert fader._tick(6.0) == Crossfader.STEP
+        standby.audio_set_volume.assert_called_with(0)
+        standby.set_pause.assert_called_once_with(0)
+        primary.stop.assert_not_called()
+        assert player.player is standby
+        assert player.current_index == 1
+        changed.assert_called_once()
+        
+        fader._tick(8.0)
+        primary.audio_set_volume.assert_called_with(71)
+        standby.audio_set_volume.assert_called_with(71)
+        
+        assert fader._tick(10.0) is None
+        primary.stop.assert_called_once()
+        standby.audio_set_volume.assert_called_with(100)
+        assert player.is_fading is False
+    
+    @patch('src.core.media_player.vlc')
+    def test_crossfade_needs_preloaded_next_track(self, mock_vlc):
+        """次の曲を開けていない場合はクロスフェードしないテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.playlist[1].audio_url = ""
+        player.play_current()
+        fader = Crossfader(player, 4.0)
+        
+        fader._handle(("length", primary, 180000, 0.0))
+        fader._handle(("time", primary, 178000, 0.0))
+        
+        assert fader._tick(0.0) is None
+        assert player.player is primary
+        assert player.is_fading is False
+    
+    @patch('src.core.media_player.vlc')
+    def test_skip_during_crossfade_stops_outgoing(self, mock_vlc):
+        """クロスフェード中の曲送りで前の曲を止め、フェードを打ち切るテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        player.preload_next()
+        assert player.begin_crossfade() is True
+        assert player.is_fading is True
+        
+        player.current_index = 2
+        assert player.play_current() is True
+        
+        primary.stop.assert_called_once()
+        standby.audio_set_volume.assert_called_with(100)
+        assert player.is_fading is False
+    
+    @patch('src.core.media_player.vlc')
+    def test_crossfade_duration_clamped(self, mock_vlc):
+        """クロスフェードの秒数が0-12秒に丸められるテスト"""
+        player = MediaPlayer()
+        assert player.crossfade == 0.0
+        
+        player.set_crossfade(30)
+        assert player.crossfade == Crossfader.MAX_DURATION
+        player.set_crossfade(-1)
+        assert player.crossfade == 0.0
+        player.close()
+    
+    def test_equal_power_gains(self):
+        """等パワーの曲線で合計のパワーが一定に保たれるテスト"""
+        assert equal_power_gains(0.0) == pytest.approx((1.0, 0.0))
+        assert equal_power_gains(1.0) == pytest.approx((0.0, 1.0))
+        out_gain, in_gain = equal_power_gains(0.3)
+        assert out_gain ** 2 + in_gain ** 2 == pytest.approx(1.0)
+    
+    @patch('src.core.media_player.vlc')
+    def test_play_current_prefers_cached_audio(self, mock_vlc, sample_video_info, tmp_path):
+        """キャッシュ済みの曲はローカルファイルから再生されるテスト"""
+        cache = Mock()
+        cache.get_path.return_value = tmp_path / "abc.audio"
+        player = MediaPlayer(audio_cache=cache)
+        player.add_to_playlist(sample_video_info)
+        
+        assert player.play_current() is True
+        
+        player.instance.media_new.assert_called_once_with(str(tmp_path / "abc.audio"))
+        cache.schedule_download.assert_not_called()
+    
+    @patch('src.core.media_player.vlc')
+    def test_play_current_caches_streamed_audio(self, mock_vlc, sample_video_info):
+        """ストリームから再生した曲がキャッシュに保存されるテスト"""
+        cache = Mock()
+        cache.get_path.return_value = None
+        player = MediaPlayer(audio_cache=cache)
+        player.add_to_playlist(sample_video_info)
+        
+        assert player.play_current() is True
+        
+        player.instance.media_new.assert_called_once_with(sample_video_info.audio_url)
+        cache.schedule_download.assert_called_once_with(
+            sample_video_info.video_id, sample_video_info.audio_url
+        )
+    
+    @patch('src.core.media_player.vlc')
+    def test_play_current_through_stream_proxy(self, mock_vlc, sample_video_info):
+        """プロキシがある場合はプロキシのURLを再生するテスト"""
+        proxy = Mock()
+        proxy.url_for.return_value = "http://127.0.0.1:8000/stream/dQw4w9WgXcQ"
+        sample_video_info.video_id = "dQw4w9WgXcQ"
+        player = MediaPlayer(stream_proxy=proxy)
+        player.add_to_playlist(sample_video_info)
+        
+        assert player.play_current() is True
+        
+        proxy.url_for.assert_called_once_with(sample_video_info)
+        player.instance.media_new.assert_called_once_with("http://127.0.0.1:8000/stream/dQw4w9WgXcQ")
+    
+    @patch('src.core.media_player.vlc')
+    def test_proxied_audio_is_not_downloaded_again(self, mock_vlc, sample_video_info):
+        """プロキシが音声キャッシュへ渡す曲はキャッシュ用に別途ダウンロードしないテスト"""
+        cache = Mock()
+        cache.get_path.return_value = None
+        proxy = Mock()
+        proxy.audio_cache = cache
+        proxy.has_head.return_value = False
+        sample_video_info.video_id = "dQw4w9WgXcQ"
+        player = MediaPlayer(audio_cache=cache, stream_proxy=proxy)
+        player.add_to_playlist(sample_video_info)
+        
+        assert player.play_current() is True
+        
+        proxy.url_for.assert_called_once_with(sample_video_info)
+        cache.schedule_download.assert_not_called()
+    
+    @patch('src.core.media_player.vlc')
+    def test_warm_head_shortens_buffering(self, mock_vlc, sample_video_info):
+        """先頭を先読み済みの曲はバッファ時間を短くして再生するテスト"""
+        proxy = Mock()
+        proxy.has_head.return_value = True
+        sample_video_info.video_id = "dQw4w9WgXcQ"
+        player = MediaPlayer(stream_proxy=proxy)
+        player.add_to_playlist(sample_video_info)
+        
+        assert player.play_current() is True
+        
+        media = player.instance.media_new.return_value
+        options = [c.args[0] for c in media.add_option.call_args_list]
+        assert options == [f":network-caching={MediaPlayer.WARM_NETWORK_CACHING_MS}", ":file-caching=300"]
+    
+    @patch('src.core.media_player.vlc')
+    def test_buffering_profile_by_source(self, mock_vlc, sample_video_info, tmp_path):
+        """キャッシュ済みの曲は低遅延、ストリームは選択中のバッファ設定で開くテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        source = tmp_path / "cached.src"
+        source.write_bytes(b"audio")
+        cache.store("cached", source)
+        player = MediaPlayer(audio_cache=cache, buffering_profile="resilient")
+        cached = VideoInfo("https://youtu.be/cached", "cached", video_id="cached")
+        cached.is_placeholder = True
+        player.add_to_playlist(cached)
+        player.add_to_playlist(sample_video_info)
+        
+        def opened_options():
+            media = player.instance.media_new.return_value
+            options = [c.args[0] for c in media.add_option.call_args_list]
+            media.add_option.reset_mock()
+            return options
+        
+        mock_vlc.Instance.assert_called_once_with(
+            '--intf=dummy', '--no-video', '--quiet', '--no-sout-all', '--sout-keep',
+            '--network-caching=5000', '--file-caching=1000', '--http-reconnect'
+        )
+        assert player.play_current() is True
+        assert opened_options() == [":network-caching=300", ":file-caching=50"]
+        assert player.next_track() is True
+        assert opened_options() == [":network-caching=5000", ":file-caching=1000", ":http-reconnect"]
+        
+        # 実行中に切り替えると次に開く曲から反映
+        player.set_buffering_profile("low-latency")
+        assert player.previous_track() is True
+        assert player.next_track() is True
+        assert opened_options()[-2:] == [":network-caching=300", ":file-caching=50"]
+        with pytest.raises(ValueError):
+            player.set_buffering_profile("huge")
+        cache.close()
+    
+    @patch('src.core.media_player.vlc')
+    def test_buffering_profile_switch_reopens_standby(self, mock_vlc):
+        """バッファ設定を切り替えると以前の設定で開いた次の曲を閉じるテスト"""
+        player, primary, standby = self._make_gapless_player(mock_vlc)
+        player.play_current()
+        assert player.preload_next() is True
+        
+        player.set_buffering_profile("resilient")
+        
+        standby.stop.assert_called()
+        assert player._standby_video is None
+        assert player.preload_next() is True
+    
+    @patch('src.core.media_player.vlc')
+    def test_playlist_entries_are_pinned(self, mock_vlc, sample_video_info, tmp_path):
+        """プレイリストにある曲がピン留めされるテスト"""
+        sample_video_info.video_id = "dQw4w9WgXcQ"
+        cache = AudioCache(cache_dir=tmp_path)
+        player = MediaPlayer(audio_cache=cache)
+        
+        player.add_to_playlist(sample_video_info)
+        player.add_to_playlist(sample_video_info)
+        assert cache.is_pinned(sample_video_info.video_id)
+        
+        player.remove_from_playlist(0)
+        assert cache.is_pinned(sample_video_info.video_id)
+        
+        player.clear_playlist()
+        assert not cache.is_pinned(sample_video_info.video_id)
+        cache.close()
+    
     @patch('src.core.media_player.vlc')
     def test_remove_from_playlist_valid_index(self, mock_vlc, sample_video_info):
         """有効なインデックスでプレイリストから削除するテスト"""
@@ -131,6 +648,30 @@ class TestMediaPlayer:
         assert player.current_index == 0
         assert player.current_video is None
     
+    @patch('src.core.media_player.vlc')
+    def test_skip_opens_only_target_track(self, mock_vlc):
+        """複数曲を飛ばしても開くのは移動先の曲だけのテスト"""
+        player = MediaPlayer()
+        for i in range(8):
+            video = VideoInfo(f"https://youtu.be/t{i}", f"t{i}", audio_url=f"https://example.com/t{i}.mp3",
+                              video_id=f"t{i}")
+            video.is_loaded = True
+            player.add_to_playlist(video)
+        player.play_current()
+        player.instance.media_new.reset_mock()
+        
+        assert player.skip(5) is True
+        assert player.current_video.title == "t5"
+        player.instance.media_new.assert_called_once_with("https://example.com/t5.mp3")
+        
+        # 末尾を超える場合は最後の曲まで、戻る場合は先頭まで
+        assert player.skip(10) is True
+        assert player.current_video.title == "t7"
+        assert player.skip(-3) is True
+        assert player.current_video.title == "t4"
+        player.current_index = 7
+        assert player.skip_index(1) is None
+    
     @patch('src.core.media_player.vlc')
     def test_set_position_valid_range(self, mock_vlc):
         """有効範囲内での再生位置設定のテスト"""
@@ -157,6 +698,139 @@ class TestMediaPlayer:
         player.player.set_position.assert_called_with(0.0)
 
 
+class FakeClock:
+    """テストから進める時計"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeVLCPlayer:
+    """時計に合わせて再生位置が進むVLCのプレイヤーの代用"""
+    
+    def __init__(self, clock: FakeClock, length_ms: int):
+        self.clock = clock
+        self.length_ms = length_ms
+        self.playing = False
+        self.seeks = []
+        self._base = 0
+        self._since = 0.0
+    
+    def event_manager(self):
+        return Mock()
+    
+    def set_media(self, media):
+        self._base = 0
+    
+    def play(self):
+        self.playing = True
+        self._since = self.clock()
+    
+    def pause(self):
+        self._base = self.get_time()
+        self._since = self.clock()
+        self.playing = not self.playing
+    
+    def stop(self):
+        self.playing = False
+    
+    def get_time(self) -> int:
+        elapsed = round((self.clock() - self._since) * 1000) if self.playing else 0
+        return min(self._base + elapsed, self.length_ms)
+    
+    def set_time(self, time_ms: int):
+        self._base = time_ms
+        self._since = self.clock()
+        self.seeks.append(time_ms)
+    
+    def audio_set_volume(self, volume: int):
+        pass
+
+
+class TestSeeking:
+    """ミリ秒単位のシークのテスト（時計で再生位置が進むプレイヤーで検証）"""
+    
+    def _make_player(self, mock_vlc, length_ms: int = 180000):
+        clock = FakeClock()
+        backend = FakeVLCPlayer(clock, length_ms)
+        mock_vlc.Instance.return_value.media_player_new.return_value = backend
+        player = MediaPlayer(clock=clock)
+        video = VideoInfo("https://youtu.be/t0", "t0", audio_url="https://example.com/t0.mp3", video_id="t0")
+        video.is_loaded = True
+        player.add_to_playlist(video)
+        player.play_current()
+        player._on_length_changed(TestMediaPlayer._vlc_event(new_length=length_ms), backend)
+        return player, backend, clock
+    
+    def _emit_time(self, player, backend):
+        """VLCと同様に現在の再生位置を通知"""
+        player._on_time_changed(TestMediaPlayer._vlc_event(new_time=backend.get_time()), backend)
+        player.sync()
+    
+    @patch('src.core.media_player.vlc')
+    def test_relative_seek_from_interpolated_position(self, mock_vlc):
+        """最後のイベント後の経過時間を含む再生位置から秒単位でシークするテスト"""
+        player, backend, clock = self._make_player(mock_vlc)
+        clock.advance(10.0)
+        self._emit_time(player, backend)
+        clock.advance(0.25)
+        
+        assert player.position_ms == 10250
+        assert player.seek_relative(5) is True
+        assert backend.get_time() == 15250
+        
+        # イベントを待たずに続けたシークは前のシークの位置から数える
+        assert player.seek_relative(5) is True
+        assert player.seek_relative(-2.5) is True
+        assert backend.seeks == [15250, 20250, 17750]
+        assert player.time_ms == 17750
+    
+    @patch('src.core.media_player.vlc')
+    def test_seek_clamped_to_track(self, mock_vlc):
+        """曲の先頭・末尾を超えるシークは曲の範囲に丸められるテスト"""
+        player, backend, clock = self._make_player(mock_vlc, length_ms=200000)
+        clock.advance(3.0)
+        self._emit_time(player, backend)
+        
+        assert player.seek_relative(-60) is True
+        assert backend.get_time() == 0
+        assert player.seek_to(10 ** 9) is True
+        assert backend.get_time() == 200000
+        assert player.seek_to(83456) is True
+        assert backend.get_time() == 83456
+    
+    @patch('src.core.media_player.vlc')
+    def test_interpolation_stops_when_not_advancing(self, mock_vlc):
+        """一時停止中は補間せず、イベントが途絶えた場合も補間に上限があるテスト"""
+        player, backend, clock = self._make_player(mock_vlc)
+        clock.advance(30.0)
+        self._emit_time(player, backend)
+        
+        clock.advance(10.0)
+        assert player.position_ms == 30000 + MediaPlayer.MAX_INTERPOLATION_MS
+        
+        player.pause()
+        self._emit_time(player, backend)
+        clock.advance(5.0)
+        assert player.position_ms == backend.get_time() == 40000
+        assert player.seek_relative(5) is True
+        assert backend.get_time() == 45000
+    
+    @patch('src.core.media_player.vlc')
+    def test_seek_without_track(self, mock_vlc):
+        """再生中の曲がない場合はシークしないテスト"""
+        player = MediaPlayer()
+        
+        assert player.seek_to(1000) is False
+        assert player.seek_relative(5) is False
+        player.player.set_time.assert_not_called()
+
 class TestYouTubeDownloader:
     """YouTubeDownloaderクラスのテスト"""
     
@@ -177,17 +851,17 @@ class TestYouTubeDownloader:
         """youtube.comの有効URLテスト"""
         downloader = YouTubeDownloader()
         
-        assert downloader._is_youtube_url("https://www.youtube.com/watch?v=test") is True
-        assert downloader._is_youtube_url("http://youtube.com/watch?v=test") is True
-        assert downloader._is_youtube_url("youtube.com/watch?v=test") is True
+        assert downloader._is_youtube_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ") is True
+        assert downloader._is_youtube_url("http://youtube.com/watch?v=dQw4w9WgXcQ") is True
+        assert downloader._is_youtube_url("youtube.com/watch?v=dQw4w9WgXcQ") is True
     
     def test_is_youtube_url_valid_youtu_be(self):
         """youtu.beの有効URLテスト"""
         downloader = YouTubeDownloader()
         
-        assert downloader._is_youtube_url("https://youtu.be/test") is True
-        assert downloader._is_youtube_url("http://youtu.be/test") is True
-        assert downloader._is_youtube_url("youtu.be/test") is True
+        assert downloader._is_youtube_url("https://youtu.be/dQw4w9WgXcQ") is True
+        assert downloader._is_youtube_url("http://youtu.be/dQw4w9WgXcQ") is True
+        assert downloader._is_youtube_url("youtu.be/dQw4w9WgXcQ") is True
     
     def test_is_youtube_url_invalid(self):
         """無効URLテスト"""
@@ -196,13 +870,15 @@ class TestYouTubeDownloader:
         assert downloader._is_youtube_url("https://example.com/video") is False
         assert downloader._is_youtube_url("https://vimeo.com/123456") is False
         assert downloader._is_youtube_url("") is False
+        assert downloader._is_youtube_url("https://notyoutube.com/watch?v=dQw4w9WgXcQ") is False
+        assert downloader._is_youtube_url("https://www.youtube.com/") is False
     
     def test_validate_url_valid(self):
         """有効URL検証のテスト"""
         downloader = YouTubeDownloader()
         
-        assert downloader.validate_url("https://www.youtube.com/watch?v=test") is True
-        assert downloader.validate_url("https://youtu.be/test") is True
+        assert downloader.validate_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ") is True
+        assert downloader.validate_url("https://youtu.be/dQw4w9WgXcQ") is True
     
     def test_validate_url_invalid(self):
         """無効URL検証のテスト"""
@@ -216,7 +892,7 @@ class TestYouTubeDownloader:
         """空白文字を含むURL検証のテスト"""
         downloader = YouTubeDownloader()
         
-        assert downloader.validate_url("  https://www.youtube.com/watch?v=test  ") is True
+        assert downloader.validate_url("  https://www.youtube.com/watch?v=dQw4w9WgXcQ  ") is True
         assert downloader.validate_url("   ") is False
     
     @pytest.mark.asyncio
@@ -239,27 +915,20 @@ class TestYouTubeDownloader:
         assert result is None
     
     @pytest.mark.asyncio
-    @patch('src.core.youtube_downloader.yt_dlp.YoutubeDL')
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
     async def test_get_video_info_success(self, mock_yt_dlp, mock_yt_dlp_info):
         """成功時の動画情報取得テスト"""
         downloader = YouTubeDownloader()
         
         # YoutubeDLのモック設定
         mock_ydl_instance = Mock()
-        mock_yt_dlp.return_value.__enter__.return_value = mock_ydl_instance
+        mock_yt_dlp.return_value = mock_ydl_instance
         mock_ydl_instance.extract_info.return_value = mock_yt_dlp_info
         
-        # asyncio.get_event_loop().run_in_executor をモック
-        with patch('asyncio.get_event_loop') as mock_get_loop:
-            mock_loop = Mock()
-            mock_get_loop.return_value = mock_loop
-            mock_loop.run_in_executor.return_value = asyncio.Future()
-            mock_loop.run_in_executor.return_value.set_result(mock_yt_dlp_info)
-            
-            result = await downloader.get_video_info("https://www.youtube.com/watch?v=test")
+        result = await downloader.get_video_info("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
         
         assert result is not None
-        assert result.url == "https://www.youtube.com/watch?v=test"
+        assert result.url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
         assert result.title == "Test Video Title"
         assert result.duration == 180
         assert result.channel == "Test Channel"
@@ -267,45 +936,993 @@ class TestYouTubeDownloader:
         assert result.is_loaded is True
     
     @pytest.mark.asyncio
-    @patch('src.core.youtube_downloader.yt_dlp.YoutubeDL')
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
     async def test_get_video_info_no_info(self, mock_yt_dlp):
         """情報取得失敗時のテスト"""
         downloader = YouTubeDownloader()
         
         # YoutubeDLのモック設定（None を返す）
         mock_ydl_instance = Mock()
-        mock_yt_dlp.return_value.__enter__.return_value = mock_ydl_instance
+        mock_yt_dlp.return_value = mock_ydl_instance
         mock_ydl_instance.extract_info.return_value = None
         
-        # asyncio.get_event_loop().run_in_executor をモック
-        with patch('asyncio.get_event_loop') as mock_get_loop:
-            mock_loop = Mock()
-            mock_get_loop.return_value = mock_loop
-            mock_loop.run_in_executor.return_value = asyncio.Future()
-            mock_loop.run_in_executor.return_value.set_result(None)
-            
-            result = await downloader.get_video_info("https://www.youtube.com/watch?v=test")
+        result = await downloader.get_video_info("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
         
         assert result is None
     
     @pytest.mark.asyncio
-    @patch('src.core.youtube_downloader.yt_dlp.YoutubeDL')
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
     async def test_get_video_info_exception(self, mock_yt_dlp):
         """例外発生時のテスト"""
         downloader = YouTubeDownloader()
         
         # YoutubeDLのモック設定（例外を発生させる）
         mock_ydl_instance = Mock()
-        mock_yt_dlp.return_value.__enter__.return_value = mock_ydl_instance
+        mock_yt_dlp.return_value = mock_ydl_instance
         mock_ydl_instance.extract_info.side_effect = Exception("Test error")
         
-        # asyncio.get_event_loop().run_in_executor をモック
-        with patch('asyncio.get_event_loop') as mock_get_loop:
-            mock_loop = Mock()
-            mock_get_loop.return_value = mock_loop
-            mock_loop.run_in_executor.return_value = asyncio.Future()
-            mock_loop.run_in_executor.return_value.set_exception(Exception("Test error"))
-            
-            result = await downloader.get_video_info("https://www.youtube.com/watch?v=test")
+        result = await downloader.get_video_info("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        
+        assert result is None
+    
+    @pytest.mark.asyncio
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
+    async def test_get_video_info_uses_metadata_cache(self, mock_yt_dlp, mock_yt_dlp_info, tmp_path):
+        """2回目以降はキャッシュから動画情報を返すテスト"""
+        downloader = YouTubeDownloader(metadata_cache=MetadataCache(cache_dir=tmp_path))
+        
+        mock_ydl_instance = Mock()
+        mock_yt_dlp.return_value = mock_ydl_instance
+        mock_ydl_instance.extract_info.return_value = mock_yt_dlp_info
+        
+        first = await downloader.get_video_info("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        second = await downloader.get_video_info("https://youtu.be/dQw4w9WgXcQ")
+        
+        assert mock_ydl_instance.extract_info.call_count == 1
+        assert first.video_id == second.video_id == "dQw4w9WgXcQ"
+        assert second.url == "https://youtu.be/dQw4w9WgXcQ"
+        assert second.title == "Test Video Title"
+        assert second.is_valid() is True
+        
+        with patch('src.core.media_player.vlc'):
+            assert MediaPlayer().add_to_playlist(second) is True
+    
+    def test_extract_video_id(self):
+        """動画ID抽出のテスト"""
+        downloader = YouTubeDownloader()
+        
+        assert downloader._extract_video_id("https://www.youtube.com/watch?v=abcdefghijk&t=10") == "abcdefghijk"
+        assert downloader._extract_video_id("youtu.be/abcdefghijk") == "abcdefghijk"
+        assert downloader._extract_video_id("https://m.youtube.com/shorts/abcdefghijk") == "abcdefghijk"
+        assert downloader._extract_video_id("https://www.youtube.com/") == ""
+
+    
+    @pytest.mark.asyncio
+    async def test_get_video_info_skips_expiring_cache_entry(self, tmp_path):
+        """失効間近のストリームURLはキャッシュから返さないテスト"""
+        cache = MetadataCache(cache_dir=tmp_path)
+        cache.put("abcdefghijk", {
+            'url': "https://youtu.be/abcdefghijk", 'title': "Cached",
+            'audio_url': "https://rr1.googlevideo.com/videoplayback?expire=1"
+        })
+        downloader = YouTubeDownloader(metadata_cache=cache)
+        fresh = VideoInfo("https://youtu.be/abcdefghijk", "Fresh", audio_url="https://example.com/a.mp3")
+        downloader._fetch_video_info = AsyncMock(return_value=fresh)
+        
+        result = await downloader.get_video_info("https://youtu.be/abcdefghijk")
+        
+        assert result.title == "Fresh"
+        downloader._fetch_video_info.assert_called_once_with("https://youtu.be/abcdefghijk", "abcdefghijk")
+    
+    @pytest.mark.asyncio
+    async def test_offline_serves_stale_metadata_without_network(self, tmp_path):
+        """オフラインモードでは失効したエントリもキャッシュから返し、抽出しないテスト"""
+        cache = MetadataCache(cache_dir=tmp_path, stale_ttl=3600)
+        cache.put("abcdefghijk", {
+            'url': "https://youtu.be/abcdefghijk", 'title': "Cached", 'video_id': "abcdefghijk",
+            'audio_url': "https://rr1.googlevideo.com/videoplayback?expire=1"
+        })
+        downloader = YouTubeDownloader(metadata_cache=cache)
+        downloader.offline = True
+        downloader._fetch_video_info = AsyncMock()
+        video = VideoInfo("https://youtu.be/abcdefghijk", "Cached", video_id="abcdefghijk")
+        
+        result = await downloader.get_video_info("https://youtu.be/abcdefghijk")
+        
+        assert result.title == "Cached"
+        assert await downloader.get_video_info("https://youtu.be/missing") is None
+        assert await downloader.resolve_stream(video) is False
+        assert await downloader.expand_playlist("https://www.youtube.com/playlist?list=PL1") == []
+        downloader._fetch_video_info.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_resolve_stream_updates_video_in_place(self, sample_video_info):
+        """ストリームURL再取得で動画情報が更新されるテスト"""
+        downloader = YouTubeDownloader()
+        fresh = VideoInfo(
+            sample_video_info.url, "Test Video Title",
+            audio_url="https://rr1.googlevideo.com/videoplayback?expire=2000000000",
+            video_id="dQw4w9WgXcQ"
+        )
+        downloader._fetch_video_info = AsyncMock(return_value=fresh)
+        
+        result = await downloader.resolve_stream(sample_video_info)
+        
+        assert result is True
+        assert sample_video_info.audio_url == fresh.audio_url
+        assert sample_video_info.expires_at == 2000000000.0
+        assert sample_video_info.video_id == "dQw4w9WgXcQ"
+    
+    @pytest.mark.asyncio
+    async def test_resolve_stream_resolves_placeholder(self):
+        """仮エントリが解決され、欠けている項目が補われるテスト"""
+        downloader = YouTubeDownloader()
+        placeholder = VideoInfo("https://www.youtube.com/watch?v=abcdefghijk", "Listed", video_id="abcdefghijk")
+        placeholder.is_placeholder = True
+        fresh = VideoInfo(placeholder.url, "Full", duration=215, channel="Channel",
+                          audio_url="https://example.com/a.mp3", video_id="abcdefghijk")
+        downloader._fetch_video_info = AsyncMock(return_value=fresh)
+        
+        assert await downloader.resolve_stream(placeholder) is True
+        
+        assert placeholder.is_placeholder is False
+        assert placeholder.is_loaded is True
+        assert placeholder.title == "Listed"
+        assert placeholder.duration == 215
+        assert placeholder.channel == "Channel"
+        assert not placeholder.needs_resolution()
+    
+    @pytest.mark.asyncio
+    async def test_expand_playlist(self):
+        """プレイリストが1回の一覧取得で仮エントリに展開されるテスト"""
+        downloader = YouTubeDownloader()
+        downloader.extractor_pool.extract_playlist = AsyncMock(return_value=[
+            {'id': "a1", 'title': "First", 'duration': 61.0, 'channel': "Ch"},
+            {'id': "b2", 'title': None, 'duration': None, 'channel': None},
+        ])
+        downloader._fetch_video_info = AsyncMock()
+        
+        videos = await downloader.expand_playlist("https://www.youtube.com/watch?v=zzzzzzzzzzz&list=PLabc")
+        
+        downloader.extractor_pool.extract_playlist.assert_called_once_with(
+            "https://www.youtube.com/playlist?list=PLabc"
+        )
+        downloader._fetch_video_info.assert_not_called()
+        assert [v.url for v in videos] == [
+            "https://www.youtube.com/watch?v=a1", "https://www.youtube.com/watch?v=b2"
+        ]
+        assert (videos[0].title, videos[0].duration, videos[0].channel) == ("First", 61, "Ch")
+        assert videos[1].title == "Unknown Title"
+        assert all(v.is_placeholder and v.needs_resolution() for v in videos)
+    
+    @pytest.mark.asyncio
+    async def test_expand_playlist_failure(self):
+        """一覧取得に失敗した場合・プレイリストでないURLの場合は空リストのテスト"""
+        downloader = YouTubeDownloader()
+        downloader.extractor_pool.extract_playlist = AsyncMock(side_effect=Exception("network"))
+        
+        assert await downloader.expand_playlist("https://www.youtube.com/playlist?list=PLabc") == []
+        assert await downloader.expand_playlist("https://youtu.be/abcdefghijk") == []
+    
+    @pytest.mark.asyncio
+    async def test_resolve_stream_failure(self, sample_video_info):
+        """ストリームURL再取得失敗時のテスト"""
+        downloader = YouTubeDownloader()
+        downloader._fetch_video_info = AsyncMock(return_value=None)
+        original_url = sample_video_info.audio_url
+        
+        assert await downloader.resolve_stream(sample_video_info) is False
+        assert sample_video_info.audio_url == original_url
+    
+    def test_resolve_stream_blocking(self, sample_video_info):
+        """イベントループを使わずにストリームURLを再取得するテスト"""
+        downloader = YouTubeDownloader()
+        downloader.extractor_pool.extract_info = Mock(return_value={
+            'id': "dQw4w9WgXcQ", 'title': "Fresh", 'duration': 180, 'uploader': "Channel",
+            'url': "https://rr1.googlevideo.com/videoplayback?expire=2000000000",
+        })
+        
+        assert downloader.resolve_stream_blocking(sample_video_info, timeout=5) is True
+        
+        assert sample_video_info.expires_at == 2000000000.0
+        assert downloader.metadata_cache.get("dQw4w9WgXcQ") is not None
+        
+        downloader.extractor_pool.extract_info = Mock(side_effect=Exception("network"))
+        assert downloader.resolve_stream_blocking(sample_video_info, timeout=5) is False
+        downloader.offline = True
+        assert downloader.resolve_stream_blocking(sample_video_info) is False
+        downloader.close()
+
+    
+    @pytest.mark.asyncio
+    async def test_iter_video_infos_yields_in_submission_order(self):
+        """一括取得の結果が投入順に返り、同時取得数が制限されるテスト"""
+        downloader = YouTubeDownloader()
+        delays = {"a": 0.03, "b": 0.01, "c": 0.0, "d": 0.02}
+        active = 0
+        peak = 0
+        
+        async def fake_get_video_info(url):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(delays[url[-1]])
+            active -= 1
+            if url.endswith("c"):
+                return None
+            return VideoInfo(url, url[-1], audio_url="https://example.com/a.mp3")
+        
+        downloader.get_video_info = fake_get_video_info
+        urls = [f"https://youtu.be/{name * 11}" for name in "abcd"] + ["https://example.com/x"]
+        
+        results = [r async for r in downloader.iter_video_infos(urls, max_concurrency=2)]
+        
+        assert [r.index for r in results] == [0, 1, 2, 3, 4]
+        assert [r.ok for r in results] == [True, True, False, True, False]
+        assert results[2].error == "動画情報の取得に失敗しました"
+        assert results[4].error == "無効なYouTube URLです"
+        assert peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_iter_video_infos_reports_exceptions(self):
+        """一括取得中の例外が結果として返るテスト"""
+        downloader = YouTubeDownloader()
+        downloader.get_video_info = AsyncMock(side_effect=Exception("boom"))
+        
+        results = [r async for r in downloader.iter_video_infos(["https://youtu.be/aaaaaaaaaaa"])]
+        
+        assert len(results) == 1
+        assert results[0].ok is False
+        assert results[0].error == "boom"
+    
+    @pytest.mark.asyncio
+    async def test_iter_video_infos_expands_playlist_urls(self):
+        """一括取得でプレイリストURLが動画の取得ではなく仮エントリの展開に回されるテスト"""
+        downloader = YouTubeDownloader()
+        placeholders = [VideoInfo(f"https://www.youtube.com/watch?v={name * 11}", name) for name in "xy"]
+        downloader.expand_playlist = AsyncMock(side_effect=[placeholders, []])
+        downloader.get_video_info = AsyncMock(
+            return_value=VideoInfo("https://youtu.be/aaaaaaaaaaa", "A", audio_url="https://example.com/a.mp3")
+        )
+        urls = [
+            "https://youtu.be/aaaaaaaaaaa",
+            "https://www.youtube.com/playlist?list=PLabc",
+            "https://www.youtube.com/playlist?list=PLempty",
+        ]
+        
+        results = [r async for r in downloader.iter_video_infos(urls)]
+        
+        downloader.get_video_info.assert_called_once_with(urls[0])
+        assert [c.args[0] for c in downloader.expand_playlist.call_args_list] == urls[1:]
+        assert results[0].video.title == "A"
+        assert results[1].ok is True
+        assert results[1].videos == placeholders
+        assert results[2].ok is False
+        assert results[2].error == "プレイリストの取得に失敗しました"
+
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_extraction(self):
+        """同じ動画への同時リクエストが1回の抽出にまとめられるテスト"""
+        downloader = YouTubeDownloader()
+        release = asyncio.Event()
+        calls = []
+        
+        async def slow_fetch(url, video_id):
+            calls.append(url)
+            await release.wait()
+            return VideoInfo(url, "Shared", audio_url="https://example.com/a.mp3", video_id=video_id)
+        
+        downloader._fetch_video_info = slow_fetch
+        urls = [
+            "https://youtu.be/abcdefghijk",
+            "https://www.youtube.com/watch?v=abcdefghijk&t=10",
+            "https://m.youtube.com/watch?v=abcdefghijk",
+        ]
+        
+        tasks = [asyncio.ensure_future(downloader.get_video_info(url)) for url in urls]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        
+        assert len(calls) == 1
+        assert [r.title for r in results] == ["Shared"] * 3
+        assert [r.url for r in results] == urls
+        assert len({id(r) for r in results}) == 3
+    
+    def test_video_key(self):
+        """重複判定キーのテスト"""
+        downloader = YouTubeDownloader()
+        
+        assert downloader.video_key("https://youtu.be/abcdefghijk") == "abcdefghijk"
+        assert downloader.video_key(" https://www.youtube.com/watch?v=abcdefghijk&t=10 ") == "abcdefghijk"
+        assert downloader.video_key("https://www.youtube.com/") == "https://www.youtube.com/"
+
+
+class TestSingleFlight:
+    """SingleFlightクラスのテスト"""
+    
+    @pytest.mark.asyncio
+    async def test_same_key_runs_once(self):
+        """同じキーは1回だけ実行されるテスト"""
+        flights = SingleFlight()
+        release = asyncio.Event()
+        calls = 0
+        
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+        
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        assert flights.in_flight("k") is True
+        
+        release.set()
+        assert await asyncio.gather(first, second) == ["result", "result"]
+        assert calls == 1
+        assert len(flights) == 0
+    
+    @pytest.mark.asyncio
+    async def test_exception_shared_and_forgotten(self):
+        """例外が全待機者に伝わり、次回は再実行されるテスト"""
+        flights = SingleFlight()
+        
+        async def fail():
+            raise ValueError("boom")
+        
+        results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        
+        async def succeed():
+            return "ok"
+        
+        assert await flights.do("k", succeed) == "ok"
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_flight(self):
+        """待機者のキャンセルで共有中の処理が止まらないテスト"""
+        flights = SingleFlight()
+        release = asyncio.Event()
+        
+        async def work():
+            await release.wait()
+            return "done"
+        
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        
+        assert await second == "done"
+
+
+class TestCommandQueue:
+    """CommandQueueクラスのテスト"""
+    
+    def test_commands_run_in_order_on_owner_thread(self):
+        """操作が投入順に所有スレッドで実行されるテスト"""
+        commands = CommandQueue("test-owner")
+        seen = []
+        
+        futures = [commands.post(lambda i=i: seen.append((i, threading.current_thread().name)))
+                   for i in range(20)]
+        commands.sync()
+        
+        assert all(future.done() for future in futures)
+        assert seen == [(i, "test-owner") for i in range(20)]
+        commands.close()
+    
+    def test_nested_call_runs_inline(self):
+        """所有スレッド上での呼び出しはキューを経由せずに実行されるテスト"""
+        commands = CommandQueue()
+        
+        assert commands.call(lambda: commands.call(lambda: commands.is_owner())) is True
+        assert commands.is_owner() is False
+        commands.close()
+    
+    def test_exception_propagates_to_caller(self):
+        """操作の例外が呼び出し元へ送出されるテスト"""
+        commands = CommandQueue()
+        
+        with pytest.raises(ValueError):
+            commands.call(lambda: int("x"))
+        # 例外の後も後続の操作を実行できる
+        assert commands.call(lambda: 42) == 42
+        commands.close()
+    
+    def test_post_after_close_cancelled(self):
+        """停止後に積まれた操作は取り消され、呼び出しはその場で実行されるテスト"""
+        commands = CommandQueue()
+        commands.close()
+        
+        assert commands.post(lambda: None).cancelled()
+        assert commands.call(lambda: 7) == 7
+
+
+class TestCommandCoalescer:
+    """CommandCoalescerクラスのテスト"""
+    
+    @pytest.mark.asyncio
+    async def test_burst_applied_once_within_window(self):
+        """時間内の同じ種類の操作が合計の量で1回だけ、時間内に実行されるテスト"""
+        coalescer = CommandCoalescer(window=0.05)
+        applied = []
+        
+        start = time.monotonic()
+        for _ in range(10):
+            coalescer.submit("seek", 5, applied.append)
+            await asyncio.sleep(0.001)
+        assert applied == []
+        assert coalescer.pending == "seek"
+        while not applied:
+            await asyncio.sleep(0.005)
+        
+        assert applied == [50]
+        assert time.monotonic() - start < 0.5
+        assert coalescer.pending is None
+    
+    @pytest.mark.asyncio
+    async def test_different_kind_flushes_pending(self):
+        """別の種類の操作が届くと待っていた操作を先に実行し、打ち消し合った操作は実行しないテスト"""
+        coalescer = CommandCoalescer(window=10)
+        applied = []
+        
+        coalescer.submit("skip", 1, lambda n: applied.append(("skip", n)))
+        coalescer.submit("skip", 1, lambda n: applied.append(("skip", n)))
+        coalescer.submit("seek", 5, lambda s: applied.append(("seek", s)))
+        coalescer.submit("seek", -5, lambda s: applied.append(("seek", s)))
+        coalescer.flush()
+        
+        assert applied == [("skip", 2)]
+        coalescer.submit("skip", 1, lambda n: applied.append(("skip", n)))
+        coalescer.cancel()
+        assert coalescer.flush() is None
+        assert applied == [("skip", 2)]
+    
+    @pytest.mark.asyncio
+    async def test_zero_window_applies_immediately(self):
+        """まとめる時間が0の場合はその場で実行するテスト"""
+        coalescer = CommandCoalescer(window=0)
+        applied = []
+        
+        coalescer.submit("skip", 1, applied.append)
+        coalescer.submit("skip", 1, applied.append)
+        
+        assert applied == [1, 1]
+
+
+
+class TestExtractorPool:
+    """ExtractorPoolクラスのテスト"""
+    
+    @pytest.mark.asyncio
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
+    async def test_extractor_reused_across_calls(self, mock_yt_dlp, mock_yt_dlp_info, tmp_path):
+        """同じワーカースレッドではYoutubeDLが再利用されるテスト"""
+        mock_yt_dlp.return_value.extract_info.return_value = mock_yt_dlp_info
+        pool = ExtractorPool({'quiet': True}, size=1, cache_dir=tmp_path)
+        
+        for _ in range(3):
+            assert await pool.extract("https://youtu.be/abc") == mock_yt_dlp_info
+        
+        mock_yt_dlp.assert_called_once_with({'quiet': True, 'cachedir': str(tmp_path), 'socket_timeout': 60.0})
+        assert mock_yt_dlp.return_value.extract_info.call_count == 3
+        assert pool.instance_count == 1
+        pool.close()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
+    async def test_one_extractor_per_worker(self, mock_yt_dlp, mock_yt_dlp_info):
+        """ワーカースレッドごとに別のYoutubeDLが生成されるテスト"""
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def blocking_extract(url, download=False):
+            barrier.wait()
+            return mock_yt_dlp_info
+        
+        mock_yt_dlp.side_effect = lambda opts: Mock(extract_info=Mock(side_effect=blocking_extract))
+        pool = ExtractorPool({}, size=2)
+        
+        await asyncio.gather(pool.extract("https://youtu.be/a"), pool.extract("https://youtu.be/b"))
+        
+        assert pool.instance_count == 2
+        pool.close()
+    
+    @patch('src.core.extractor_pool.yt_dlp.YoutubeDL')
+    def test_close_releases_extractors(self, mock_yt_dlp):
+        """close()で生成済みのYoutubeDLが閉じられるテスト"""
+        pool = ExtractorPool({}, size=1)
+        pool.executor.submit(pool.extract_info, "https://youtu.be/a").result()
+        
+        pool.close()
+        
+        mock_yt_dlp.return_value.close.assert_called_once()
+        assert pool.instance_count == 0
+
+    
+    @pytest.mark.asyncio
+    async def test_extract_playlist(self, tmp_path):
+        """プレイリストのエントリ一覧が解決なしで取得されるテスト"""
+        pool = ExtractorPool({}, size=1, cache_dir=tmp_path, extractor_factory=StubExtractor)
+        
+        entries = await pool.extract_playlist("https://www.youtube.com/playlist?list=PLabc")
+        pool.close()
+        
+        assert [e['id'] for e in entries] == ["v0", "v1", "v2"]
+        assert entries[1] == {'id': "v1", 'title': "Track 1", 'duration': 61.0, 'channel': None}
+        assert compact_playlist(None) == []
+    
+    def test_compact_info(self):
+        """情報辞書の軽量化のテスト"""
+        info = StubExtractor({}).extract_info("https://youtu.be/abc")
+        
+        payload = compact_info(info)
+        
+        assert set(payload) == {'id', 'title', 'duration', 'uploader', 'url', 'formats'}
+        assert payload['formats'] == [{
+            'format_id': '251', 'ext': 'webm', 'acodec': 'opus', 'abr': 160,
+            'filesize': None, 'url': "https://example.com/a.webm"
+        }]
+        assert compact_info(payload) == payload
+        assert compact_info(None) is None
+
+
+class TestProcessExtractorPool:
+    """ProcessExtractorPoolクラスのテスト"""
+    
+    @pytest.mark.asyncio
+    async def test_extract_in_worker_process(self, tmp_path):
+        """ワーカープロセスで抽出され、軽量なペイロードが返るテスト"""
+        pool = ProcessExtractorPool({}, size=1, cache_dir=tmp_path, extractor_factory=StubExtractor)
+        try:
+            pool.warm_up()
+            payload = await pool.extract("https://youtu.be/abc")
+        finally:
+            pool.close()
+        
+        assert payload['id'] == "abc"
+        assert payload['title'] != f"pid={os.getpid()}"
+        assert 'description' not in payload
+        assert len(payload['formats']) == 1
+    
+    @pytest.mark.asyncio
+    async def test_extract_playlist_in_worker_process(self, tmp_path):
+        """ワーカープロセスでプレイリストのエントリ一覧が取得されるテスト"""
+        pool = ProcessExtractorPool({}, size=1, cache_dir=tmp_path, extractor_factory=StubExtractor)
+        try:
+            entries = await pool.extract_playlist("https://www.youtube.com/playlist?list=PLabc")
+        finally:
+            pool.close()
+        
+        assert [e['title'] for e in entries] == ["Track 0", "Track 1", "Track 2"]
+    
+    def test_queue_depth_limit(self, tmp_path):
+        """実行中・実行待ちジョブ数の上限のテスト"""
+        pool = ProcessExtractorPool({}, size=1, max_queue=1, cache_dir=tmp_path,
+                                    extractor_factory=StubExtractor)
+        pool.executor = Mock()
+        
+        pool.submit(os.getpid)
+        pool.submit(os.getpid)
+        with pytest.raises(ExtractionQueueFullError):
+            pool.submit(os.getpid)
+    
+    def test_downloader_backend_selection(self):
+        """ダウンローダーの抽出バックエンド切り替えのテスト"""
+        assert isinstance(YouTubeDownloader().extractor_pool, ExtractorPool)
+        
+        downloader = YouTubeDownloader(backend="process")
+        assert isinstance(downloader.extractor_pool, ProcessExtractorPool)
+        downloader.close()
+        
+        with pytest.raises(ValueError, match="不明な抽出バックエンド"):
+            YouTubeDownloader(backend="fiber")
+
+
+class TestExtractionExecutor:
+    """ExtractionExecutorクラスのテスト"""
+    
+    @pytest.mark.asyncio
+    async def test_run_returns_result(self):
+        """ジョブの結果が返るテスト"""
+        executor = ExtractionExecutor(max_workers=2)
+        
+        assert await executor.run(lambda a, b: a + b, 1, 2) == 3
+        executor.shutdown(wait=True, timeout=1)
+    
+    @pytest.mark.asyncio
+    async def test_run_propagates_exception(self):
+        """ジョブの例外が呼び出し元に伝わるテスト"""
+        executor = ExtractionExecutor(max_workers=1)
+        
+        def fail():
+            raise ValueError("bad")
+        
+        with pytest.raises(ValueError, match="bad"):
+            await executor.run(fail)
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_run_timeout(self):
+        """ジョブのタイムアウトのテスト"""
+        executor = ExtractionExecutor(max_workers=1, job_timeout=0.05)
+        release = threading.Event()
+        
+        with pytest.raises(ExtractionTimeoutError):
+            await executor.run(release.wait, 5)
+        
+        release.set()
+        executor.shutdown(wait=True, timeout=1)
+    
+    @pytest.mark.asyncio
+    async def test_run_timeout_excludes_queue_wait(self):
+        """実行待ちの時間はジョブのタイムアウトに含まれないテスト"""
+        executor = ExtractionExecutor(max_workers=1, job_timeout=0.5)
+        
+        # 先のジョブ（0.4秒）の後ろで待つジョブ（0.2秒）は、投入からは0.5秒を超えても成功する
+        first = asyncio.ensure_future(executor.run(time.sleep, 0.4))
+        second = asyncio.ensure_future(executor.run(lambda: time.sleep(0.2) or "done"))
+        
+        assert await first is None
+        assert await second == "done"
+        executor.shutdown(wait=True, timeout=1)
+    
+    def test_queue_depth_limit(self):
+        """実行待ちキューの上限のテスト"""
+        executor = ExtractionExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        started = threading.Event()
+        
+        def block():
+            started.set()
+            release.wait(5)
+        
+        running = executor.submit(block)
+        started.wait(1)
+        queued = executor.submit(lambda: "queued")
+        
+        with pytest.raises(ExtractionQueueFullError):
+            executor.submit(lambda: "overflow")
+        
+        release.set()
+        assert running.result(1) is None
+        assert queued.result(1) == "queued"
+        executor.shutdown(wait=True, timeout=1)
+    
+    def test_shutdown_cancels_pending_jobs_without_waiting(self):
+        """停止時に実行待ちジョブがキャンセルされ、実行中ジョブを待たないテスト"""
+        executor = ExtractionExecutor(max_workers=1, max_queue=4)
+        release = threading.Event()
+        started = threading.Event()
+        
+        def block():
+            started.set()
+            release.wait(5)
+        
+        executor.submit(block)
+        started.wait(1)
+        pending = executor.submit(lambda: "never")
+        
+        executor.shutdown(wait=False)
+        
+        assert pending.cancelled() is True
+        assert all(thread.daemon for thread in executor._threads)
+        with pytest.raises(RuntimeError):
+            executor.submit(lambda: None)
+        release.set()
+
+
+class TestStreamRefresher:
+    """StreamRefresherクラスのテスト"""
+    
+    def _make_video(self, name: str, expire: int) -> VideoInfo:
+        """有効期限付きの動画情報を作成"""
+        video = VideoInfo(
+            f"https://youtu.be/{name}", name,
+            audio_url=f"https://rr1.googlevideo.com/videoplayback?expire={expire}"
+        )
+        video.is_loaded = True
+        return video
+    
+    @patch('src.core.media_player.vlc')
+    def test_collect_due_prioritises_current_and_upcoming(self, mock_vlc):
+        """現在の曲と先読み対象が優先されるテスト"""
+        player = MediaPlayer()
+        now = 1000000
+        # 前の曲, 現在の曲, 次の曲, 先読み範囲外の曲（いずれも20分後に失効）
+        videos = [self._make_video(name, now + 1200) for name in ("prev", "cur", "next", "far")]
+        for video in videos:
+            player.add_to_playlist(video)
+        player.current_index = 1
+        
+        refresher = StreamRefresher(player, Mock(), lookahead=1,
+                                    priority_margin=1800, refresh_margin=600)
+        
+        # 先読み範囲外の曲はまだ更新不要
+        assert [v.title for v in refresher.collect_due(now=now)] == ["cur", "next"]
+        
+        # 全て5分以内に失効する場合は優先度順に並ぶ
+        assert [v.title for v in refresher.collect_due(now=now + 900)] == ["cur", "next", "far", "prev"]
+    
+    @patch('src.core.media_player.vlc')
+    def test_collect_due_follows_shuffle_order(self, mock_vlc):
+        """シャッフル中は隣の行ではなく再生順で次に続く曲が優先されるテスト"""
+        player = MediaPlayer()
+        now = 1000000
+        videos = [self._make_video(f"t{i}", now + 1200) for i in range(20)]
+        for video in videos:
+            player.add_to_playlist(video)
+        player.set_shuffle(True)
+        player.play_current()
+        upcoming = player.upcoming(2)
+        
+        refresher = StreamRefresher(player, Mock(), lookahead=2,
+                                    priority_margin=1800, refresh_margin=600)
+        
+        assert refresher.collect_due(now=now) == [player.current_video] + upcoming
+    
+    @patch('src.core.media_player.vlc')
+    def test_collect_due_ignores_urls_without_expiry(self, mock_vlc, sample_video_info):
+        """有効期限が不明なURLは更新対象外のテスト"""
+        player = MediaPlayer()
+        player.add_to_playlist(sample_video_info)
+        
+        refresher = StreamRefresher(player, Mock())
+        
+        assert refresher.collect_due() == []
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_refresh_due(self, mock_vlc):
+        """更新対象のURLが再取得されるテスト"""
+        player = MediaPlayer()
+        expired = self._make_video("old", 1)
+        player.add_to_playlist(expired)
+        
+        downloader = Mock()
+        downloader.resolve_stream = AsyncMock(return_value=True)
+        refresher = StreamRefresher(player, downloader)
+        
+        assert await refresher.refresh_due() == 1
+        downloader.resolve_stream.assert_called_once_with(expired)
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_refresh_due_continues_after_error(self, mock_vlc):
+        """更新中の例外で他の曲の更新が止まらないテスト"""
+        player = MediaPlayer()
+        first = self._make_video("first", 1)
+        second = self._make_video("second", 1)
+        player.add_to_playlist(first)
+        player.add_to_playlist(second)
+        
+        downloader = Mock()
+        downloader.resolve_stream = AsyncMock(side_effect=[Exception("network"), True])
+        refresher = StreamRefresher(player, downloader)
+        
+        assert await refresher.refresh_due() == 1
+        assert downloader.resolve_stream.call_count == 2
+    
+    @patch('src.core.media_player.vlc')
+    def test_collect_due_skips_placeholders(self, mock_vlc):
+        """未解決の仮エントリは更新対象外（再生時の解決と先読みに任せる）のテスト"""
+        player = MediaPlayer()
+        for i in range(10):
+            video = VideoInfo(f"https://youtu.be/v{i}", f"v{i}", video_id=f"v{i}")
+            video.is_placeholder = True
+            player.add_to_playlist(video)
+        player.current_index = 4
+        
+        refresher = StreamRefresher(player, Mock(), lookahead=2)
+        
+        assert refresher.collect_due() == []
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_failed_refresh_is_retried_later(self, mock_vlc):
+        """再取得に失敗した曲は retry_delay の間は再試行されないテスト"""
+        player = MediaPlayer()
+        video = self._make_video("gone", 1)
+        player.add_to_playlist(video)
+        
+        downloader = Mock()
+        downloader.resolve_stream = AsyncMock(return_value=False)
+        refresher = StreamRefresher(player, downloader, retry_delay=60)
+        
+        assert await refresher.refresh_due() == 0
+        assert await refresher.refresh_due() == 0
+        downloader.resolve_stream.assert_called_once_with(video)
+        assert refresher.collect_due(now=time.time() + 61) == [video]
+
+
+
+class FakeResolver:
+    """解決した曲を記録するダウンローダーの代用"""
+    
+    def __init__(self, delay: float = 0.0, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.resolved = []
+    
+    async def resolve_stream(self, video):
+        await asyncio.sleep(self.delay)
+        self.resolved.append(video.title)
+        if video.title in self.fail:
+            return False
+        video.audio_url = f"https://example.com/{video.title}.mp3"
+        video.is_placeholder = False
+        return True
+
+
+class TestTrackPrefetcher:
+    """TrackPrefetcherクラスのテスト"""
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_play_resolves_just_in_time(self, mock_vlc, make_player):
+        """再生時に解決され、次の1曲だけが先読みされるテスト"""
+        player = make_player(6, placeholder=True)
+        resolver = FakeResolver()
+        prefetcher = TrackPrefetcher(player, resolver, prefetch_count=3, prefetch_delay=60)
+        
+        assert await prefetcher.play_current() is True
+        await asyncio.sleep(0.01)
+        
+        assert player.current_video.title == "t0"
+        assert resolver.resolved == ["t0", "t1"]
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_prefetched_track_head_is_warmed(self, mock_vlc, make_player):
+        """先読みで解決した曲の先頭がプロキシに先読みされるテスト"""
+        player = make_player(3, placeholder=True)
+        player.stream_proxy = Mock()
+        player.stream_proxy.has_head.return_value = False
+        resolver = FakeResolver()
+        prefetcher = TrackPrefetcher(player, resolver, prefetch_count=3, prefetch_delay=60)
+        
+        await prefetcher.play_current()
+        await asyncio.sleep(0.01)
+        
+        warmed = [c.args[0].video_id for c in player.stream_proxy.prefetch_head.call_args_list]
+        assert warmed == ["t1"]
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_prefetch_widens_while_track_keeps_playing(self, mock_vlc, make_player):
+        """再生が続くと prefetch_count 曲まで先読みが広がるテスト"""
+        player = make_player(6, placeholder=True)
+        resolver = FakeResolver()
+        prefetcher = TrackPrefetcher(player, resolver, prefetch_count=3, prefetch_delay=0.01)
+        
+        await prefetcher.play_current()
+        await asyncio.sleep(0.05)
+        
+        assert resolver.resolved == ["t0", "t1", "t2", "t3"]
+        
+        # 先読み済みの次の曲は解決を待たずに再生される
+        assert await prefetcher.next_track() is True
+        assert player.current_index == 1
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_skipped_tracks_are_not_prefetched(self, mock_vlc, make_player):
+        """すぐに飛ばした曲の先は解決されないテスト"""
+        player = make_player(6, placeholder=True)
+        resolver = FakeResolver()
+        prefetcher = TrackPrefetcher(player, resolver, prefetch_count=3, prefetch_delay=60)
+        
+        await prefetcher.play_current()
+        await prefetcher.next_track()
+        await prefetcher.next_track()
+        await asyncio.sleep(0.01)
+        
+        assert player.current_index == 2
+        assert resolver.resolved == ["t0", "t1", "t2", "t3"]
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_skip_resolves_only_target(self, mock_vlc, make_player):
+        """複数曲を飛ばす場合は途中の曲を解決しないテスト"""
+        player = make_player(6, placeholder=True)
+        resolver = FakeResolver()
+        prefetcher = TrackPrefetcher(player, resolver, prefetch_count=1)
+        
+        assert await prefetcher.skip(3) is True
+        await asyncio.sleep(0.01)
+        
+        assert player.current_video.title == "t3"
+        assert resolver.resolved == ["t3", "t4"]
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_rapid_skips_play_only_the_last_request(self, mock_vlc, make_player):
+        """解決待ちの間に曲送りが続いた場合は最後の曲だけが再生されるテスト"""
+        player = make_player(4, placeholder=True)
+        player.playlist[0].audio_url = "https://example.com/t0.mp3"
+        player.play_current()
+        resolver = FakeResolver(delay=0.01)
+        prefetcher = TrackPrefetcher(player, resolver, prefetch_count=1)
+        
+        results = await asyncio.gather(prefetcher.next_track(), prefetcher.next_track())
+        
+        assert results == [False, True]
+        assert player.current_index == 2
+        assert player.current_video.title == "t2"
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_offline_skips_uncached_tracks_without_resolving(self, mock_vlc, make_player):
+        """オフラインモードでは未キャッシュの曲を解決せずに飛ばすテスト"""
+        player = make_player(4, placeholder=True)
+        player.audio_cache = Mock()
+        player.audio_cache.__contains__ = Mock(side_effect=lambda video_id: video_id == "t2")
+        player.audio_cache.get_path.return_value = "/cache/t2.audio"
+        player.offline = True
+        resolver = FakeResolver()
+        prefetcher = TrackPrefetcher(player, resolver)
+        
+        assert await prefetcher.play_current() is False
+        assert await prefetcher.next_track() is True
+        assert player.current_index == 2
+        assert prefetcher.prefetch() == 0
+        assert resolver.resolved == []
+        prefetcher.stop()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_unresolvable_track_is_not_played(self, mock_vlc, make_player):
+        """解決に失敗した曲は再生されないテスト"""
+        player = make_player(2, placeholder=True)
+        prefetcher = TrackPrefetcher(player, FakeResolver(fail={"t0"}))
+        
+        assert await prefetcher.play_current() is False
+        assert player.current_video is None
+        assert await prefetcher.previous_track() is False
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_cached_track_needs_no_resolution(self, mock_vlc, tmp_path):
+        """音声キャッシュにある曲はストリームURLを解決せずに再生されるテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        source = tmp_path / "t0.src"
+        source.write_bytes(b"audio")
+        cache.store("t0", source)
+        player = MediaPlayer(audio_cache=cache)
+        video = VideoInfo("https://youtu.be/t0", "t0", video_id="t0")
+        video.is_placeholder = True
+        player.add_to_playlist(video)
+        resolver = FakeResolver()
+        
+        assert await TrackPrefetcher(player, resolver).play_current() is True
+        
+        assert resolver.resolved == []
+        player.instance.media_new.assert_called_once_with(str(cache.get_path("t0")))
+        cache.close()
+    
+    @pytest.mark.asyncio
+    @patch('src.core.media_player.vlc')
+    async def test_concurrent_requests_share_resolution(self, mock_vlc, make_player):
+        """同じ曲の先読みと再生時の解決が1回にまとめられるテスト"""
+        player = make_player(1, placeholder=True)
+        resolver = FakeResolver(delay=0.01)
+        prefetcher = TrackPrefetcher(player, resolver)
+        
+        assert prefetcher.prefetch(1) == 1
+        assert prefetcher.pending == 1
+        assert await prefetcher.play_current() is True
         
-        assert result is None 
\ No newline at end of file
+        assert resolver.resolved == ["t0"]
+        assert prefetcher.pending == 0
+        prefetcher.stop()
\ No newline at end of file
@@ -3,7 +3,7 @@
 """
 
 import pytest
-from src.models.video_info import VideoInfo
+from src.models.video_info import VideoInfo, parse_stream_expiry
 
 
 class TestVideoInfo:
@@ -141,4 +141,46 @@ class TestVideoInfo:
         )
         # is_loaded = False のまま
         
-        assert video.is_valid() is False 
\ No newline at end of file
+        assert video.is_valid() is False 
+    
+    def test_expiry_parsed_from_query(self):
+        """クエリパラメータの有効期限を解析するテスト"""
+        video = VideoInfo(
+            url="https://www.youtube.com/watch?v=test",
+            audio_url="https://rr1.googlevideo.com/videoplayback?expire=1700000000&itag=251"
+        )
+        
+        assert video.expires_at == 1700000000.0
+        assert video.seconds_until_expiry(now=1699999000.0) == 1000.0
+        assert video.is_stream_expired(now=1699999000.0) is False
+        assert video.is_stream_expired(margin=1200, now=1699999000.0) is True
+        assert video.is_stream_expired(now=1700000001.0) is True
+    
+    def test_expiry_updated_when_audio_url_changes(self):
+        """音声URL変更時に有効期限が更新されるテスト"""
+        video = VideoInfo(url="https://www.youtube.com/watch?v=test")
+        assert video.expires_at is None
+        assert video.is_stream_expired() is False
+        
+        video.audio_url = "https://rr1.googlevideo.com/videoplayback/expire/1700000000/itag/251"
+        assert video.expires_at == 1700000000.0
+        
+        video.audio_url = "https://example.com/audio.mp3"
+        assert video.expires_at is None
+    
+    def test_needs_resolution(self):
+        """ストリームURLの解決が必要かの判定テスト"""
+        video = VideoInfo(url="https://www.youtube.com/watch?v=test", title="Placeholder")
+        assert video.needs_resolution() is True
+        
+        video.audio_url = "https://rr1.googlevideo.com/videoplayback?expire=1"
+        assert video.needs_resolution() is True
+        
+        video.audio_url = "https://example.com/audio.mp3"
+        assert video.needs_resolution() is False
+    
+    def test_parse_stream_expiry_invalid(self):
+        """有効期限を含まないURLの解析テスト"""
+        assert parse_stream_expiry("") is None
+        assert parse_stream_expiry("https://example.com/audio.mp3?expire=abc") is None
+        assert parse_stream_expiry("https://example.com/audio.mp3") is None
@@ -0,0 +1,406 @@
+"""
+プレイリストのテスト
+"""
+
+import random
+import time
+import pytest
+from unittest.mock import patch
+from src.core.media_player import MediaPlayer
+from src.core.play_order import ShuffleOrder
+from src.core.playlist import Playlist
+from src.models.video_info import VideoInfo
+
+
+def _video(i: int, video_id: str = "") -> VideoInfo:
+    """テスト用の動画情報"""
+    video = VideoInfo(f"https://youtu.be/t{i}", f"t{i}", audio_url=f"https://example.com/t{i}.mp3",
+                      video_id=video_id or f"t{i}")
+    video.is_loaded = True
+    return video
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """ブロックの分割・結合が起きやすいよう小さいブロックにする"""
+    monkeypatch.setattr(Playlist, "BLOCK_SIZE", 4)
+
+
+class TestPlaylist:
+    """Playlistクラスのテスト"""
+    
+    def test_list_compatible_operations(self):
+        """リストと同じ操作で動画を扱えるテスト"""
+        videos = [_video(i) for i in range(5)]
+        playlist = Playlist(videos)
+        
+        assert len(playlist) == 5
+        assert playlist == videos
+        assert playlist[0] is videos[0]
+        assert playlist[-1] is videos[4]
+        assert playlist[1:3] == videos[1:3]
+        assert list(playlist) == videos
+        assert videos[2] in playlist
+        assert playlist.index(videos[3]) == 3
+        
+        assert playlist.pop(1) is videos[1]
+        assert playlist == [videos[0], videos[2], videos[3], videos[4]]
+        with pytest.raises(IndexError):
+            playlist[10]
+        
+        playlist.clear()
+        assert not playlist
+        assert playlist == []
+    
+    def test_matches_list_under_random_edits(self, small_blocks):
+        """挿入・削除・移動を繰り返してもリストと同じ並びになるテスト"""
+        rng = random.Random(0)
+        videos = [_video(i, f"v{i % 7}") for i in range(100)]
+        playlist, expected = Playlist(), []
+        
+        for _ in range(3000):
+            action = rng.random()
+            if action < 0.45 or not expected:
+                index = rng.randint(-3, len(expected) + 3)
+                video = rng.choice(videos)
+                playlist.insert(index, video)
+                expected.insert(index, video)
+            elif action < 0.8:
+                index = rng.randrange(len(expected))
+                assert playlist.pop(index) is expected.pop(index)
+            else:
+                source, dest = rng.randrange(len(expected)), rng.randrange(len(expected))
+                playlist.move(source, dest)
+                expected.insert(dest, expected.pop(source))
+        
+        assert playlist == expected
+        assert [playlist[i] for i in range(len(expected))] == expected
+        for index, entry in enumerate(playlist.entries()):
+            assert playlist.index_of(entry) == index
+    
+    def test_entry_keeps_identity_across_edits(self, small_blocks):
+        """他の項目の増減・移動の後も項目から現在の位置を求められるテスト"""
+        playlist = Playlist(_video(i) for i in range(20))
+        entry = playlist.entry_at(10)
+        
+        playlist.insert(0, _video(100))
+        playlist.pop(15)
+        playlist.move(0, 19)
+        
+        assert playlist.entry_at(playlist.index_of(entry)) is entry
+        assert playlist.index_of(entry) == 10
+        
+        playlist.remove_entry(entry)
+        assert not playlist.contains_entry(entry)
+        with pytest.raises(ValueError):
+            playlist.index_of(entry)
+    
+    def test_entry_ids_unique_for_duplicates(self):
+        """同じ動画を複数回追加しても項目IDが異なり、動画IDで検索できるテスト"""
+        playlist = Playlist()
+        first = playlist.append(_video(1, "dup"))
+        second = playlist.append(_video(2, "dup"))
+        playlist.append(_video(3, "other"))
+        
+        assert first.entry_id != second.entry_id
+        assert playlist.contains_video_id("dup")
+        assert playlist.entries_for("dup") == [first, second]
+        
+        playlist.remove_entry(first)
+        playlist.remove_entry(second)
+        assert not playlist.contains_video_id("dup")
+        assert playlist.entries_for("dup") == []
+    
+    def test_placeholder_found_after_video_id_resolves(self):
+        """動画IDなしで追加した項目も、後から決まった動画IDで検索・削除できるテスト"""
+        playlist = Playlist([_video(0)])
+        placeholder = VideoInfo("https://youtu.be/late", "late", video_id="")
+        entry = playlist.append(placeholder)
+        
+        placeholder.video_id = "late"
+        assert playlist.find(placeholder) is entry
+        assert placeholder in playlist
+        assert playlist.index(placeholder) == 1
+        assert playlist.contains_video_id("late")
+        assert playlist.entries_for("late") == [entry]
+        assert playlist.entries_for("") == []
+        
+        playlist.remove_entry(entry)
+        assert not playlist.contains_video_id("late")
+        assert playlist.find(placeholder) is None
+
+
+class TestMediaPlayerPlaylist:
+    """MediaPlayerのプレイリスト操作のテスト"""
+    
+    @patch('src.core.media_player.vlc')
+    def test_current_index_follows_entry(self, mock_vlc, make_player):
+        """他の曲の削除・挿入・移動の後も同じ曲を選択し続けるテスト"""
+        player = make_player(5)
+        player.current_index = 2
+        
+        player.remove_from_playlist(0)
+        assert player.current_index == 1
+        assert player.playlist[player.current_index].title == "t2"
+        
+        player.insert_into_playlist(0, _video(9))
+        player.move_in_playlist(4, 0)
+        assert player.playlist[player.current_index].title == "t2"
+    
+    @patch('src.core.media_player.vlc')
+    def test_removing_current_selects_following(self, mock_vlc, make_player):
+        """選択中の曲を削除すると同じ位置の曲、末尾の場合は直前の曲を選択するテスト"""
+        player = make_player(3)
+        player.current_index = 1
+        
+        player.remove_from_playlist(1)
+        assert player.playlist[player.current_index].title == "t2"
+        
+        player.remove_from_playlist(1)
+        assert player.current_index == 0
+        assert player.playlist[player.current_index].title == "t0"
+        
+        player.remove_from_playlist(0)
+        assert player.current_index == 0
+        assert player.current_video is None
+    
+    @patch('src.core.media_player.vlc')
+    def test_has_video(self, mock_vlc, make_player):
+        """動画IDでプレイリスト内の重複を確認できるテスト"""
+        player = make_player(3)
+        
+        assert player.has_video("t1") is True
+        assert player.has_video("missing") is False
+        
+        player.remove_video(player.playlist[1])
+        assert player.has_video("t1") is False
+
+
+def _always(video) -> bool:
+    return True
+
+
+class TestShuffleOrder:
+    """ShuffleOrderクラスのテスト"""
+    
+    def _play_cycle(self, order: ShuffleOrder, playlist: Playlist):
+        """周回の終わりまで次の曲を再生し、再生した項目を返す"""
+        played = []
+        entry = order.next_entry(_always)
+        while entry is not None:
+            order.moved_to(entry)
+            played.append(entry)
+            entry = order.next_entry(_always)
+        return played
+    
+    def test_no_repeats_until_exhausted(self):
+        """1周するまで同じ曲が選ばれず、全曲が1回ずつ選ばれるテスト"""
+        playlist = Playlist(_video(i) for i in range(50))
+        order = ShuffleOrder(playlist, random.Random(1))
+        
+        played = self._play_cycle(order, playlist)
+        
+        assert sorted(entry.entry_id for entry in played) == list(range(1, 51))
+        assert [entry.entry_id for entry in played] != list(range(1, 51))
+        
+        order.new_cycle(avoid=played[-1])
+        second = self._play_cycle(order, playlist)
+        assert len(second) == 50
+        assert second[0] is not played[-1]
+    
+    def test_previous_walks_history(self):
+        """前の曲が再生した順に遡り、戻った後の次の曲は同じ順に進むテスト"""
+        playlist = Playlist(_video(i) for i in range(20))
+        order = ShuffleOrder(playlist, random.Random(2))
+        played = []
+        for _ in range(5):
+            entry = order.next_entry(_always)
+            order.moved_to(entry)
+            played.append(entry)
+        
+        for expected in reversed(played[:-1]):
+            entry = order.previous_entry(_always)
+            assert entry is expected
+            order.moved_to(entry)
+        assert order.previous_entry(_always) is None
+        
+        for expected in played[1:]:
+            entry = order.next_entry(_always)
+            assert entry is expected
+            order.moved_to(entry)
+    
+    def test_survives_insertions_and_deletions(self):
+        """再生中の追加・削除の後も、残っている曲と追加した曲が1回ずつ選ばれるテスト"""
+        playlist = Playlist(_video(i) for i in range(30))
+        order = ShuffleOrder(playlist, random.Random(3))
+        played = []
+        for _ in range(10):
+            entry = order.next_entry(_always)
+            order.moved_to(entry)
+            played.append(entry)
+        
+        removed = [entry for entry in playlist.entries() if entry not in played][:5]
+        for entry in removed:
+            playlist.remove_entry(entry)
+        added = [playlist.append(_video(100 + i)) for i in range(3)]
+        played += self._play_cycle(order, playlist)
+        
+        assert len(played) == len(set(played)) == 28
+        assert set(played) == set(playlist.entries())
+        assert not set(removed) & set(played)
+        assert set(added) <= set(played)
+    
+    def test_jump_to_unplayed_entry(self):
+        """未再生の曲を選んで再生しても、その曲が周回の中で重複しないテスト"""
+        playlist = Playlist(_video(i) for i in range(10))
+        order = ShuffleOrder(playlist, random.Random(4))
+        first = order.next_entry(_always)
+        order.moved_to(first)
+        peeked = order.next_entry(_always)
+        chosen = next(entry for entry in playlist.entries() if entry not in (first, peeked))
+        
+        order.moved_to(chosen)
+        played = [first, chosen] + self._play_cycle(order, playlist)
+        
+        assert len(played) == len(set(played)) == 10
+        assert order.previous_entry(_always) is not None
+    
+    def test_lookahead_keeps_current_cycle(self):
+        """周回の終わりで次の周回の曲を問い合わせても、進むまで今の周回を保つテスト"""
+        playlist = Playlist(_video(i) for i in range(6))
+        order = ShuffleOrder(playlist, random.Random(5))
+        played = self._play_cycle(order, playlist)
+        
+        wrap = order.next_entry(_always, wrap=True)
+        
+        assert wrap is not played[-1]
+        assert order.next_entry(_always, wrap=True) is wrap
+        assert order.previous_entry(_always) is played[-2]
+        
+        order.moved_to(wrap, advance=True)
+        assert order.previous_entry(_always) is None
+        assert len(self._play_cycle(order, playlist)) == 5
+    
+    def test_moving_back_discards_lookahead(self):
+        """次の周回の曲を問い合わせた後に前の曲へ戻った場合は今の周回のまま進むテスト"""
+        playlist = Playlist(_video(i) for i in range(6))
+        order = ShuffleOrder(playlist, random.Random(6))
+        played = self._play_cycle(order, playlist)
+        wrap = order.next_entry(_always, wrap=True)
+        
+        # 戻った先がたまたま次の周回の最初の曲でも、曲送りでなければ周回は変わらない
+        order.moved_to(wrap)
+        
+        assert not order.is_next_cycle(wrap)
+        assert order.next_entry(_always) is played[played.index(wrap) + 1]
+    
+    def test_enabling_on_large_playlist_is_lazy(self):
+        """10万曲でもシャッフル開始と曲送りが全体を並べ替えないテスト"""
+        playlist = Playlist(_video(i) for i in range(100_000))
+        
+        start = time.perf_counter()
+        order = ShuffleOrder(playlist)
+        order.new_cycle(current=playlist.entry_at(500))
+        for _ in range(100):
+            order.moved_to(order.next_entry(_always))
+        order.previous_entry(_always)
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < 0.1
+        assert len(order._slots) <= 2 * 101
+
+
+class TestMediaPlayerPlayOrder:
+    """MediaPlayerのシャッフル・リピートのテスト"""
+    
+    @patch('src.core.media_player.vlc')
+    def test_shuffle_plays_every_track_once(self, mock_vlc, make_player):
+        """シャッフル中の曲送りで全曲が1回ずつ再生され、前の曲で戻れるテスト"""
+        player = make_player(8)
+        player.set_shuffle(True)
+        player.play_current()
+        played = [player.current_video.title]
+        while player.next_track():
+            played.append(player.current_video.title)
+        
+        assert sorted(played) == sorted(f"t{i}" for i in range(8))
+        assert player.previous_track() is True
+        assert player.current_video.title == played[-2]
+    
+    @patch('src.core.media_player.vlc')
+    def test_repeat_one_and_all(self, mock_vlc, make_player):
+        """1曲リピートは曲の終了時だけ同じ曲、全曲リピートは末尾から先頭に戻るテスト"""
+        player = make_player(3)
+        player.current_index = 2
+        
+        assert player.next_index(auto=True) is None
+        
+        player.set_repeat(MediaPlayer.REPEAT_ONE)
+        assert player.next_index(auto=True) == 2
+        assert player.next_index() is None
+        
+        player.set_repeat(MediaPlayer.REPEAT_ALL)
+        assert player.next_index(auto=True) == 0
+        player.play_index(0)
+        assert player.previous_index() == 2
+        assert player.upcoming(3) == [player.playlist[1], player.playlist[2], player.playlist[0]]
+        
+        with pytest.raises(ValueError):
+            player.set_repeat("twice")
+    
+    @patch('src.core.media_player.vlc')
+    def test_shuffle_repeat_all_starts_new_cycle(self, mock_vlc, make_player):
+        """シャッフルと全曲リピートでは周回が終わると新しい周回に入るテスト"""
+        player = make_player(4)
+        player.set_shuffle(True)
+        player.set_repeat(MediaPlayer.REPEAT_ALL)
+        player.play_current()
+        
+        played = [player.current_video.title]
+        for _ in range(7):
+            assert player.next_track() is True
+            played.append(player.current_video.title)
+        
+        assert sorted(played[:4]) == sorted(played[4:]) == ["t0", "t1", "t2", "t3"]
+        assert played[3] != played[4]
+    
+    @patch('src.core.media_player.vlc')
+    def test_previous_after_preload_at_end_of_cycle(self, mock_vlc, make_player):
+        """周回の最後の曲で次の曲を先読みしても、前の曲でこの周回を遡れるテスト"""
+        player = make_player(3)
+        player.set_shuffle(True)
+        player.set_repeat(MediaPlayer.REPEAT_ALL)
+        player.play_current()
+        played = [player.current_video]
+        for _ in range(2):
+            assert player.next_track() is True
+            played.append(player.current_video)
+        previous = player.playlist.index(played[-2])
+        assert player.previous_index() == previous
+        
+        # 先読み・先読みする曲の決定は読み取りだけで、周回を作り直さない
+        wrap = player.next_index(auto=True)
+        assert player.preload_next() is True
+        player.upcoming(3)
+        
+        assert player.previous_index() == previous
+        assert player.next_index(auto=True) == wrap
+        
+        assert player.next_track(auto=True) is True
+        assert player.current_index == wrap
+        assert player.previous_index() is None
+        
+        # 前の曲へ戻った場合は同じ周回の中を進む
+        player = make_player(3)
+        player.set_shuffle(True)
+        player.set_repeat(MediaPlayer.REPEAT_ALL)
+        player.play_current()
+        played = [player.current_video]
+        for _ in range(2):
+            player.next_track()
+            played.append(player.current_video)
+        player.preload_next()
+        
+        assert player.previous_track() is True
+        assert player.next_track() is True
+        assert player.current_video is played[-1]
\ No newline at end of file
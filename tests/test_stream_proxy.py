@@ -0,0 +1,210 @@
+"""
+ストリームプロキシのテスト
+"""
+
+import time
+import pytest
+import requests
+from src.core.audio_cache import AudioCache
+from src.core.stream_proxy import StreamProxy, RangeSet
+from src.models.video_info import VideoInfo
+
+
+@pytest.fixture
+def upstream(range_server):
+    """ストリームを配信するローカルHTTPサーバー（プロキシの分割読み込みが起きる大きさの曲）"""
+    range_server.body = bytes(range(256)) * 1024
+    return range_server
+
+
+@pytest.fixture
+def proxy(tmp_path):
+    """テスト用のプロキシ"""
+    proxy = StreamProxy(cache_dir=tmp_path / "stream")
+    yield proxy
+    proxy.stop()
+
+
+def _video(audio_url: str) -> VideoInfo:
+    """上流URLを持つ動画情報を作成"""
+    return VideoInfo(
+        url="https://www.youtube.com/watch?v=dQw4w9WgXcQ", title="Song",
+        duration=180, channel="Channel", audio_url=audio_url, video_id="dQw4w9WgXcQ"
+    )
+
+
+class TestRangeSet:
+    """RangeSetクラスのテスト"""
+    
+    def test_add_merges_overlapping_and_adjacent(self):
+        """重なる範囲・隣接する範囲が結合されるテスト"""
+        ranges = RangeSet()
+        ranges.add(0, 10)
+        ranges.add(20, 30)
+        ranges.add(10, 15)
+        ranges.add(40, 50)
+        ranges.add(25, 45)
+        
+        assert list(ranges) == [(0, 15), (20, 50)]
+        assert ranges.total == 45
+    
+    def test_covered_until_and_missing(self):
+        """取得済みの終端と未取得の範囲のテスト"""
+        ranges = RangeSet()
+        ranges.add(10, 20)
+        ranges.add(30, 40)
+        
+        assert ranges.covered_until(12) == 20
+        assert ranges.covered_until(25) == 25
+        assert ranges.next_start(20, 100) == 30
+        assert ranges.missing(0, 50) == [(0, 10), (20, 30), (40, 50)]
+        assert ranges.missing(10, 20) == []
+
+
+class TestStreamProxy:
+    """StreamProxyクラスのテスト"""
+    
+    def test_streams_whole_track(self, proxy, upstream):
+        """上流のストリームをそのまま中継するテスト"""
+        url = proxy.url_for(_video(f"{upstream.url}/ranged"))
+        
+        response = requests.get(url, timeout=5)
+        
+        assert response.status_code == 200
+        assert response.content == upstream.body
+        assert list(proxy.cached_ranges("dQw4w9WgXcQ")) == [(0, len(upstream.body))]
+    
+    def test_repeated_range_served_locally(self, proxy, upstream):
+        """取得済みの範囲への再リクエストは上流に送らないテスト"""
+        url = proxy.url_for(_video(f"{upstream.url}/ranged"))
+        first = requests.get(url, headers={"Range": "bytes=1000-4999"}, timeout=5)
+        
+        second = requests.get(url, headers={"Range": "bytes=2000-2999"}, timeout=5)
+        
+        assert first.status_code == 206
+        assert second.status_code == 206
+        assert second.headers["Content-Range"] == f"bytes 2000-2999/{len(upstream.body)}"
+        assert second.content == upstream.body[2000:3000]
+        assert upstream.ranges == ["bytes=1000-4999"]
+    
+    def test_only_missing_ranges_fetched(self, proxy, upstream):
+        """一部が取得済みの範囲は未取得の部分だけを上流から取得するテスト"""
+        url = proxy.url_for(_video(f"{upstream.url}/ranged"))
+        requests.get(url, headers={"Range": "bytes=1000-1999"}, timeout=5)
+        
+        response = requests.get(url, headers={"Range": "bytes=0-2999"}, timeout=5)
+        
+        assert response.content == upstream.body[:3000]
+        assert upstream.ranges == ["bytes=1000-1999", "bytes=0-999", "bytes=2000-2999"]
+    
+    def test_prefetch_head(self, proxy, upstream):
+        """曲の先頭を先読みし、再生時は先頭をローカルから返すテスト"""
+        video = _video(f"{upstream.url}/ranged")
+        
+        future = proxy.prefetch_head(video, nbytes=65536)
+        
+        assert future is not None
+        future.result(timeout=5)
+        assert proxy.has_head("dQw4w9WgXcQ", 65536)
+        assert proxy.prefetch_head(video, nbytes=65536) is None
+        
+        response = requests.get(proxy.url_for(video), headers={"Range": "bytes=0-"}, timeout=5)
+        
+        assert response.content == upstream.body
+        assert upstream.ranges == [
+            "bytes=0-65535", f"bytes=65536-{len(upstream.body) - 1}"
+        ]
+    
+    def test_expired_url_is_refreshed(self, tmp_path, upstream):
+        """上流が403を返した場合に再解決したURLで続けるテスト"""
+        refreshed = []
+        
+        def refresh(video):
+            refreshed.append(video.video_id)
+            video.audio_url = f"{upstream.url}/ranged"
+            return True
+        
+        proxy = StreamProxy(refresh=refresh, cache_dir=tmp_path / "stream")
+        url = proxy.url_for(_video(f"{upstream.url}/expired"))
+        
+        response = requests.get(url, headers={"Range": "bytes=0-99"}, timeout=5)
+        
+        assert response.status_code == 206
+        assert response.content == upstream.body[:100]
+        assert refreshed == ["dQw4w9WgXcQ"]
+        proxy.stop()
+    
+    def test_refresh_failure_returns_bad_gateway(self, proxy, upstream):
+        """再解決できない場合は502を返すテスト"""
+        url = proxy.url_for(_video(f"{upstream.url}/expired"))
+        
+        response = requests.get(url, timeout=5)
+        
+        assert response.status_code == 502
+    
+    def test_unknown_track_not_found(self, proxy, upstream):
+        """登録されていない曲は404を返すテスト"""
+        proxy.start()
+        url = proxy.url_for(_video(f"{upstream.url}/ranged")).replace("dQw4w9WgXcQ", "unknown")
+        
+        assert requests.get(url, timeout=5).status_code == 404
+    
+    def test_old_tracks_are_dropped(self, tmp_path, upstream):
+        """保持する曲数を超えた場合に古い曲のキャッシュを削除するテスト"""
+        proxy = StreamProxy(cache_dir=tmp_path / "stream", max_tracks=1)
+        first = _video(f"{upstream.url}/ranged")
+        requests.get(proxy.url_for(first), headers={"Range": "bytes=0-9"}, timeout=5)
+        second = _video(f"{upstream.url}/ranged")
+        second.video_id = "another1234"
+        
+        proxy.url_for(second)
+        
+        assert proxy.cached_ranges("dQw4w9WgXcQ") is None
+        assert not (proxy.cache_dir / "dQw4w9WgXcQ.sparse").exists()
+        proxy.stop()
+    
+    def test_instances_do_not_remove_each_others_files(self, tmp_path, upstream):
+        """同じディレクトリを使う別のインスタンスのファイルを削除しないテスト"""
+        other_file = tmp_path / "stream" / "other.txt"
+        other_file.parent.mkdir()
+        other_file.write_text("keep")
+        first = StreamProxy(cache_dir=tmp_path / "stream")
+        requests.get(first.url_for(_video(f"{upstream.url}/ranged")), headers={"Range": "bytes=0-9"}, timeout=5)
+        
+        second = StreamProxy(cache_dir=tmp_path / "stream")
+        second.start()
+        second.stop()
+        
+        assert first.cache_dir != second.cache_dir
+        assert (first.cache_dir / "dQw4w9WgXcQ.sparse").exists()
+        assert not second.cache_dir.exists()
+        assert other_file.read_text() == "keep"
+        first.stop()
+        assert not first.cache_dir.exists()
+    
+    def test_complete_track_is_stored_in_audio_cache(self, tmp_path, upstream):
+        """全体を取得した曲は音声キャッシュへ渡され、再ダウンロードしないテスト"""
+        cache = AudioCache(cache_dir=tmp_path / "audio")
+        proxy = StreamProxy(cache_dir=tmp_path / "stream", audio_cache=cache)
+        url = proxy.url_for(_video(f"{upstream.url}/ranged"))
+        requests.get(url, headers={"Range": "bytes=0-999"}, timeout=5)
+        
+        assert "dQw4w9WgXcQ" not in cache
+        
+        response = requests.get(url, headers={"Range": "bytes=1000-"}, timeout=5)
+        
+        assert response.content == upstream.body[1000:]
+        # 応答を書き終えた後にプロキシのスレッドでキャッシュへ渡す
+        deadline = time.monotonic() + 5
+        while "dQw4w9WgXcQ" not in cache and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.get_path("dQw4w9WgXcQ").read_bytes() == upstream.body
+        assert upstream.ranges == ["bytes=0-999", f"bytes=1000-{len(upstream.body) - 1}"]
+        assert not list((tmp_path / "audio").glob("*.download"))
+        
+        # キャッシュへ渡した後もプロキシから返せる
+        again = requests.get(url, headers={"Range": "bytes=0-99"}, timeout=5)
+        assert again.content == upstream.body[:100]
+        proxy.stop()
+        assert cache.get_path("dQw4w9WgXcQ").read_bytes() == upstream.body
+        cache.close()
\ No newline at end of file
@@ -3,7 +3,7 @@ UIウィジェットのテスト
 """
 
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, PropertyMock, patch
 from src.ui.widgets.progress_bar import CustomProgressBar
 from src.ui.widgets.playlist_widget import PlaylistWidget
 from src.ui.widgets.player_control_widget import PlayerControlWidget
@@ -124,6 +124,47 @@ class TestPlaylistWidget:
             widget.clear.assert_called_once()
             widget.append.assert_called_once()
     
+    @patch('src.core.media_player.vlc')
+    def test_update_playlist_reads_current_index_once(self, mock_vlc, make_player):
+        """再生中の曲の位置をプレイリストの行ごとに探さないテスト"""
+        player = make_player(50)
+        
+        with patch('src.ui.widgets.playlist_widget.ListView') as mock_listview, \
+                patch.object(MediaPlayer, 'current_index', new_callable=PropertyMock,
+                             return_value=3) as current_index:
+            mock_listview.return_value = Mock()
+            
+            widget = PlaylistWidget(player)
+            widget.clear = Mock()
+            widget.append = Mock()
+            
+            widget.update_playlist()
+            
+            assert widget.append.call_count == 50
+            assert current_index.call_count == 1
+    
+    @patch('src.core.media_player.vlc')
+    def test_update_playlist_marks_unavailable_offline(self, mock_vlc, sample_video_info):
+        """オフラインモードで未キャッシュの曲が再生不可として表示されるテスト"""
+        player = MediaPlayer()
+        player.add_to_playlist(sample_video_info)
+        player.offline = True
+        
+        with patch('src.ui.widgets.playlist_widget.ListView') as mock_listview:
+            mock_listview.return_value = Mock()
+            
+            widget = PlaylistWidget(player)
+            widget.clear = Mock()
+            widget.append = Mock()
+            
+            with patch('src.ui.widgets.playlist_widget.Label') as mock_label, \
+                    patch('src.ui.widgets.playlist_widget.ListItem'):
+                widget.update_playlist()
+            
+            text = mock_label.call_args.args[0]
+            assert text.startswith("[dim]")
+            assert "(未キャッシュ)" in text
+    
     @patch('src.core.media_player.vlc')
     def test_get_selected_index_none(self, mock_vlc):
         """選択なしのインデックス取得テスト"""
@@ -263,4 +304,32 @@ class TestPlayerControlWidget:
         # 一時停止状態の表示確認
         expected_call = f"⏸️ [dim]{sample_video_info.title}[/dim]"
         widget.status_label.update.assert_called_once_with(expected_call)
-        widget.progress_bar.reset.assert_called_once() 
\ No newline at end of file
+        widget.progress_bar.reset.assert_called_once() 
+    
+    @patch('src.ui.widgets.player_control_widget.Container.__init__')
+    @patch('src.core.media_player.vlc')
+    def test_update_display_skips_unchanged_state(self, mock_vlc, mock_container_init, sample_video_info):
+        """表示する内容が変わらない場合は再描画しないテスト"""
+        mock_container_init.return_value = None
+        player = MediaPlayer()
+        player.current_video = sample_video_info
+        player.is_playing = True
+        player._timeline[id(player.player)] = [1200, 180000]
+        
+        widget = PlayerControlWidget(player)
+        widget.status_label = Mock()
+        widget.progress_bar = Mock()
+        widget.time_label = Mock()
+        widget.remaining_label = Mock()
+        
+        widget.update_display()
+        widget.time_label.update.assert_called_once_with("⏱️  0:01 / 3:00")
+        
+        # 同じ秒の中の変化では描画しない
+        player._timeline[id(player.player)][0] = 1800
+        widget.update_display()
+        assert widget.time_label.update.call_count == 1
+        
+        player._timeline[id(player.player)][0] = 2000
+        widget.update_display()
+        widget.time_label.update.assert_called_with("⏱️  0:02 / 3:00")
\ No newline at end of file
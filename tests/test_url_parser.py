@@ -0,0 +1,118 @@
+"""
+YouTube URLパーサーのテスト
+"""
+
+import pytest
+from src.core.url_parser import ParsedURL, parse_timestamp, parse_youtube_url
+
+
+class TestParseYouTubeURL:
+    """parse_youtube_url関数のテスト"""
+    
+    @pytest.mark.parametrize("url", [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "http://youtube.com/watch?v=dQw4w9WgXcQ",
+        "youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+        "https://music.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "youtu.be/dQw4w9WgXcQ/",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+        "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+        "https://www.youtube.com/live/dQw4w9WgXcQ",
+        "  HTTPS://WWW.YOUTUBE.COM/watch?v=dQw4w9WgXcQ  ",
+    ])
+    def test_video_urls(self, url):
+        """各種動画URLから動画IDを抽出するテスト"""
+        parsed = parse_youtube_url(url)
+        
+        assert parsed is not None
+        assert parsed.video_id == "dQw4w9WgXcQ"
+        assert parsed.is_playlist is False
+        assert parsed.canonical_url == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    
+    @pytest.mark.parametrize("url, expected", [
+        ("https://youtu.be/dQw4w9WgXcQ?t=90", 90),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1m30s", 90),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1h2m3s", 3723),
+        ("https://www.youtube.com/embed/dQw4w9WgXcQ?start=42", 42),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ#t=15s", 15),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=bogus", None),
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", None),
+    ])
+    def test_start_time(self, url, expected):
+        """開始時間の解析テスト"""
+        assert parse_youtube_url(url).start_time == expected
+    
+    def test_playlist_urls(self):
+        """プレイリストURLの解析テスト"""
+        playlist = parse_youtube_url("https://www.youtube.com/playlist?list=PLabc_123")
+        in_playlist = parse_youtube_url("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PLabc_123&index=3")
+        
+        assert playlist == ParsedURL("", "PLabc_123")
+        assert playlist.is_playlist is True
+        assert playlist.canonical_url == "https://www.youtube.com/playlist?list=PLabc_123"
+        assert in_playlist == ParsedURL("dQw4w9WgXcQ", "PLabc_123")
+        assert in_playlist.is_playlist is False
+    
+    @pytest.mark.parametrize("url", [
+        "",
+        "https://example.com/watch?v=dQw4w9WgXcQ",
+        "https://notyoutube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com.evil.com/watch?v=dQw4w9WgXcQ",
+        "https://www.youtube.com/",
+        "https://www.youtube.com/watch",
+        "https://www.youtube.com/watch?v=",
+        "https://www.youtube.com/watch?v=<script>",
+        "https://www.youtube.com/channel/UCabc",
+        "https://youtu.be/",
+        "ftp://youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ def",
+        "https://www.youtube.com/watch?v=dQw4w9WgXc",
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQx",
+        "https://youtu.be/dQw4w9WgXc",
+        "https://youtu.be/dQw4w9WgXcQx",
+        "https://www.youtube.com/shorts/dQw4w9WgXc",
+        "https://www.youtube.com/embed/dQw4w9WgXcQx",
+        "https://www.youtube.com/watch?v=a",
+    ])
+    def test_rejects_non_video_urls(self, url):
+        """YouTubeの動画・プレイリスト以外のURLを拒否するテスト"""
+        assert parse_youtube_url(url) is None
+    
+    def test_cached_result_is_immutable(self):
+        """キャッシュされた解析結果を呼び出し元が書き換えられないテスト"""
+        url = "https://youtu.be/dQw4w9WgXcQ?t=30"
+        parsed = parse_youtube_url(url)
+        
+        with pytest.raises(AttributeError):
+            parsed.start_time = 0
+        with pytest.raises(AttributeError):
+            parsed.video_id = "other"
+        with pytest.raises(AttributeError):
+            del parsed.playlist_id
+        
+        assert parse_youtube_url(url) == ParsedURL("dQw4w9WgXcQ", "", 30)
+
+
+class TestParseTimestamp:
+    """parse_timestamp関数のテスト"""
+    
+    @pytest.mark.parametrize("text,expected", [
+        ("83", 83000),
+        ("1:23", 83000),
+        ("01:02:03", 3723000),
+        ("1:23.5", 83500),
+        ("0:00.042", 42),
+        ("1m30s", 90000),
+        (" 2h ", 7200000),
+    ])
+    def test_timestamps(self, text, expected):
+        """時刻表記とYouTubeの開始時間の表記をミリ秒に変換するテスト"""
+        assert parse_timestamp(text) == expected
+    
+    @pytest.mark.parametrize("text", ["", "dQw4w9WgXcQ", "1:2:3:4", "-5", "1:23.4567"])
+    def test_rejects_invalid(self, text):
+        """解析できない文字列はNoneを返すテスト"""
+        assert parse_timestamp(text) is None
\ No newline at end of file
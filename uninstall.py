@@ -107,6 +107,27 @@ def remove_cache_files():
     
     return True
 
+def remove_app_cache_dir():
+    """アプリケーションのキャッシュディレクトリ（メタデータ等）を削除"""
+    override = os.environ.get("YOUTUBE_AUDIO_PLAYER_CACHE_DIR")
+    if override:
+        cache_dir = Path(override)
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or (Path.home() / ".cache")
+        cache_dir = Path(base) / "youtube-audio-player"
+    
+    if not cache_dir.exists():
+        print("アプリケーションキャッシュが見つかりません")
+        return True
+    
+    try:
+        shutil.rmtree(cache_dir)
+        print(f"✓ {cache_dir} を削除しました")
+        return True
+    except Exception as e:
+        print(f"✗ {cache_dir} の削除に失敗しました: {e}")
+        return False
+
 def show_remaining_files():
     """残存ファイルを表示"""
     print("\n残存ファイル:")
@@ -153,6 +174,10 @@ def main():
     if not remove_cache_files():
         success = False
     
+    # アプリケーションキャッシュを削除
+    if not remove_app_cache_dir():
+        success = False
+    
     # 残存ファイルを表示
     show_remaining_files()
     